@@ -0,0 +1,5 @@
+import django
+
+# detected automatically since Django 3.2
+if django.VERSION < (3,2):
+    default_app_config = 'automatic_crud.apps.AutomaticCrudConfig'
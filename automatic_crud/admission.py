@@ -0,0 +1,198 @@
+import math
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from automatic_crud.data_types import Instance
+
+_semaphores = {}
+_semaphores_lock = threading.Lock()
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a heavy request can not be admitted, retry_after are the seconds
+    the client should wait before retrying.
+    """
+
+    def __init__(self,retry_after: int):
+        super().__init__('Heavy request rejected, retry after {0} seconds'.format(retry_after))
+        self.retry_after = retry_after
+
+def _get_option(model: Instance,attribute: str,setting: str,default = None):
+    # model attributes override global settings
+    value = getattr(model,attribute,None)
+    if value is None:
+        value = getattr(settings,setting,default)
+    return value
+
+def _get_semaphore(key: str,limit: int) -> threading.BoundedSemaphore:
+    with _semaphores_lock:
+        if key not in _semaphores:
+            _semaphores[key] = threading.BoundedSemaphore(limit)
+        return _semaphores[key]
+
+def _acquire_shared_slot(key: str,limit: int,timeout: float):
+    """
+    Take one of the limit slots stored in the cache, shared by every process that uses
+    the same cache backend, and return the key of the slot or None if no slot is free in
+    timeout seconds. Every slot is a key taken with cache.add, so it is atomic, and it
+    expires after AUTOMATIC_CRUD_ADMISSION_SLOT_TIMEOUT seconds, so slots of dead processes
+    are released eventually without changing the slots of other requests.
+
+    """
+
+
+    slot_timeout = getattr(settings,'AUTOMATIC_CRUD_ADMISSION_SLOT_TIMEOUT',3600)
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + timeout
+    while True:
+        for index in range(limit):
+            slot = '{0}:{1}'.format(key,index)
+            if cache.add(slot,token,slot_timeout):
+                return slot,token
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.1)
+
+def _release_shared_slot(slot: str,token: str):
+    # if the slot expired it can belong to another request, it is deleted only if it is still taken by this one
+    if cache.get(slot) == token:
+        cache.delete(slot)
+
+def _consume_token(key: str,rate: tuple):
+    """
+    Count a request in the current window of rate = (requests,seconds) for a client,
+    return (wait,window key), wait is 0 if it is admitted or the seconds until the next
+    window. The counter is updated with cache.add and cache.incr, so concurrent requests
+    can not exceed the rate when the cache backend increments atomically (Redis,
+    Memcached, local memory).
+
+    """
+
+
+    capacity,seconds = rate
+    now = time.time()
+    window = int(now // seconds)
+    key = '{0}:{1}'.format(key,window)
+    cache.add(key,0,int(math.ceil(seconds)) + 1)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # the counter expired between add and incr
+        cache.add(key,1,int(math.ceil(seconds)) + 1)
+        count = 1
+    if count > capacity:
+        _refund_token(key)
+        return (window + 1) * seconds - now,key
+    return 0,key
+
+def _refund_token(key: str):
+    # give back the request counted in the window key, used when the request is not admitted
+    try:
+        cache.decr(key)
+    except ValueError:
+        pass
+
+def _client_key(request) -> str:
+    user = getattr(request,'user',None)
+    if user is not None and user.is_authenticated:
+        return 'user-{0}'.format(user.pk)
+    return 'ip-{0}'.format(request.META.get('REMOTE_ADDR',''))
+
+class Admission:
+    """
+    Admission of a heavy request, admit() raises AdmissionRejected when the request
+    must be rejected and release() must be called when the work finishes.
+
+    The limits are read from the model or from settings:
+
+        max_concurrent_heavy_requests       AUTOMATIC_CRUD_MAX_CONCURRENT_HEAVY_REQUESTS
+        shared_concurrent_heavy_requests    AUTOMATIC_CRUD_SHARED_CONCURRENT_HEAVY_REQUESTS
+        heavy_requests_rate                 AUTOMATIC_CRUD_HEAVY_REQUESTS_RATE
+        admission_queue_timeout             AUTOMATIC_CRUD_ADMISSION_QUEUE_TIMEOUT
+
+    max_concurrent_heavy_requests is the limit per process, shared_concurrent_heavy_requests
+    is the limit for all processes using the cache, heavy_requests_rate is a tuple
+    (requests,seconds) for every user or ip counted in fixed windows of seconds, requests
+    rejected by a limit are not counted, and admission_queue_timeout are the seconds a
+    request waits for a free slot before being rejected.
+
+    """
+
+    def __init__(self,request,model: Instance):
+        self.request = request
+        self.model = model
+        self.__releases = []
+
+    def get_scope(self,attribute: str) -> str:
+        # a limit defined in the model applies to the model, a limit of settings is global
+        return self.model._meta.label_lower if getattr(self.model,attribute,None) else '*'
+
+    def admit(self):
+        timeout = _get_option(self.model,'admission_queue_timeout','AUTOMATIC_CRUD_ADMISSION_QUEUE_TIMEOUT',0)
+        retry_after = max(1,int(math.ceil(timeout)))
+
+        window = None
+        rate = _get_option(self.model,'heavy_requests_rate','AUTOMATIC_CRUD_HEAVY_REQUESTS_RATE')
+        if rate:
+            wait,window = _consume_token(
+                            'automatic_crud:admission-rate:{0}'.format(_client_key(self.request)),rate
+                        )
+            if wait:
+                raise AdmissionRejected(int(math.ceil(wait)))
+
+        try:
+            self.__acquire(timeout,retry_after)
+        except AdmissionRejected:
+            # a request rejected by a concurrency limit does not count in the rate
+            if window is not None:
+                _refund_token(window)
+            raise
+
+    def __acquire(self,timeout: float,retry_after: int):
+        limit = _get_option(self.model,'max_concurrent_heavy_requests','AUTOMATIC_CRUD_MAX_CONCURRENT_HEAVY_REQUESTS')
+        if limit:
+            semaphore = _get_semaphore(self.get_scope('max_concurrent_heavy_requests'),limit)
+            if not semaphore.acquire(timeout = timeout):
+                raise AdmissionRejected(retry_after)
+            self.__releases.append(semaphore.release)
+
+        limit = _get_option(self.model,'shared_concurrent_heavy_requests','AUTOMATIC_CRUD_SHARED_CONCURRENT_HEAVY_REQUESTS')
+        if limit:
+            key = 'automatic_crud:admission-slots:{0}'.format(self.get_scope('shared_concurrent_heavy_requests'))
+            slot = _acquire_shared_slot(key,limit,timeout)
+            if slot is None:
+                self.release()
+                raise AdmissionRejected(retry_after)
+            self.__releases.append(lambda: _release_shared_slot(*slot))
+
+    def release(self):
+        # release every slot taken, can be called many times
+        while self.__releases:
+            self.__releases.pop()()
+
+class ReleasingIterator:
+    """
+    Iterator for streaming content that releases the admission when the content
+    is consumed or when the response is closed.
+    """
+
+    def __init__(self,iterable,admission: Admission):
+        self.iterator = iter(iterable)
+        self.admission = admission
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.iterator)
+        except BaseException:
+            self.admission.release()
+            raise
+
+    def close(self):
+        self.admission.release()
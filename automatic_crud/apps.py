@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class AutomaticCrudConfig(AppConfig):
+    name = 'automatic_crud'
+
+    def ready(self):
+        from automatic_crud.counts import connect_counters
+
+        connect_counters()
@@ -0,0 +1,210 @@
+import csv
+import io
+from typing import Dict,Iterator
+from zipfile import BadZipFile
+
+from django.db import IntegrityError,router,transaction
+from django.views.generic import View
+
+from automatic_crud.generics import BaseCrudMixin
+from automatic_crud.signals import get_created_pks,send_model_changed
+from automatic_crud.utils import get_model,get_form
+from automatic_crud.response_messages import import_message,file_required_message,invalid_file_message
+
+def _normalize_header(__value) -> str:
+    return str(__value).strip().lower().replace(' ','_') if __value is not None else ''
+
+class InvalidFile(Exception):
+    """
+    Raised when the uploaded file can not be read, for example a file that is not
+    a .xlsx sent to excel-import/ or a CSV that is not encoded in UTF-8.
+    """
+
+def _workbook_rows(workbook) -> Iterator:
+    try:
+        for row in workbook.active.iter_rows(values_only = True):
+            yield row
+    finally:
+        workbook.close()
+
+def _excel_rows(__file) -> Iterator:
+    # the workbook is opened before returning, so an invalid file is rejected before importing rows,
+    # rows are read one by one, read_only mode does not load the whole workbook in memory
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        workbook = load_workbook(__file,read_only = True,data_only = True)
+    except (InvalidFileException,BadZipFile,KeyError,OSError) as error:
+        raise InvalidFile(str(error))
+    return _workbook_rows(workbook)
+
+def _csv_rows(__file) -> Iterator:
+    try:
+        yield from csv.reader(io.TextIOWrapper(__file,encoding = 'utf-8-sig',newline = ''))
+    except (UnicodeDecodeError,csv.Error) as error:
+        raise InvalidFile(str(error))
+
+class ImportFormat:
+    """
+    This class imports the rows of an uploaded file for any model you want,
+    rows are validated with the create form of the model and inserted with bulk_create
+    in batches of model.import_batch_size, so the file is never loaded in memory.
+    Every batch is committed in its own transaction, if the database rejects a batch
+    its rows are reported in errors and the following batches are still inserted.
+
+    The header row is searched in the first header_search_rows rows, its cells must be
+    the name or the verbose name of the model fields, so a report generated by
+    ExcelReportFormat can be imported again.
+
+    Parameters:
+        _model                      model to be used.
+        _rows                       iterator of rows of the uploaded file.
+
+    Variables:
+        __model                     model to be used.
+        __rows                      iterator of rows of the uploaded file.
+        __form_class                create form of model.
+        __fields_map                map of normalized header names to field names.
+        __batch                     instances validated and pending to be inserted.
+        __batch_rows                row numbers of the instances of __batch.
+        created                     number of inserted registers.
+        errors                      list of errors by row.
+
+    """
+
+    header_search_rows = 10
+
+    def __init__(self,__model,__rows:Iterator, *args, **kwargs):
+        self.__model = __model
+        self.__rows = __rows
+        self.__form_class = get_form(self.__model().get_create_form(),self.__model)
+        self.__fields_map = self.__build_fields_map()
+        self.__batch = []
+        self.__batch_rows = []
+        self.created = 0
+        self.errors = []
+
+    def __build_fields_map(self) -> Dict:
+        fields_map = {}
+        for field_name in self.__form_class.base_fields:
+            fields_map[_normalize_header(field_name)] = field_name
+            label = self.__form_class.base_fields[field_name].label
+            if label:
+                fields_map.setdefault(_normalize_header(label),field_name)
+        return fields_map
+
+    def __map_header(self,row) -> Dict:
+        """
+        Return a dictionary with column index and field name for a header row
+        """
+
+        columns = {}
+        for index,value in enumerate(row):
+            field_name = self.__fields_map.get(_normalize_header(value))
+            if field_name is not None:
+                columns[index] = field_name
+        return columns
+
+    def __flush(self):
+        if not self.__batch:
+            return
+        batch,rows = self.__batch,self.__batch_rows
+        self.__batch,self.__batch_rows = [],[]
+        try:
+            with transaction.atomic(using = router.db_for_write(self.__model)):
+                self.__model.objects.bulk_create(batch,batch_size = self.__model.import_batch_size)
+        except IntegrityError as error:
+            self.errors.append({'rows':rows,'errors':{'__all__':[str(error)]}})
+            return
+        send_model_changed(self.__model,'bulk_create',len(batch),get_created_pks(batch))
+        self.created += len(batch)
+
+    def import_rows(self):
+        """
+        Validate every row with the create form and insert valid rows by batches,
+        raise InvalidFile if the file can not be read, batches inserted before
+        the error are kept
+        """
+
+        columns = None
+        for row_number,row in enumerate(self.__rows,1):
+            if columns is None:
+                columns = self.__map_header(row)
+                if not columns:
+                    columns = None
+                    if row_number >= self.header_search_rows:
+                        break
+                continue
+
+            if all(value in (None,'') for value in row):
+                continue
+
+            data = {}
+            for index,field_name in columns.items():
+                value = row[index] if index < len(row) else None
+                data[field_name] = '' if value is None else value
+
+            form = self.__form_class(data)
+            if form.is_valid():
+                self.__batch.append(form.save(commit = False))
+                self.__batch_rows.append(row_number)
+                if len(self.__batch) >= self.__model.import_batch_size:
+                    self.__flush()
+            else:
+                self.errors.append({'row':row_number,'errors':form.errors})
+
+        if columns is None:
+            self.errors.append({'row':0,'errors':{'header':['No se ha encontrado la cabecera del archivo.']}})
+        self.__flush()
+
+    def get_import_response(self):
+        return import_message(self.__model,self.created,self.errors)
+
+class BaseImport(BaseCrudMixin,View):
+    """
+    Import registers of uploaded file sent in request.FILES['file'] for a model,
+    subclasses define get_rows(file) returning an iterator of the rows of the file.
+    """
+
+    heavy = True
+
+    def post(self,request,_app_name:str,_model_name:str,*args,**kwargs):
+        self.model = get_model(_app_name,_model_name)
+
+        # login required validation
+        validation_login_required,response = self.validate_login_required()
+        if validation_login_required:
+            return response
+
+        # permission required validation
+        validation_permissions,response = self.validate_permissions()
+        if validation_permissions:
+            return response
+
+        if 'file' not in request.FILES:
+            return file_required_message()
+
+        __import = None
+        try:
+            __import = ImportFormat(self.model,self.get_rows(request.FILES['file']))
+            __import.import_rows()
+        except InvalidFile:
+            return invalid_file_message(__import.created if __import is not None else 0)
+        return __import.get_import_response()
+
+class PostExcelImport(BaseImport):
+    """
+    Import registers of an uploaded .xlsx file for a model.
+    """
+
+    def get_rows(self,__file) -> Iterator:
+        return _excel_rows(__file)
+
+class PostCSVImport(BaseImport):
+    """
+    Import registers of an uploaded .csv file for a model.
+    """
+
+    def get_rows(self,__file) -> Iterator:
+        return _csv_rows(__file)
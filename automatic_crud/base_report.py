@@ -1,6 +1,10 @@
+import os
 from datetime import datetime
+from tempfile import SpooledTemporaryFile
 
-from django.http import HttpResponse
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Avg,Count,Sum
+from django.http import FileResponse
 from django.views.generic import TemplateView
 
 from openpyxl import Workbook
@@ -12,7 +16,11 @@ try:
 except ImportError:
     from openpyxl.utils import get_column_letter
 
+from automatic_crud.data_types import Instance
+from automatic_crud.filters import parse_fields
 from automatic_crud.generics import BaseCrudMixin
+from automatic_crud.report_cache import build_report_cache_key,get_cached_report
+from automatic_crud.response_messages import invalid_parameter_message
 from automatic_crud.utils import (
     get_model,get_model_fields_names,get_queryset
 )
@@ -38,6 +46,58 @@ def _validate_id(__field: str):
         return True
     return False
 
+# summary function: (label of the summary row,aggregate)
+SUMMARY_FUNCTIONS = {
+    'sum':('TOTAL',Sum),
+    'count':('CANTIDAD',Count),
+    'avg':('PROMEDIO',Avg),
+}
+
+SUMMARY_TYPES = (
+    'IntegerField','BigIntegerField','SmallIntegerField','PositiveIntegerField',
+    'PositiveBigIntegerField','PositiveSmallIntegerField','FloatField','DecimalField'
+)
+
+# characters that can not be used in the title of a sheet
+_INVALID_TITLE_CHARACTERS = str.maketrans({character:' ' for character in '[]:*?/\\'})
+
+def get_report_columns(model: Instance) -> list:
+    # fields printed in the report: concrete fields excluding id and exclude fields of model
+    return [
+        field for field in model._meta.concrete_fields
+        if _validate_id(field.attname) and field.attname not in model.exclude_fields
+    ]
+
+def get_report_options(model: Instance,params) -> dict:
+    """
+    Return the options summary, group_by and fields of ExcelReportFormat from params,
+    by default model.excel_summary, model.excel_group_by and every column.
+
+    Raise ValueError with the name of the invalid parameter.
+
+    """
+
+
+    summary = params.get('summary')
+    summary = [function for function in summary.split(',') if function] if summary is not None else list(model.excel_summary)
+    if any(function not in SUMMARY_FUNCTIONS for function in summary):
+        raise ValueError('summary')
+
+    group_by = params.get('group_by',model.excel_group_by) or None
+    if group_by is not None:
+        try:
+            field = model._meta.get_field(group_by)
+        except FieldDoesNotExist:
+            raise ValueError('group_by')
+        if (not field.concrete or group_by in model.exclude_fields
+                or not (field.many_to_one or field.choices)):
+            raise ValueError('group_by')
+
+    fields = params.get('fields')
+    if fields:
+        fields = [field.name for field in parse_fields(model,fields,get_report_columns(model))]
+    return {'summary':summary,'group_by':group_by,'fields':fields or None}
+
 class ExcelReportFormat:
     """
     This class generates a report in excel for any model you want, 
@@ -47,6 +107,12 @@ class ExcelReportFormat:
     Parameters:
         _app_name                   name of the application where is the model to be used.
         _model_name                 name of the model to be used.
+        summary                     summary functions: 'sum', 'count' and/or 'avg', a row is added
+                                    for every function with its value for every numeric column.
+        group_by                    foreign key or field with choices, registers of every value
+                                    are also printed in a sheet of the group with its subtotals.
+        filters                     lookups applied to the queryset, see automatic_crud.filters.
+        fields                      names of the columns of the report, by default every column.
 
     Variables:
         _app_name                   name of the application where is the model to be used.
@@ -58,121 +124,254 @@ class ExcelReportFormat:
         __workbook                  Workbook instance, Excel workbook.
         __sheetwork                 Excel Sheetwork, by default first sheet.
 
+    Summaries and subtotals are calculated by the database with one aggregate() query
+    and one values().annotate() query, the cells of the report are never read.
+
     """
     
 
-    def __init__(self,__app_name:str,__model_name:str, *args, **kwargs):
+    def __init__(self,__app_name:str,__model_name:str,summary = (),group_by: str = None,
+                filters: dict = None,fields: list = None, *args, **kwargs):
         self.__app_name = __app_name
         self.__model_name = __model_name
         self.__model = get_model(self.__app_name,self.__model_name)
         self.__model_fields_names = get_model_fields_names(self.__model)
+        self.__columns = get_report_columns(self.__model)
         self.__queryset = get_queryset(self.__model)
+        if filters:
+            self.__queryset = self.__queryset.filter(**filters)
+        if fields:
+            # only selected columns are read, the group field is read to split the sheets
+            self.__columns = [self.__model._meta.get_field(name) for name in fields]
+            self.__model_fields_names = [field.name for field in self.__columns]
+            __values = [field.attname for field in self.__columns]
+            if group_by is not None and self.__model._meta.get_field(group_by).attname not in __values:
+                __values.append(self.__model._meta.get_field(group_by).attname)
+            self.__queryset = self.__queryset.values(*__values)
         self.__report_title = _excel_report_title(self.__model_name)
         self.__workbook = Workbook()
         self.__sheetwork = self.__workbook.active
+        self.__summary = list(summary)
+        self.__group_by = group_by
 
     def get_model(self):
         return self.__model
 
-    def __excel_report_header(self,row_dimension = 15, col_dimension = 25):
+    def get_queryset(self):
+        return self.__queryset
+
+    def __excel_report_header(self,sheetwork = None,title = None,row_dimension = 15, col_dimension = 25):
         """
         Build excel report header, print report title and add default styles
 
         """
 
-        self.__sheetwork['B1'].alignment = Alignment(horizontal = "center", vertical = "center")
-        self.__sheetwork['B1'].border = Border(left = Side(border_style = "thin"), right = Side(border_style = "thin"),
+        sheetwork = sheetwork or self.__sheetwork
+        sheetwork['B1'].alignment = Alignment(horizontal = "center", vertical = "center")
+        sheetwork['B1'].border = Border(left = Side(border_style = "thin"), right = Side(border_style = "thin"),
                                                 top = Side(border_style = "thin"), bottom = Side(border_style = "thin"))
-        self.__sheetwork['B1'].font = Font(name = 'Calibri', size = 12, bold = True)
-        self.__sheetwork['B1'] = self.__report_title
+        sheetwork['B1'].font = Font(name = 'Calibri', size = 12, bold = True)
+        sheetwork['B1'] = title or self.__report_title
         
         if len(self.__model_fields_names) < 12:
             __header_letter = 'L'
         else:
             __header_letter = '{0}'.format(get_column_letter(len(self.__model_fields_names)).upper())
         
-        self.__sheetwork.merge_cells('B1:{0}1'.format(__header_letter))
-        self.__sheetwork.row_dimensions[3].height = row_dimension
+        sheetwork.merge_cells('B1:{0}1'.format(__header_letter))
+        sheetwork.row_dimensions[3].height = row_dimension
 
         __count = 1
         for __field in self.__model_fields_names:
             if __field not in self.__model.exclude_fields:
                 __letter = get_column_letter(__count).upper()
-                self.__sheetwork['{0}3'.format(__letter)].alignment = Alignment(horizontal = "center", vertical = "center")
-                self.__sheetwork['{0}3'.format(__letter)].border = Border(left = Side(border_style = "thin"), right = Side(border_style = "thin"),
+                sheetwork['{0}3'.format(__letter)].alignment = Alignment(horizontal = "center", vertical = "center")
+                sheetwork['{0}3'.format(__letter)].border = Border(left = Side(border_style = "thin"), right = Side(border_style = "thin"),
                                                     top = Side(border_style = "thin"), bottom = Side(border_style = "thin"))
-                self.__sheetwork['{0}3'.format(__letter)].font = Font(name = 'Calibri', size = 9, bold = True)
-                self.__sheetwork['{0}3'.format(__letter)] = '{0}'.format(__field.upper())
-                self.__sheetwork.column_dimensions['{0}'.format(__letter)].height = col_dimension
+                sheetwork['{0}3'.format(__letter)].font = Font(name = 'Calibri', size = 9, bold = True)
+                sheetwork['{0}3'.format(__letter)] = '{0}'.format(__field.upper())
+                sheetwork.column_dimensions['{0}'.format(__letter)].height = col_dimension
                 __count += 1
-    
+
+    def __print_row(self,sheetwork,row_count: int,value: dict):
+        """
+        Print a register of queryset, skip id value and exclude fields of model
+        """
+
+        col_count = 1
+        for field in self.__columns:
+            subvalue = value[field.attname]
+            sheetwork.cell(row = row_count, column = col_count).alignment = Alignment(horizontal = "center")
+            sheetwork.cell(row = row_count, column = col_count).border = Border(left = Side(border_style = "thin"),
+                                                        right = Side(border_style = "thin"),top = Side(border_style = "thin"), 
+                                                        bottom = Side(border_style = "thin"))
+            if type(subvalue) is bool:
+                if subvalue is True:
+                    sheetwork.cell(row = row_count, column = col_count).value = 'No eliminado'
+                else:
+                    sheetwork.cell(row = row_count, column = col_count).value = 'Eliminado'
+            else:
+                sheetwork.cell(row = row_count, column = col_count).value = str(subvalue)
+                if (sheetwork.column_dimensions[get_column_letter(col_count).upper()].width < len(str(subvalue))):
+                    sheetwork.column_dimensions[get_column_letter(col_count).upper()].width = len(str(subvalue))
+            col_count += 1
+
     def __print_values(self):
         """
-        Print values of queryset, skip id value and exclude fields of model
+        Print values of queryset, when group_by is used registers are also printed
+        in the sheet of their group, queryset is read only once
         """
 
         row_count = 4
-        col_count = 1
-        general_count = len(self.__model_fields_names)
-        data = [value for value in self.__queryset]
-
-        for value in data:
-            for key,subvalue in value.items():
-                if _validate_id(key):
-                    if key not in self.__model.exclude_fields:
-                        if general_count > 0:
-                            self.__sheetwork.cell(row = row_count, column = col_count).alignment = Alignment(horizontal = "center")
-                            self.__sheetwork.cell(row = row_count, column = col_count).border = Border(left = Side(border_style = "thin"),
-                                                                        right = Side(border_style = "thin"),top = Side(border_style = "thin"), 
-                                                                        bottom = Side(border_style = "thin"))
-                            if type(subvalue) is bool:
-                                if subvalue is True:
-                                    self.__sheetwork.cell(row = row_count, column = col_count).value = 'No eliminado'
-                                else:
-                                    self.__sheetwork.cell(row = row_count, column = col_count).value = 'Eliminado'
-                            else:
-                                self.__sheetwork.cell(row = row_count, column = col_count).value = str(subvalue)
-                                if (self.__sheetwork.column_dimensions[get_column_letter(col_count).upper()].width < len(str(subvalue))):
-                                    self.__sheetwork.column_dimensions[get_column_letter(col_count).upper()].width = len(str(subvalue))
-                            
-                            col_count += 1
-                            general_count -= 1
-
-                    if general_count == 0:
-                        general_count = len(self.__model_fields_names)
-            
+        if self.__group_by is None:
+            for value in self.__queryset:
+                self.__print_row(self.__sheetwork,row_count,value)
+                row_count += 1
+            return {None:row_count}
+
+        __attname = self.__model._meta.get_field(self.__group_by).attname
+        __sheets,__rows = {},{None:row_count}
+        for value in self.__queryset.order_by(__attname,'id'):
+            self.__print_row(self.__sheetwork,__rows[None],value)
+            __rows[None] += 1
+            __group = value[__attname]
+            if __group not in __sheets:
+                __sheets[__group] = self.__workbook.create_sheet()
+                __rows[__group] = 4
+            self.__print_row(__sheets[__group],__rows[__group],value)
+            __rows[__group] += 1
+        self.__group_sheets = __sheets
+        return __rows
+
+    def get_summary_columns(self) -> list:
+        """
+        Return [(column,field)] of the numeric columns of the report
+        """
+
+        return [
+            (column,field) for column,field in enumerate(self.__columns,1)
+            if not field.is_relation and not field.choices and field.get_internal_type() in SUMMARY_TYPES
+        ]
+
+    def get_summary_aggregates(self,columns: list) -> dict:
+        return {
+            '{0}__{1}'.format(field.attname,function):SUMMARY_FUNCTIONS[function][1](field.attname)
+            for _,field in columns for function in self.__summary
+        }
+
+    def __print_summary(self,sheetwork,row_count: int,columns: list,values: dict):
+        """
+        Print a row for every summary function, the label is printed in the first
+        column that is not summarized
+        """
+
+        summarized = {column for column,_ in columns}
+        label_column = next((column for column in range(1,len(summarized) + 2) if column not in summarized),None)
+        for function in self.__summary:
+            if label_column is not None:
+                sheetwork.cell(row = row_count, column = label_column).value = SUMMARY_FUNCTIONS[function][0]
+                sheetwork.cell(row = row_count, column = label_column).font = Font(bold = True)
+            for column,field in columns:
+                cell = sheetwork.cell(row = row_count, column = column)
+                cell.value = values.get('{0}__{1}'.format(field.attname,function))
+                cell.font = Font(bold = True)
+                cell.alignment = Alignment(horizontal = "center")
+                cell.border = Border(top = Side(border_style = "thin"), bottom = Side(border_style = "thin"))
             row_count += 1
-            col_count = 1
 
-    def get_excel_report(self):
+    def __get_group_labels(self,groups) -> dict:
+        # labels of group values: str() of the related registers or display of choices
+        field = self.__model._meta.get_field(self.__group_by)
+        if field.many_to_one:
+            related = field.related_model._default_manager.in_bulk([group for group in groups if group is not None])
+            labels = {pk:str(instance) for pk,instance in related.items()}
+        else:
+            labels = {value:str(label) for value,label in field.flatchoices}
+        return {
+            group:labels.get(group,str(group)) if group is not None else 'SIN {0}'.format(self.__group_by.upper())
+            for group in groups
+        }
+
+    def __print_groups(self,rows: dict,columns: list):
         """
-        Generate excel response using model name
+        Title every group sheet and print its subtotals, calculated with one values().annotate() query
+        """
+
+        __attname = self.__model._meta.get_field(self.__group_by).attname
+        __labels = self.__get_group_labels(list(self.__group_sheets))
+        __subtotals = {}
+        if self.__summary and columns:
+            for value in self.__queryset.order_by().values(__attname).annotate(**self.get_summary_aggregates(columns)):
+                __subtotals[value[__attname]] = value
+
+        __titles = set()
+        for group,sheetwork in self.__group_sheets.items():
+            title = __labels[group].translate(_INVALID_TITLE_CHARACTERS)[:28].strip() or '-'
+            while title in __titles:
+                title = '{0}_'.format(title)
+            __titles.add(title)
+            sheetwork.title = title
+            self.__excel_report_header(sheetwork,'{0} - {1}'.format(self.__report_title,__labels[group].upper()))
+            if group in __subtotals:
+                self.__print_summary(sheetwork,rows[group] + 1,columns,__subtotals[group])
+
+    def get_excel_report(self,report_file = None):
+        """
+        Generate excel response using model name, report_file can be sent
+        to return a report saved previously
         """
 
         report_name = "Reporte {0} en Excel .xlsx".format(self.__model_name)
-        response = HttpResponse(content_type = "application/ms-excel")
+        __length = None
+        if report_file is None:
+            report_file = SpooledTemporaryFile(max_size = 1024 * 1024)
+            self.__workbook.save(report_file)
+            report_file.seek(0)
+        elif not isinstance(getattr(report_file,'name',None),str):
+            # cached reports are opened by descriptor, FileResponse can not read their size
+            __length = os.fstat(report_file.fileno()).st_size
+        
+        # the file is sent by chunks, so it can be compressed while is streamed
+        response = FileResponse(report_file,content_type = "application/ms-excel")
+        if __length is not None:
+            response['Content-Length'] = str(__length)
         content = "attachment; filename = {0}".format(report_name)
         response['Content-Disposition'] = content
-        self.__workbook.save(response)
         return response
 
     def build_report(self):
         """
-        Build report call 2 functions: __excel_report_header and __print_values
+        Build report call __excel_report_header and __print_values, then the
+        summary rows and the group sheets if they are requested
         """
 
         self.__excel_report_header()
-        self.__print_values()
+        __rows = self.__print_values()
+        __columns = self.get_summary_columns()
+        if self.__summary and __columns:
+            __totals = self.__queryset.order_by().aggregate(**self.get_summary_aggregates(__columns))
+            self.__print_summary(self.__sheetwork,__rows[None] + 1,__columns,__totals)
+        if self.__group_by is not None:
+            self.__print_groups(__rows,__columns)
+
+    def save_report(self,report_file):
+        """
+        Build report and save it on report_file
+        """
+
+        self.build_report()
+        self.__workbook.save(report_file)
 
 class GetExcelReport(BaseCrudMixin,TemplateView):
     """
-    Return Instance Excel Report for a model.
+    Return Instance Excel Report for a model, it is not compressed because
+    a .xlsx file is already a zip file.
     """
 
-    def get(self,request,_app_name:str,_model_name:str,*args,**kwargs):
-        __report = ExcelReportFormat(_app_name,_model_name)
+    heavy = True
 
-        self.model = __report.get_model()
+    def get(self,request,_app_name:str,_model_name:str,*args,**kwargs):
+        self.model = get_model(_app_name,_model_name)
 
         # login required validation
         validation_login_required,response = self.validate_login_required()
@@ -184,5 +383,16 @@ class GetExcelReport(BaseCrudMixin,TemplateView):
         if validation_permissions:
             return response
 
+        try:
+            __options = get_report_options(self.model,request.GET)
+            __options['filters'] = self.get_filters()
+        except ValueError as error:
+            return invalid_parameter_message(str(error))
+        __report = ExcelReportFormat(_app_name,_model_name,**__options)
+
+        if self.model.excel_report_cache:
+            __key = build_report_cache_key(self.model,__options)
+            return __report.get_excel_report(get_cached_report(__key,'.xlsx',__report.save_report))
+
         __report.build_report()
         return __report.get_excel_report()
\ No newline at end of file
@@ -0,0 +1,237 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import DatabaseError,connections
+
+from automatic_crud.data_types import Instance
+
+logger = logging.getLogger('automatic_crud.budgets')
+
+# number of SQLite virtual machine instructions between checks of the deadline
+SQLITE_PROGRESS_STEPS = 1000
+
+class BudgetExceeded(Exception):
+    """
+    Raised when a request exceeds one of its limits, status_code is the status
+    of the response and sql the statement that exceeded the limit.
+    """
+
+    status_code = 503
+
+    def __init__(self,message: str,sql: str = None):
+        super().__init__(message)
+        self.sql = sql
+
+class QueryBudgetExceeded(BudgetExceeded):
+    status_code = 503
+
+class StatementTimeout(BudgetExceeded):
+    status_code = 504
+
+class RequestTimeout(BudgetExceeded):
+    status_code = 504
+
+def get_limit(model: Instance,attribute: str,action: str):
+    """
+    Return the limit attribute of model for action, the value of the model or of the
+    setting AUTOMATIC_CRUD_{ATTRIBUTE} can be a number or a dictionary {action: number}
+    where '*' is the value for the rest of actions.
+
+    """
+
+
+    value = getattr(model,attribute,None)
+    if value is None:
+        value = getattr(settings,'AUTOMATIC_CRUD_{0}'.format(attribute.upper()),None)
+    if isinstance(value,dict):
+        value = value.get(action,value.get('*'))
+    return value
+
+class _BudgetWrapper:
+    # execute wrapper that applies the limits of a RequestBudget to a connection
+    def __init__(self,budget,connection):
+        self.budget = budget
+        self.connection = connection
+
+    def __call__(self,execute,sql,params,many,context):
+        budget = self.budget
+        budget.queries += 1
+        if budget.max_queries is not None and budget.queries > budget.max_queries:
+            raise QueryBudgetExceeded('Query budget of {0} queries exceeded'.format(budget.max_queries),sql)
+
+        timeout = budget.get_statement_timeout()
+        if timeout is not None and timeout <= 0:
+            raise RequestTimeout('Request budget of {0} seconds exceeded'.format(budget.request_timeout),sql)
+
+        vendor = self.connection.vendor
+        if timeout is None or vendor not in ('sqlite','postgresql','mysql'):
+            return execute(sql,params,many,context)
+        if vendor == 'sqlite':
+            return self.__execute_sqlite(execute,sql,params,many,context,timeout)
+
+        budget.set_session_timeout(self.connection,context['cursor'].cursor)
+        try:
+            return execute(sql,params,many,context)
+        except DatabaseError as error:
+            if _is_timeout_error(vendor,error):
+                raise StatementTimeout('Statement timeout of {0} seconds exceeded'.format(timeout),sql) from error
+            raise
+
+    def __execute_sqlite(self,execute,sql,params,many,context,timeout: float):
+        # the progress handler interrupts the statement when the deadline is reached
+        deadline = time.monotonic() + timeout
+        interrupted = []
+
+        def progress():
+            if time.monotonic() > deadline:
+                interrupted.append(True)
+                return 1
+            return 0
+
+        raw_connection = self.connection.connection
+        raw_connection.set_progress_handler(progress,SQLITE_PROGRESS_STEPS)
+        try:
+            return execute(sql,params,many,context)
+        except DatabaseError as error:
+            if interrupted:
+                raise StatementTimeout('Statement timeout of {0} seconds exceeded'.format(timeout),sql) from error
+            raise
+        finally:
+            raw_connection.set_progress_handler(None,SQLITE_PROGRESS_STEPS)
+
+def _is_timeout_error(vendor: str,error: DatabaseError) -> bool:
+    cause = error.__cause__
+    if vendor == 'postgresql':
+        # query_canceled
+        return getattr(cause,'pgcode',None) == '57014' or getattr(getattr(cause,'diag',None),'sqlstate',None) == '57014'
+    # ER_QUERY_TIMEOUT
+    return bool(getattr(cause,'args',None)) and cause.args[0] == 3024
+
+class RequestBudget:
+    """
+    Limits of a request read with get_limit from the model for the action:
+
+        max_queries                 maximum number of queries.
+        statement_timeout           seconds a statement can run, applied with SET statement_timeout
+                                    on PostgreSQL, max_execution_time on MySQL and a progress
+                                    handler on SQLite.
+        request_timeout             seconds for the whole request, statements are not started
+                                    after this time and their timeout is limited by the remaining time.
+
+    Use it as a context manager around the view, streamed responses must be wrapped
+    with wrap_streaming so queries of the stream are limited too.
+
+    """
+
+    def __init__(self,request,model: Instance,action: str):
+        self.request = request
+        self.model = model
+        self.action = action
+        self.max_queries = get_limit(model,'max_queries',action)
+        self.statement_timeout = get_limit(model,'statement_timeout',action)
+        self.request_timeout = get_limit(model,'request_timeout',action)
+        self.queries = 0
+        self.deadline = None
+        if self.request_timeout is not None:
+            self.deadline = time.monotonic() + self.request_timeout
+        self.__sessions = {}
+        self.__stack = None
+
+    @property
+    def active(self) -> bool:
+        return any(limit is not None for limit in (self.max_queries,self.statement_timeout,self.request_timeout))
+
+    def get_statement_timeout(self):
+        timeout = self.statement_timeout
+        if self.deadline is not None:
+            remaining = self.deadline - time.monotonic()
+            timeout = remaining if timeout is None else min(timeout,remaining)
+        return timeout
+
+    def set_session_timeout(self,connection,cursor):
+        # the timeout is set once per connection and request and reset when the request ends
+        timeout = self.statement_timeout if self.statement_timeout is not None else self.request_timeout
+        if connection.alias in self.__sessions:
+            return
+        milliseconds = max(1,int(timeout * 1000))
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET statement_timeout = %s',[milliseconds])
+            self.__sessions[connection.alias] = 'RESET statement_timeout'
+        else:
+            cursor.execute('SET SESSION max_execution_time = %s',[milliseconds])
+            self.__sessions[connection.alias] = 'SET SESSION max_execution_time = DEFAULT'
+
+    def __enter__(self):
+        self.__stack = ExitStack()
+        for alias in connections:
+            connection = connections[alias]
+            self.__stack.enter_context(connection.execute_wrapper(_BudgetWrapper(self,connection)))
+        return self
+
+    def __exit__(self,*args):
+        self.__stack.close()
+        while self.__sessions:
+            alias,sql = self.__sessions.popitem()
+            try:
+                with connections[alias].cursor() as cursor:
+                    cursor.execute(sql)
+            except DatabaseError:
+                # a failed transaction discards the value set inside it
+                pass
+        return False
+
+    def log(self,error: BudgetExceeded):
+        logger.warning(
+            'Budget exceeded in %s %s (%s, action %s): %s. SQL: %s',
+            self.request.method,self.request.get_full_path(),self.model._meta.label,
+            self.action,error,error.sql
+        )
+
+    def wrap_streaming(self,response):
+        response.streaming_content = BudgetIterator(response.streaming_content,self)
+        return response
+
+class BudgetIterator:
+    """
+    Iterator for streaming content that applies the limits of a budget while the
+    content is generated, if a limit is exceeded the violation is logged and the stream ends.
+    The budget is entered with the first chunk and exited when the stream ends or is closed,
+    so the execute wrappers and session timeouts are set once for the whole stream.
+    """
+
+    def __init__(self,iterable,budget: RequestBudget):
+        self.iterator = iter(iterable)
+        self.budget = budget
+        self.__entered = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.__entered:
+            self.budget.__enter__()
+            self.__entered = True
+        try:
+            return next(self.iterator)
+        except BudgetExceeded as error:
+            self.budget.log(error)
+            self.__exit()
+            raise StopIteration
+        except BaseException:
+            self.__exit()
+            raise
+
+    def __exit(self):
+        if self.__entered:
+            self.__entered = False
+            self.budget.__exit__(None,None,None)
+
+    def close(self):
+        try:
+            close = getattr(self.iterator,'close',None)
+            if close is not None:
+                close()
+        finally:
+            self.__exit()
@@ -0,0 +1,170 @@
+import json
+from tempfile import SpooledTemporaryFile
+from typing import List
+
+from django.conf import settings
+from django.http import FileResponse
+from django.views.generic import View
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from automatic_crud.data_types import Instance
+from automatic_crud.filters import parse_fields
+from automatic_crud.generics import BaseCrudMixin
+from automatic_crud.response_messages import invalid_parameter_message,missing_dependency_message
+from automatic_crud.utils import get_model
+
+def _arrow_type(field):
+    """
+    Return (arrow type,converter) for a model field, converter is None when
+    the value returned by the database can be used as it is
+    """
+
+    internal_type = field.get_internal_type()
+    if field.is_relation:
+        return _arrow_type(field.target_field)
+    if internal_type in ('AutoField','BigAutoField','SmallAutoField','IntegerField','BigIntegerField',
+                         'SmallIntegerField','PositiveIntegerField','PositiveBigIntegerField',
+                         'PositiveSmallIntegerField'):
+        return pyarrow.int64(),None
+    if internal_type == 'FloatField':
+        return pyarrow.float64(),None
+    if internal_type == 'DecimalField':
+        return pyarrow.decimal128(field.max_digits,field.decimal_places),None
+    if internal_type in ('BooleanField','NullBooleanField'):
+        return pyarrow.bool_(),None
+    if internal_type == 'DateField':
+        return pyarrow.date32(),None
+    if internal_type == 'DateTimeField':
+        return pyarrow.timestamp('us',tz = 'UTC' if settings.USE_TZ else None),None
+    if internal_type == 'TimeField':
+        return pyarrow.time64('us'),None
+    if internal_type == 'DurationField':
+        return pyarrow.duration('us'),None
+    if internal_type == 'BinaryField':
+        return pyarrow.binary(),bytes
+    if internal_type == 'JSONField':
+        return pyarrow.string(),json.dumps
+    return pyarrow.string(),str
+
+class ColumnarReportFormat:
+    """
+    Build typed record batches of a model for columnar formats, registers are read
+    with values_list().iterator() and written batch by batch, so memory is bounded
+    by model.columnar_chunk_size.
+
+    Parameters:
+        model                       model to be exported.
+        filters                     lookups applied to the queryset, see automatic_crud.filters.
+        fields                      names of the exported fields, by default every field.
+
+    """
+
+    def __init__(self,model: Instance,filters: dict = None,fields: str = None):
+        self.model = model
+        self.filters = filters or {}
+        self.fields = [
+            field for field in model._meta.concrete_fields if field.name not in model.exclude_fields
+        ]
+        if fields:
+            self.fields = parse_fields(model,fields,self.fields)
+        types = [_arrow_type(field) for field in self.fields]
+        self.converters = [converter for _,converter in types]
+        self.schema = pyarrow.schema([
+            pyarrow.field(field.attname,arrow_type,nullable = field.null)
+            for field,(arrow_type,_) in zip(self.fields,types)
+        ])
+
+    def get_queryset(self):
+        # active registers, the same registers of csv-report/
+        return self.model.objects.filter(model_state = True).filter(**self.filters).order_by('id').values_list(*[field.attname for field in self.fields])
+
+    def __build_batch(self,rows: List):
+        columns = []
+        for index,(column,converter) in enumerate(zip(zip(*rows),self.converters)):
+            if converter is not None:
+                column = [None if value is None else converter(value) for value in column]
+            columns.append(pyarrow.array(column,type = self.schema.types[index]))
+        return pyarrow.RecordBatch.from_arrays(columns,schema = self.schema)
+
+    def iter_batches(self):
+        chunk_size = self.model.columnar_chunk_size
+        rows = []
+        for row in self.get_queryset().iterator(chunk_size = chunk_size):
+            rows.append(row)
+            if len(rows) >= chunk_size:
+                yield self.__build_batch(rows)
+                rows = []
+        if rows:
+            yield self.__build_batch(rows)
+
+    def write_parquet(self,report_file):
+        writer = pyarrow.parquet.ParquetWriter(report_file,self.schema,compression = self.model.parquet_compression)
+        try:
+            for batch in self.iter_batches():
+                writer.write_table(pyarrow.Table.from_batches([batch],schema = self.schema))
+        finally:
+            writer.close()
+
+    def write_arrow(self,report_file):
+        writer = pyarrow.ipc.new_stream(report_file,self.schema)
+        try:
+            for batch in self.iter_batches():
+                writer.write_batch(batch)
+        finally:
+            writer.close()
+
+class BaseColumnarReport(BaseCrudMixin,View):
+    """
+    Return a columnar report of a model, subclasses define the writer method
+    of ColumnarReportFormat, the extension and the content type.
+    """
+
+    heavy = True
+    writer = None
+    extension = None
+    content_type = None
+
+    def get(self,request,_app_name:str,_model_name:str,*args,**kwargs):
+        self.model = get_model(_app_name,_model_name)
+
+        # login required validation
+        validation_login_required,response = self.validate_login_required()
+        if validation_login_required:
+            return response
+
+        # permission required validation
+        validation_permissions,response = self.validate_permissions()
+        if validation_permissions:
+            return response
+
+        if pyarrow is None:
+            return missing_dependency_message('pyarrow')
+
+        try:
+            __report = ColumnarReportFormat(self.model,self.get_filters(),request.GET.get('fields'))
+        except ValueError as error:
+            return invalid_parameter_message(str(error))
+        __file = SpooledTemporaryFile(max_size = 1024 * 1024)
+        getattr(__report,self.writer)(__file)
+        __file.seek(0)
+
+        response = FileResponse(__file,content_type = self.content_type)
+        response['Content-Disposition'] = "attachment; filename = Reporte {0}{1}".format(_model_name,self.extension)
+        return response
+
+class GetParquetReport(BaseColumnarReport):
+    writer = 'write_parquet'
+    extension = '.parquet'
+    content_type = 'application/vnd.apache.parquet'
+
+class GetArrowReport(BaseColumnarReport):
+    compressible = True
+    writer = 'write_arrow'
+    extension = '.arrows'
+    content_type = 'application/vnd.apache.arrow.stream'
@@ -0,0 +1,124 @@
+import zlib
+from typing import Iterator,List
+
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from automatic_crud.data_types import Instance
+
+# content types that are already compressed, compressing them again only spends CPU
+COMPRESSED_CONTENT_TYPES = (
+    'application/zip',
+    'application/gzip',
+    'application/x-gzip',
+    'application/vnd.openxmlformats-officedocument.',
+    'application/vnd.apache.parquet',
+    'image/',
+    'video/',
+    'audio/',
+)
+
+def is_compressed_content(content_type: str) -> bool:
+    return content_type.split(';')[0].strip().lower().startswith(COMPRESSED_CONTENT_TYPES)
+
+def _accepted_encodings(__accept_encoding: str) -> List:
+    # return the encodings accepted by the client, skipping those sent with q=0
+    encodings = []
+    for item in __accept_encoding.split(','):
+        __parts = [part.strip() for part in item.split(';')]
+        __quality = 1.0
+        for part in __parts[1:]:
+            if part.startswith('q='):
+                try:
+                    __quality = float(part[2:])
+                except ValueError:
+                    __quality = 0.0
+        if __parts[0] and __quality > 0:
+            encodings.append(__parts[0].lower())
+    return encodings
+
+def get_content_encoding(request) -> str:
+    """
+    Return the content encoding negotiated with the client using Accept-Encoding,
+    brotli is preferred when is installed, return None when no encoding is supported
+
+    """
+
+
+    encodings = _accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING',''))
+    if brotli is not None and 'br' in encodings:
+        return 'br'
+    if 'gzip' in encodings:
+        return 'gzip'
+    return None
+
+def _gzip_stream(chunks: Iterator,level: int) -> Iterator:
+    # compress every chunk as it is generated, nothing is buffered besides zlib window
+    compressor = zlib.compressobj(level,zlib.DEFLATED,16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _brotli_stream(chunks: Iterator,level: int) -> Iterator:
+    compressor = brotli.Compressor(quality = max(0,min(level,11)))
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+def _compress_content(content: bytes,encoding: str,level: int) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(content,quality = max(0,min(level,11)))
+    return b''.join(_gzip_stream([content],level))
+
+def compress_response(request,response,model: Instance):
+    """
+    Compress response using the encoding negotiated with the client.
+
+    Streaming responses are compressed chunk by chunk while they are sent,
+    responses smaller than model.compression_min_size or with a content type that
+    is already compressed (COMPRESSED_CONTENT_TYPES) are returned without changes.
+
+    """
+
+
+    if model is None or not model.compress_responses:
+        return response
+    if response.status_code != 200 or response.has_header('Content-Encoding'):
+        return response
+    if is_compressed_content(response.get('Content-Type','')):
+        return response
+
+    patch_vary_headers(response,('Accept-Encoding',))
+    encoding = get_content_encoding(request)
+    if encoding is None:
+        return response
+
+    level = model.compression_level
+    if response.streaming:
+        __length = response.get('Content-Length')
+        if __length is not None and int(__length) < model.compression_min_size:
+            return response
+
+        if encoding == 'br':
+            response.streaming_content = _brotli_stream(response.streaming_content,level)
+        else:
+            response.streaming_content = _gzip_stream(response.streaming_content,level)
+        if response.has_header('Content-Length'):
+            del response['Content-Length']
+    else:
+        if len(response.content) < model.compression_min_size:
+            return response
+
+        response.content = _compress_content(response.content,encoding,level)
+        response['Content-Length'] = str(len(response.content))
+
+    response['Content-Encoding'] = encoding
+    return response
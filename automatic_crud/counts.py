@@ -0,0 +1,163 @@
+import hashlib
+import json
+from typing import Tuple
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import F
+from django.db.models.signals import post_init,post_save,post_delete
+from django.dispatch import receiver
+
+from automatic_crud.data_types import Instance
+from automatic_crud.signals import model_changed
+
+COUNT_STRATEGIES = ('exact','cached','counter','estimate')
+
+def _count_version_key(model: Instance) -> str:
+    return 'automatic_crud:count-version:{0}'.format(model._meta.label_lower)
+
+def _cached_count(model: Instance,queryset) -> int:
+    """
+    Return the count of queryset from cache, the key includes a version of the model
+    that is increased on every write, so every cached count is invalidated at once.
+
+    """
+
+
+    version = cache.get(_count_version_key(model),0)
+    query_hash = hashlib.md5(str(queryset.query).encode('utf-8')).hexdigest()
+    key = 'automatic_crud:count:{0}:{1}:{2}'.format(model._meta.label_lower,version,query_hash)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key,count,model.count_cache_timeout)
+    return count
+
+def _counter_count(model: Instance,queryset) -> int:
+    # return active registers from the counter row, it is created with an exact count
+    counter_model = apps.get_model('automatic_crud','ModelCounter')
+    count = counter_model.objects.filter(model_label = model._meta.label_lower).values_list('count',flat = True).first()
+    if count is None:
+        counter,_ = counter_model.objects.get_or_create(
+                        model_label = model._meta.label_lower,
+                        defaults = {'count':model.objects.filter(model_state = True).count()}
+                    )
+        count = counter.count
+    return count
+
+def _planner_estimate(queryset) -> int:
+    # return rows estimated by PostgreSQL planner, None for other databases
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql,params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) {0}'.format(sql),params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan,str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+def get_count(model: Instance,queryset,filtered: bool = False) -> Tuple:
+    """
+    Return a tuple (count,exact) for queryset using model.count_strategy:
+
+        exact       run COUNT(*) on every call.
+        cached      cache COUNT(*) for model.count_cache_timeout seconds, invalidated on writes.
+        counter     read the count of active registers from a row maintained by signals.
+        estimate    use the planner estimate when it is above model.count_estimate_threshold.
+
+    The counter strategy only knows the number of active registers, for filtered
+    querysets an exact count is returned.
+
+    """
+
+
+    strategy = model.count_strategy
+    if strategy == 'cached':
+        return _cached_count(model,queryset),True
+    if strategy == 'counter' and not filtered:
+        return _counter_count(model,queryset),True
+    if strategy == 'estimate':
+        estimate = _planner_estimate(queryset)
+        if estimate is not None and estimate > model.count_estimate_threshold:
+            return estimate,False
+    return queryset.count(),True
+
+def _update_counter(model: Instance,value: int):
+    counter_model = apps.get_model('automatic_crud','ModelCounter')
+    counter_model.objects.filter(model_label = model._meta.label_lower).update(count = F('count') + value)
+
+def _recount_counter(model: Instance):
+    # used when the number of activated registers is not known, for example after an upsert
+    counter_model = apps.get_model('automatic_crud','ModelCounter')
+    counter_model.objects.filter(model_label = model._meta.label_lower).update(
+        count = model.objects.filter(model_state = True).count()
+    )
+
+def _invalidate_counts(model: Instance):
+    __key = _count_version_key(model)
+    if not cache.add(__key,1,None):
+        try:
+            cache.incr(__key)
+        except ValueError:
+            cache.set(__key,1,None)
+
+# attribute of instances of counter models with the model_state read from the database
+_COUNTED_STATE = '_automatic_crud_counted_state'
+
+def _count_post_init(sender,instance,**kwargs):
+    # deferred model_state is not read, so loading registers never runs extra queries
+    if 'model_state' in instance.__dict__:
+        instance.__dict__[_COUNTED_STATE] = instance.model_state
+
+def connect_counters():
+    """
+    Connect post_init only to the models with count_strategy = 'counter', so loading
+    registers of other models does not call it. Called by AutomaticCrudConfig.ready().
+    """
+
+    for model in apps.get_models():
+        if getattr(model,'count_strategy',None) == 'counter':
+            post_init.connect(_count_post_init,sender = model,dispatch_uid = 'automatic_crud_count_post_init')
+
+@receiver(post_save)
+def _count_post_save(sender,instance,created,**kwargs):
+    strategy = getattr(sender,'count_strategy',None)
+    if strategy == 'cached':
+        _invalidate_counts(sender)
+    elif strategy == 'counter':
+        if created:
+            if instance.model_state:
+                _update_counter(sender,1)
+        else:
+            counted_state = instance.__dict__.get(_COUNTED_STATE)
+            if counted_state is None:
+                # the previous state is not known, for example model_state was deferred
+                _recount_counter(sender)
+            elif counted_state != instance.model_state:
+                _update_counter(sender,1 if instance.model_state else -1)
+        instance.__dict__[_COUNTED_STATE] = instance.model_state
+
+@receiver(post_delete)
+def _count_post_delete(sender,instance,**kwargs):
+    strategy = getattr(sender,'count_strategy',None)
+    if strategy == 'cached':
+        _invalidate_counts(sender)
+    elif strategy == 'counter' and instance.model_state:
+        _update_counter(sender,-1)
+
+@receiver(model_changed)
+def _count_model_changed(sender,action,count,**kwargs):
+    strategy = getattr(sender,'count_strategy',None)
+    if strategy == 'cached':
+        _invalidate_counts(sender)
+    elif strategy == 'counter':
+        if action == 'logic_delete':
+            _update_counter(sender,-count)
+        elif action == 'bulk_create':
+            _update_counter(sender,count)
+        else:
+            # upserts can create, update or reactivate registers, so they are counted again
+            _recount_counter(sender)
@@ -0,0 +1,189 @@
+import csv
+import os
+import shutil
+import tarfile
+import tempfile
+from concurrent.futures import ProcessPoolExecutor,as_completed
+from typing import Callable,List
+
+import django
+from django.apps import apps
+from django.db import connections
+from django.http import StreamingHttpResponse
+from django.views.generic import View
+
+from automatic_crud.data_types import Instance
+from automatic_crud.filters import parse_fields
+from automatic_crud.generics import BaseCrudMixin
+from automatic_crud.response_messages import invalid_parameter_message
+from automatic_crud.utils import get_model
+
+def get_export_fields(model: Instance,fields: str = None) -> List:
+    # exported fields: concrete fields excluding exclude_fields, or the names sent in fields
+    available = [field for field in model._meta.concrete_fields if field.name not in model.exclude_fields]
+    return parse_fields(model,fields,available) if fields else available
+
+def get_export_queryset(model: Instance,filters: dict = None):
+    # active registers of model, filters are lookups of automatic_crud.filters.parse_filters
+    return model.objects.filter(model_state = True).filter(**(filters or {}))
+
+def get_pk_ranges(queryset,chunk_size: int) -> List:
+    """
+    Split queryset in ranges (low,high) of chunk_size registers where low <= id < high,
+    high is None in the last range. Every boundary is found with one query on the
+    primary key index, so ranges are exact even if there are gaps between ids.
+
+    """
+
+
+    ids = queryset.order_by('id').values_list('id',flat = True)
+    low = ids.first()
+    ranges = []
+    while low is not None:
+        high = next(iter(ids.filter(id__gte = low)[chunk_size:chunk_size + 1]),None)
+        ranges.append((low,high))
+        low = high
+    return ranges
+
+def _get_range_queryset(queryset,low,high):
+    queryset = queryset.filter(id__gte = low)
+    if high is not None:
+        queryset = queryset.filter(id__lt = high)
+    return queryset.order_by('id')
+
+def _init_worker():
+    # processes started with spawn or forkserver must load Django before exporting
+    if not apps.ready:
+        django.setup()
+
+def export_range(label: str,filters: dict,names: List,low,high,path: str,header: bool = False) -> int:
+    """
+    Write the registers of the model label with low <= id < high to the CSV file path
+    and return the number of registers, it runs in a process of the pool.
+    """
+
+    model = apps.get_model(label)
+    fields = get_export_fields(model,','.join(names))
+    queryset = _get_range_queryset(get_export_queryset(model,filters),low,high)
+    rows = 0
+    with open(path,'w',newline = '',encoding = 'utf-8') as part:
+        writer = csv.writer(part)
+        if header:
+            writer.writerow([field.name for field in fields])
+        for row in queryset.values_list(*[field.attname for field in fields]).iterator(chunk_size = 2000):
+            writer.writerow(row)
+            rows += 1
+    return rows
+
+def export_csv(model: Instance,output: str,workers: int = None,chunk_size: int = None,filters: dict = None,
+                fields: str = None,tarball: bool = False,progress: Callable = None) -> int:
+    """
+    Export the active registers of model to the file output and return the number of registers,
+    the header has the names of the fields so the file can be imported again with csv-import/.
+
+    Registers are split in ranges of chunk_size ids (by default model.csv_chunk_size), every
+    range is written to a part file by a process of a pool of workers processes with its own
+    database connection, then parts are joined in order of id in one CSV file or, if tarball
+    is True, added to a .tar.gz file where every part has its own header.
+
+    progress(done,total,rows) is called every time a range is finished.
+
+    """
+
+
+    fields = get_export_fields(model,fields)
+    names = [field.name for field in fields]
+    ranges = get_pk_ranges(get_export_queryset(model,filters),chunk_size or model.csv_chunk_size)
+    directory = tempfile.mkdtemp(prefix = 'automatic_crud_csv_')
+    try:
+        paths = [os.path.join(directory,'part-{0:05d}.csv'.format(index)) for index in range(len(ranges))]
+        tasks = [
+            (model._meta.label,filters,names,low,high,path,tarball)
+            for (low,high),path in zip(ranges,paths)
+        ]
+        total = 0
+        if workers == 1:
+            for done,task in enumerate(tasks,1):
+                total += export_range(*task)
+                if progress is not None:
+                    progress(done,len(tasks),total)
+        else:
+            # forked processes must not share the connections of this process
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers = workers,initializer = _init_worker) as executor:
+                futures = [executor.submit(export_range,*task) for task in tasks]
+                for done,future in enumerate(as_completed(futures),1):
+                    total += future.result()
+                    if progress is not None:
+                        progress(done,len(tasks),total)
+
+        if tarball:
+            with tarfile.open(output,'w:gz') as report:
+                for index,path in enumerate(paths):
+                    report.add(path,arcname = '{0}-{1:05d}.csv'.format(model._meta.model_name,index))
+        else:
+            with open(output,'w',newline = '',encoding = 'utf-8') as report:
+                csv.writer(report).writerow(names)
+                for path in paths:
+                    with open(path,encoding = 'utf-8') as part:
+                        shutil.copyfileobj(part,report)
+        return total
+    finally:
+        shutil.rmtree(directory,ignore_errors = True)
+
+class _Echo:
+    # file-like object for csv.writer that returns the line instead of writing it
+    def write(self,value):
+        return value
+
+def iter_csv(model: Instance,fields: List,filters: dict = None):
+    """
+    Yield the CSV lines of the active registers of model, registers are read
+    by ranges of model.csv_chunk_size ids so no query reads the whole table
+    """
+
+    writer = csv.writer(_Echo())
+    attnames = [field.attname for field in fields]
+    yield writer.writerow([field.name for field in fields])
+    queryset = get_export_queryset(model,filters).order_by('id')
+    last = None
+    while True:
+        chunk = queryset if last is None else queryset.filter(id__gt = last)
+        rows = 0
+        for row in chunk.values_list('id',*attnames)[:model.csv_chunk_size].iterator(chunk_size = 2000):
+            yield writer.writerow(row[1:])
+            last,rows = row[0],rows + 1
+        if rows < model.csv_chunk_size:
+            return
+
+class GetCSVReport(BaseCrudMixin,View):
+    """
+    Return the active registers of a model in CSV format, the file is streamed
+    while registers are read. For very large tables use the command crud_export_csv.
+    """
+
+    compressible = True
+    heavy = True
+
+    def get(self,request,_app_name:str,_model_name:str,*args,**kwargs):
+        self.model = get_model(_app_name,_model_name)
+
+        # login required validation
+        validation_login_required,response = self.validate_login_required()
+        if validation_login_required:
+            return response
+
+        # permission required validation
+        validation_permissions,response = self.validate_permissions()
+        if validation_permissions:
+            return response
+
+        try:
+            __filters = self.get_filters()
+            __fields = get_export_fields(self.model,request.GET.get('fields'))
+        except ValueError as error:
+            return invalid_parameter_message(str(error))
+
+        response = StreamingHttpResponse(iter_csv(self.model,__fields,__filters),content_type = 'text/csv')
+        response['Content-Disposition'] = "attachment; filename = Reporte {0}.csv".format(_model_name)
+        return response
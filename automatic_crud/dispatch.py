@@ -0,0 +1,124 @@
+import threading
+from typing import Dict,List
+
+from django.conf import settings
+from django.http import Http404
+from django.urls import ResolverMatch,path,reverse
+from django.utils.functional import lazy
+
+URL_MODES = ('patterns','dispatch')
+
+DISPATCH_URL_NAME = 'automatic-crud-dispatch'
+DISPATCH_PK_URL_NAME = 'automatic-crud-dispatch-pk'
+
+def get_url_mode() -> str:
+    """
+    Return AUTOMATIC_CRUD_URL_MODE: 'patterns' registers a path() for every route of
+    every model, 'dispatch' registers 2 routes that find the view of the model in a dict.
+    """
+
+    mode = getattr(settings,'AUTOMATIC_CRUD_URL_MODE','patterns')
+    if mode not in URL_MODES:
+        raise ValueError('AUTOMATIC_CRUD_URL_MODE must be one of {0}'.format(', '.join(URL_MODES)))
+    return mode
+
+class CrudRegistry:
+    """
+    Routes generated by register_models() indexed by (app,model,action,has pk),
+    for example ('ajax-test_app','product','detail',True), and by URL name.
+    """
+
+    def __init__(self,urlpatterns: List):
+        self.urlpatterns = urlpatterns
+        self.routes = {}
+        self.names = {}
+        for pattern in urlpatterns:
+            parts = str(pattern.pattern).strip('/').split('/')
+            has_pk = parts[-1] == '<int:pk>'
+            if has_pk:
+                parts = parts[:-1]
+            __key = (parts[0],parts[1],parts[2],has_pk)
+            self.routes[__key] = pattern
+            if pattern.name:
+                self.names[pattern.name] = __key
+
+    def resolve(self,app: str,model: str,action: str,has_pk: bool):
+        return self.routes.get((app,model,action,has_pk))
+
+    def get_route(self,name: str):
+        return self.names.get(name)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> CrudRegistry:
+    # registry built once with the routes of register_models()
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from automatic_crud.register import register_models
+
+                _registry = CrudRegistry(register_models())
+    return _registry
+
+def get_crud_patterns() -> List:
+    """
+    Return the routes of every model as path() objects, in dispatch mode they are
+    not in the urlpatterns but they are used to resolve and reverse the routes
+    """
+    return get_registry().urlpatterns
+
+def dispatch_view(request,_crud_app: str,_crud_model: str,_crud_action: str,**kwargs):
+    """
+    View of the dispatch routes, call the view of the route of the model with its
+    default kwargs. request.resolver_match is replaced by the match of the route,
+    so views read the same URL name in both modes.
+    """
+
+    pattern = get_registry().resolve(_crud_app,_crud_model,_crud_action,'pk' in kwargs)
+    if pattern is None:
+        raise Http404('No route for {0}/{1}/{2}/'.format(_crud_app,_crud_model,_crud_action))
+    kwargs.update(pattern.default_args)
+    request.resolver_match = ResolverMatch(
+                                pattern.callback,(),kwargs,url_name = pattern.name,
+                                route = str(pattern.pattern)
+                            )
+    return pattern.callback(request,**kwargs)
+
+def is_async_pattern(pattern) -> bool:
+    # views with async handlers (view_is_async exists since Django 4.1)
+    view_class = getattr(pattern.callback,'view_class',None)
+    return bool(getattr(view_class,'view_is_async',False))
+
+def build_dispatch_urls() -> List:
+    """
+    Return the 2 dispatch routes, routes of async views (the events/ routes with
+    Django 4.2 or higher) are kept as path() objects before them, because
+    dispatch_view is synchronous and can not await them.
+    """
+
+    async_patterns = [pattern for pattern in get_crud_patterns() if is_async_pattern(pattern)]
+    return async_patterns + [
+        path('<str:_crud_app>/<str:_crud_model>/<str:_crud_action>/',dispatch_view,name = DISPATCH_URL_NAME),
+        path('<str:_crud_app>/<str:_crud_model>/<str:_crud_action>/<int:pk>/',dispatch_view,name = DISPATCH_PK_URL_NAME),
+    ]
+
+def reverse_crud(name: str,kwargs: Dict = None) -> str:
+    """
+    Return the URL of a generated route by its name, for example
+    reverse_crud('test_app-product-detail',kwargs = {'pk':1}), in both URL modes.
+    """
+
+    if get_url_mode() == 'patterns':
+        return reverse(name,kwargs = kwargs)
+    route = get_registry().get_route(name)
+    if route is None:
+        return reverse(name,kwargs = kwargs)
+    app,model,action,has_pk = route
+    __kwargs = {'_crud_app':app,'_crud_model':model,'_crud_action':action}
+    if has_pk:
+        __kwargs['pk'] = (kwargs or {}).get('pk')
+    return reverse(DISPATCH_PK_URL_NAME if has_pk else DISPATCH_URL_NAME,kwargs = __kwargs)
+
+reverse_crud_lazy = lazy(reverse_crud,str)
@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Dict,List
+
+from django.conf import settings
+from django.db import router,transaction
+from django.db.models.signals import post_save,post_delete
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from automatic_crud.data_types import Instance
+from automatic_crud.signals import model_changed
+
+logger = logging.getLogger('automatic_crud.events')
+
+CHANNEL_PREFIX = 'automatic_crud:events:'
+
+def get_channel(model: Instance) -> str:
+    return '{0}{1}'.format(CHANNEL_PREFIX,model._meta.label_lower)
+
+class Subscription:
+    """
+    Subscription of a client to a channel, events are delivered from any thread
+    and read with get(timeout), that returns None if no event arrives in timeout seconds.
+
+    If the client does not read its events and the queue is full, overflowed becomes True
+    and the subscription stops receiving events, the client must resynchronize.
+
+    """
+
+    def __init__(self,broker,channel: str,maxsize: int):
+        self.broker = broker
+        self.channel = channel
+        self.overflowed = False
+        self.queue = queue.Queue(maxsize)
+
+    def deliver(self,event: Dict):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.reset()
+
+    def reset(self):
+        # the client lost events and must resynchronize
+        self.overflowed = True
+        self.close()
+
+    def get(self,timeout: float):
+        try:
+            return self.queue.get(timeout = timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+class AsyncSubscription(Subscription):
+    """
+    Subscription read with await get(timeout) in an event loop, waiting clients
+    do not use a thread.
+    """
+
+    def __init__(self,broker,channel: str,maxsize: int):
+        super().__init__(broker,channel,maxsize)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self,event: Dict):
+        self.loop.call_soon_threadsafe(self.__put,event)
+
+    def __put(self,event: Dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.reset()
+
+    async def get(self,timeout: float):
+        try:
+            return await asyncio.wait_for(self.queue.get(),timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class InProcessBroker:
+    """
+    Fan-out of events to the subscribers of this process, it is enough when the
+    server runs in one process.
+    """
+
+    def __init__(self):
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+    def get_queue_size(self) -> int:
+        return getattr(settings,'AUTOMATIC_CRUD_EVENTS_QUEUE_SIZE',1000)
+
+    def subscribe(self,channel: str,subscription_class = Subscription) -> Subscription:
+        subscription = subscription_class(self,channel,self.get_queue_size())
+        with self.lock:
+            self.subscribers.setdefault(channel,set()).add(subscription)
+        return subscription
+
+    def asubscribe(self,channel: str) -> AsyncSubscription:
+        # must be called from the event loop where the subscription will be read
+        return self.subscribe(channel,AsyncSubscription)
+
+    def unsubscribe(self,subscription: Subscription):
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[subscription.channel]
+
+    def deliver(self,channel: str,event: Dict):
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel,()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def reset(self):
+        # every subscriber of this process must resynchronize
+        with self.lock:
+            subscribers = [subscription for channel in self.subscribers.values() for subscription in channel]
+        for subscription in subscribers:
+            subscription.reset()
+
+    def publish(self,channel: str,event: Dict):
+        self.deliver(channel,event)
+
+class RedisBroker(InProcessBroker):
+    """
+    Events are published in Redis and one thread per process listens to every channel
+    and delivers them to the subscribers of the process, so every process receives
+    the events of the others with a single connection.
+
+    The connection is created from AUTOMATIC_CRUD_EVENTS_REDIS_URL, override get_client
+    to use another client, for example fakeredis in development.
+
+    If the connection is lost the listener reconnects waiting from RECONNECT_DELAY to
+    RECONNECT_MAX_DELAY seconds between attempts, events published while it was
+    disconnected are lost, so every subscriber of the process is reset.
+
+    """
+
+    RECONNECT_DELAY = 0.5
+    RECONNECT_MAX_DELAY = 30
+
+    def __init__(self):
+        super().__init__()
+        self.client = self.get_client()
+        self.listener = None
+
+    def get_client(self):
+        import redis
+
+        return redis.Redis.from_url(getattr(settings,'AUTOMATIC_CRUD_EVENTS_REDIS_URL','redis://localhost:6379/0'))
+
+    def subscribe(self,channel: str,subscription_class = Subscription) -> Subscription:
+        self.start_listener()
+        return super().subscribe(channel,subscription_class)
+
+    def start_listener(self):
+        with self.lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = threading.Thread(target = self.listen,name = 'automatic-crud-events',daemon = True)
+                self.listener.start()
+
+    def listen(self):
+        delay,connected = self.RECONNECT_DELAY,False
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages = True)
+            try:
+                pubsub.psubscribe('{0}*'.format(CHANNEL_PREFIX))
+                if connected:
+                    # events sent while the connection was lost will never arrive
+                    self.reset()
+                delay,connected = self.RECONNECT_DELAY,True
+                self.consume(pubsub)
+            except Exception:
+                logger.exception('Redis events listener disconnected, reconnecting in %s seconds',delay)
+                time.sleep(delay)
+                delay = min(delay * 2,self.RECONNECT_MAX_DELAY)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+    def consume(self,pubsub):
+        for message in pubsub.listen():
+            if message['type'] != 'pmessage':
+                continue
+            channel = message['channel']
+            if isinstance(channel,bytes):
+                channel = channel.decode('utf-8')
+            self.deliver(channel,json.loads(message['data']))
+
+    def publish(self,channel: str,event: Dict):
+        self.client.publish(channel,json.dumps(event))
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker() -> InProcessBroker:
+    # broker of AUTOMATIC_CRUD_EVENTS_BACKEND, by default InProcessBroker
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(
+                    getattr(settings,'AUTOMATIC_CRUD_EVENTS_BACKEND','automatic_crud.events.InProcessBroker')
+                )()
+    return _broker
+
+def publish_events(model: Instance,action: str,pks: List,fields: List = None,using: str = None):
+    """
+    Publish an event {'id','action','fields'} for every pk when the transaction of the
+    database using (by default the write database of model) is committed, fields are
+    the changed fields if they are known. Errors of the broker are logged and never
+    fail the write.
+    """
+    if not getattr(model,'event_stream',False) or not pks:
+        return
+
+    def publish():
+        # the write is already committed, a failure of the broker only loses the events
+        try:
+            broker,channel = get_broker(),get_channel(model)
+            for pk in pks:
+                broker.publish(channel,{'id':pk,'action':action,'fields':fields})
+        except Exception:
+            logger.exception('Events of %s could not be published',model._meta.label)
+    transaction.on_commit(publish,using = using or router.db_for_write(model))
+
+def set_changed_fields(instance,fields: List):
+    # changed fields of the next save of instance, they are sent in its event
+    instance._automatic_crud_changed_fields = list(fields)
+
+@receiver(post_save)
+def _events_post_save(sender,instance,created,**kwargs):
+    if getattr(sender,'event_stream',False):
+        fields = instance.__dict__.pop('_automatic_crud_changed_fields',None)
+        publish_events(sender,'create' if created else 'update',[instance.pk],fields,kwargs.get('using'))
+
+@receiver(post_delete)
+def _events_post_delete(sender,instance,**kwargs):
+    publish_events(sender,'delete',[instance.pk],using = kwargs.get('using'))
+
+@receiver(model_changed)
+def _events_model_changed(sender,action,pks,**kwargs):
+    publish_events(sender,action,pks)
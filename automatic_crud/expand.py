@@ -0,0 +1,214 @@
+from typing import Dict,List
+
+import django
+from django.core.exceptions import FieldDoesNotExist,ObjectDoesNotExist,PermissionDenied
+from django.db.models import Count,OuterRef,Prefetch,Subquery
+from django.db.models.functions import Coalesce
+
+from automatic_crud.data_types import Instance
+from automatic_crud.natural_keys import is_cacheable_foreign_key
+from automatic_crud.utils import serialize_objects
+
+# prefetch querysets can be sliced since Django 4.2, before it reverse relations are limited
+# with a subquery and ManyToMany relations can not be expanded
+SLICED_PREFETCH = django.VERSION >= (4,2)
+
+def _is_expandable_model(model: Instance) -> bool:
+    # only models of automatic_crud can be expanded, so other models are never exposed
+    return (
+        hasattr(model,'exclude_fields') and not getattr(model,'exclude_model',True)
+        and any(field.name == 'model_state' for field in model._meta.concrete_fields)
+    )
+
+def can_view_model(user,model: Instance) -> bool:
+    """
+    Return True if user can read the registers of model, with the same rules of
+    validate_login_required and validate_permissions of the views of model
+    """
+
+    if user is None:
+        return not model.login_required and not model.model_permissions
+    if model.login_required and not user.is_authenticated:
+        return False
+    if model.model_permissions and not user.is_superuser:
+        return user.has_perm('{0}.view_{1}'.format(model._meta.app_label,model._meta.model_name))
+    return True
+
+def _get_relation(model: Instance,name: str):
+    # return the relation of model called name, reverse relations are found by accessor or query name
+    for field in model._meta.get_fields():
+        if not field.is_relation or field.name in model.exclude_fields:
+            continue
+        if field.name == name or (field.auto_created and not field.concrete and field.get_accessor_name() == name):
+            return field
+    raise FieldDoesNotExist(name)
+
+def _is_single(field) -> bool:
+    return field.many_to_one or field.one_to_one
+
+def _get_accessor(field) -> str:
+    return field.get_accessor_name() if field.auto_created and not field.concrete else field.name
+
+def _get_prefetch_attribute(field) -> str:
+    # prefetched registers are saved in a list, sliced querysets can not be used by related managers
+    return '_expanded_{0}'.format(_get_accessor(field))
+
+def _get_serialized_fields(model: Instance) -> List:
+    # concrete fields of model excluding exclude_fields, ManyToMany fields are only sent if they are expanded
+    return [field.name for field in model._meta.concrete_fields if field.name not in model.exclude_fields]
+
+def _get_foreign_keys(model: Instance) -> List:
+    # foreign keys whose natural key is serialized, they are joined to avoid a query per register
+    return [
+        field.name for field in model._meta.concrete_fields
+        if _is_single(field) and field.name not in model.exclude_fields and not is_cacheable_foreign_key(field)
+    ]
+
+def parse_expand(model: Instance,value: str,user = None) -> Dict:
+    """
+    Return the tree of relations of value, for example 'category,category__parent'
+    returns {'category': {'parent': {}}}.
+
+    Raise ValueError if a relation does not exist, points to a model that is not
+    managed by automatic_crud or the limits expand_max_depth and expand_max_relations
+    of model are exceeded, ManyToMany relations also raise ValueError before Django 4.2
+    because their registers can not be limited by expand_max_items in the database.
+    Raise PermissionDenied with the relation if user can not
+    view a related model, see can_view_model.
+
+    """
+
+
+    paths = [path.strip() for path in value.split(',') if path.strip()]
+    if len(paths) > model.expand_max_relations:
+        raise ValueError('Too many relations to expand')
+
+    tree = {}
+    for path in paths:
+        names = path.split('__')
+        if len(names) > model.expand_max_depth:
+            raise ValueError('Relation too deep: {0}'.format(path))
+        node,current_model = tree,model
+        for name in names:
+            try:
+                field = _get_relation(current_model,name)
+            except FieldDoesNotExist:
+                raise ValueError('Invalid relation: {0}'.format(path))
+            if field.many_to_many and not SLICED_PREFETCH:
+                raise ValueError('ManyToMany relations require Django 4.2: {0}'.format(path))
+            current_model = field.related_model
+            if not _is_expandable_model(current_model):
+                raise ValueError('Invalid relation: {0}'.format(path))
+            if not can_view_model(user,current_model):
+                raise PermissionDenied(path)
+            node = node.setdefault(name,{})
+    return tree
+
+def _plan(model: Instance,tree: Dict,prefix: str,select: List,prefetch: List,max_items: int):
+    for name,subtree in tree.items():
+        field = _get_relation(model,name)
+        related_model = field.related_model
+        if _is_single(field):
+            path = prefix + name
+            select.append(path)
+            select.extend('{0}__{1}'.format(path,foreign_key) for foreign_key in _get_foreign_keys(related_model))
+            _plan(related_model,subtree,path + '__',select,prefetch,max_items)
+        else:
+            prefetch.append(Prefetch(
+                prefix + _get_accessor(field),
+                queryset = _limit_queryset(_build_queryset(related_model,subtree,max_items),field,max_items),
+                to_attr = _get_prefetch_attribute(field)
+            ))
+
+def _build_queryset(model: Instance,tree: Dict,max_items: int):
+    select,prefetch = [],[]
+    _plan(model,tree,'',select,prefetch,max_items)
+    queryset = model._default_manager.filter(model_state = True).order_by('id')
+    select += _get_foreign_keys(model)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+def _limit_queryset(queryset,field,max_items: int):
+    """
+    Return the first max_items registers of queryset for every register of the other
+    side of field, so registers after the limit are never read from the database.
+
+    Since Django 4.2 the queryset is sliced (a ROW_NUMBER() window by the foreign key),
+    before it the registers of a reverse relation are filtered by the number of active
+    registers with the same foreign key and a lower id.
+
+    """
+
+    if SLICED_PREFETCH:
+        return queryset[:max_items]
+    foreign_key = field.field.attname
+    previous = queryset.model._default_manager.filter(
+                    model_state = True,id__lt = OuterRef('id'),**{foreign_key:OuterRef(foreign_key)}
+                ).order_by().values(foreign_key).annotate(count = Count('id')).values('count')
+    return queryset.annotate(
+                _expand_position = Coalesce(Subquery(previous),0)
+            ).filter(_expand_position__lt = max_items)
+
+def expand_queryset(queryset,tree: Dict):
+    """
+    Add select_related for forward relations and Prefetch objects for reverse and
+    ManyToMany relations of tree, so the whole tree is fetched with one query
+    plus one query for every reverse or ManyToMany relation.
+
+    """
+
+
+    model = queryset.model
+    select,prefetch = [],[]
+    _plan(model,tree,'',select,prefetch,model.expand_max_items)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+def _serialize_instance(instance,tree: Dict,max_items: int) -> Dict:
+    data = serialize_objects([instance],_get_serialized_fields(type(instance)))[0]
+    data['fields'].update(_serialize_expanded(instance,tree,max_items))
+    return data
+
+def _serialize_expanded(instance,tree: Dict,max_items: int) -> Dict:
+    expanded = {}
+    for name,subtree in tree.items():
+        field = _get_relation(type(instance),name)
+        if _is_single(field):
+            try:
+                related = getattr(instance,_get_accessor(field))
+            except ObjectDoesNotExist:
+                related = None
+            if related is None or not related.model_state:
+                expanded[name] = None
+            else:
+                expanded[name] = _serialize_instance(related,subtree,max_items)
+        else:
+            expanded[name] = [
+                _serialize_instance(related,subtree,max_items)
+                for related in getattr(instance,_get_prefetch_attribute(field))[:max_items]
+            ]
+    return expanded
+
+def serialize_expanded(objects,fields: List,tree: Dict,**options) -> List:
+    """
+    Return objects as the python serializer of Django with natural foreign keys,
+    relations of tree are replaced by the serialized related registers, options
+    are sent to the serializer, for example use_natural_primary_keys.
+    """
+
+    objects = list(objects)
+    if not objects:
+        return []
+    max_items = type(objects[0]).expand_max_items
+    data = []
+    for instance,item in zip(objects,serialize_objects(objects,fields,**options)):
+        item['fields'].update(_serialize_expanded(instance,tree,max_items))
+        item['model'] = instance._meta.label_lower
+        data.append(item)
+    return data
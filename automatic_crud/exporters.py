@@ -0,0 +1,54 @@
+import threading
+from typing import Callable
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# format name: dotted path of the view that exports a model in that format,
+# the view module is imported only when its URL is requested for the first time
+EXPORTERS = {
+    'xlsx':'automatic_crud.base_report.GetExcelReport',
+    'parquet':'automatic_crud.columnar_report.GetParquetReport',
+    'arrow':'automatic_crud.columnar_report.GetArrowReport',
+    'csv':'automatic_crud.csv_export.GetCSVReport',
+}
+
+_views = {}
+_views_lock = threading.Lock()
+
+def register_exporter(name: str,view_path: str):
+    # register or replace the view used for the format name
+    EXPORTERS[name] = view_path
+    with _views_lock:
+        _views.pop(name,None)
+
+def get_exporters() -> dict:
+    # registered exporters, AUTOMATIC_CRUD_EXPORTERS can add or replace exporters
+    exporters = dict(EXPORTERS)
+    exporters.update(getattr(settings,'AUTOMATIC_CRUD_EXPORTERS',{}))
+    return exporters
+
+def get_exporter_view(name: str) -> Callable:
+    """
+    Return the view function of the exporter name, importing its module the first time
+    """
+    view = _views.get(name)
+    if view is None:
+        with _views_lock:
+            view = _views.get(name)
+            if view is None:
+                view = _views[name] = import_string(get_exporters()[name]).as_view()
+    return view
+
+def exporter_view(name: str) -> Callable:
+    """
+    Return a view function for URL patterns that imports the exporter name only
+    when the URL is requested, so its dependencies are not loaded on startup.
+
+    """
+
+
+    def view(request,*args,**kwargs):
+        return get_exporter_view(name)(request,*args,**kwargs)
+    view.exporter = name
+    return view
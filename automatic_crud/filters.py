@@ -0,0 +1,105 @@
+from typing import Dict,List
+
+from django.core.exceptions import ValidationError
+from django.db import models
+
+from automatic_crud.data_types import Instance
+
+# parameters of the generated views, they are never filters even if a field has that name
+RESERVED_PARAMETERS = ('page','start','end','order_by','expand','summary','group_by','fields')
+
+# fields of BaseModel that can be filtered although they are in exclude_fields
+AUDIT_FIELDS = ('date_created','date_modified','model_state')
+
+RANGE_LOOKUPS = ('gt','gte','lt','lte')
+
+RANGE_TYPES = (
+    'DateField','DateTimeField','TimeField','AutoField','BigAutoField','SmallAutoField',
+    'IntegerField','BigIntegerField','SmallIntegerField','PositiveIntegerField',
+    'PositiveBigIntegerField','PositiveSmallIntegerField','FloatField','DecimalField'
+)
+
+def get_filter_fields(model: Instance) -> Dict:
+    """
+    Return {name: field} of the concrete fields of model that can be filtered,
+    fields in exclude_fields are not included except AUDIT_FIELDS. Foreign
+    keys can be filtered by name or attname, for example category or category_id.
+    """
+
+    fields = {}
+    for field in model._meta.concrete_fields:
+        if field.name in model.exclude_fields and field.name not in AUDIT_FIELDS:
+            continue
+        fields[field.name] = fields[field.attname] = field
+    return fields
+
+def _to_python(field,value: str):
+    # convert a value of request.GET with the field, raise ValueError if it is not valid
+    if field.is_relation:
+        field = field.target_field
+    if isinstance(field,models.BooleanField):
+        value = {'true':True,'1':True,'false':False,'0':False}.get(value.lower())
+        if value is None:
+            raise ValueError(value)
+        return value
+    try:
+        return field.to_python(value)
+    except ValidationError:
+        raise ValueError(value)
+
+def parse_filters(model: Instance,params) -> Dict:
+    """
+    Return the lookups for queryset.filter() sent in params, usually request.GET:
+
+        field=value                 equality, for example category=1 or model_state=false.
+        field__in=a,b,c             value in the list.
+        field__gte=value            ranges with gt, gte, lt and lte on dates, times and numbers,
+                                    a date sent to a datetime field compares the date only,
+                                    for example date_created__lte=2021-01-31.
+
+    Parameters that are not fields of the model are ignored, a lookup or value
+    that is not valid raises ValueError with the name of the parameter.
+
+    """
+
+
+    filters = {}
+    fields = get_filter_fields(model)
+    for key in params:
+        name,_,lookup = key.partition('__')
+        if name not in fields or name in RESERVED_PARAMETERS:
+            continue
+        field,value = fields[name],params.get(key)
+        try:
+            if not lookup:
+                filters[field.attname] = _to_python(field,value)
+            elif lookup == 'in':
+                filters['{0}__in'.format(field.attname)] = [_to_python(field,item) for item in value.split(',') if item]
+            elif lookup in RANGE_LOOKUPS and field.get_internal_type() in RANGE_TYPES:
+                if isinstance(field,models.DateTimeField) and len(value) == 10:
+                    filters['{0}__date__{1}'.format(field.attname,lookup)] = models.DateField().to_python(value)
+                else:
+                    filters['{0}__{1}'.format(field.attname,lookup)] = _to_python(field,value)
+            else:
+                raise ValueError(key)
+        except (ValueError,ValidationError):
+            raise ValueError(key)
+    return filters
+
+def parse_fields(model: Instance,value: str,fields: List) -> List:
+    """
+    Return the fields of the list fields whose names are sent in value separated
+    by commas, in the same order, raise ValueError if a name is not in fields.
+    """
+
+    available = {}
+    for field in fields:
+        available[field.name] = available[field.attname] = field
+    selected = []
+    for name in value.split(','):
+        name = name.strip()
+        if name not in available:
+            raise ValueError('fields')
+        if available[name] not in selected:
+            selected.append(available[name])
+    return selected
@@ -1,14 +1,155 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.http import JsonResponse as JSR
 from django.contrib.auth.mixins import AccessMixin
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
 
+from functools import partial
+
 from django.views.generic import View
 
+from automatic_crud.admission import Admission,AdmissionRejected,ReleasingIterator
+from automatic_crud.budgets import BudgetExceeded,RequestBudget
+from automatic_crud.compression import compress_response
+from automatic_crud.expand import parse_expand,serialize_expanded
+from automatic_crud.filters import parse_filters
+from automatic_crud.natural_keys import is_cacheable_foreign_key
+from automatic_crud.profiling import get_profiling_mode,profile_request
+from automatic_crud.response_messages import (
+    query_budget_exceeded_message,timeout_exceeded_message,too_many_requests_message
+)
+from automatic_crud.routers import (
+    STICKY_COOKIE_NAME,RoutedIterator,get_read_your_writes_seconds,pin_primary,route_reads
+)
+from automatic_crud.serializers import serialize
+from automatic_crud.utils import get_model
+
 class BaseCrudMixin(AccessMixin):
     model = None
     data = None
     permission_required = ()
+    compressible = False
+    heavy = False
+    filters = {}
+
+    def get_view_model(self,kwargs):
+        """
+        Return the model of the view, it can be an attribute of the view
+        or be sent in the url kwargs
+        """
+
+        if self.model is not None:
+            return self.model
+        if 'model' in kwargs:
+            return kwargs['model']
+        if '_app_name' in kwargs:
+            return get_model(kwargs['_app_name'],kwargs['_model_name'])
+        return None
+
+    def is_heavy_request(self) -> bool:
+        """
+        Return True if the request must pass the admission control of automatic_crud.admission
+        """
+
+        return self.heavy
+
+    def get_filters(self) -> dict:
+        """
+        Return the lookups of the filters sent in request.GET, see automatic_crud.filters.parse_filters
+        """
+
+        return parse_filters(self.model,self.request.GET)
+
+    def get_action(self) -> str:
+        """
+        Return the action of the view from its url name, for example 'list' or 'excel-report'
+        """
+        url_name = getattr(getattr(self.request,'resolver_match',None),'url_name',None) or ''
+        prefix = '{0}-{1}-'.format(self.model._meta.app_label,self.model._meta.object_name.lower())
+        if url_name.startswith(prefix):
+            url_name = url_name[len(prefix):]
+        if url_name.endswith('-ajax'):
+            url_name = url_name[:-len('-ajax')]
+        return url_name
+
+    def run_view(self,request,*args,**kwargs):
+        """
+        Call the view applying the limits of RequestBudget and the profiling mode if it is requested
+        """
+        callback = partial(super().dispatch,request,*args,**kwargs)
+        profiling_mode = get_profiling_mode(request)
+        if profiling_mode is not None:
+            callback = partial(profile_request,request,profiling_mode,callback)
+        if self.model is None:
+            return callback()
+
+        budget = RequestBudget(request,self.model,self.get_action())
+        if not budget.active:
+            return callback()
+        try:
+            # the deadline is only checked before statements, a finished view is never turned into an error
+            with budget:
+                response = callback()
+        except BudgetExceeded as error:
+            budget.log(error)
+            if error.status_code == 503:
+                return query_budget_exceeded_message()
+            return timeout_exceeded_message()
+        if response.streaming:
+            budget.wrap_streaming(response)
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        self.model = self.get_view_model(kwargs)
+
+        admission = None
+        if self.model is not None and self.is_heavy_request():
+            # requests without login or permissions are rejected before taking rate tokens or slots
+            for validate in (self.validate_login_required,self.validate_permissions):
+                rejected,response = validate()
+                if rejected:
+                    return response
+            admission = Admission(request,self.model)
+            try:
+                admission.admit()
+            except AdmissionRejected as error:
+                return too_many_requests_message(error.retry_after)
+
+        # writes and reads after a recent write of the client go to the primary database
+        is_write = request.method not in ('GET','HEAD','OPTIONS')
+        pinned = is_write or STICKY_COOKIE_NAME in request.COOKIES
+        route_reads(True)
+        pin_primary(pinned)
+        try:
+            response = self.run_view(request,*args,**kwargs)
+        except BaseException:
+            if admission is not None:
+                admission.release()
+            raise
+        finally:
+            route_reads(False)
+            pin_primary(False)
+
+        if response.streaming and not getattr(response,'is_async',False):
+            response.streaming_content = RoutedIterator(response.streaming_content,pinned)
+
+        if admission is not None:
+            # streamed content is generated after dispatch, the slot is released when it ends
+            if response.streaming:
+                response.streaming_content = ReleasingIterator(response.streaming_content,admission)
+            else:
+                admission.release()
+
+        if is_write and response.status_code < 400 and getattr(self.model,'read_db',None):
+            __seconds = get_read_your_writes_seconds()
+            if __seconds:
+                response.set_cookie(STICKY_COOKIE_NAME,'1',max_age = __seconds,httponly = True,samesite = 'Lax')
+
+        if self.compressible:
+            response = compress_response(request,response,self.model)
+        return response
 
     def get_permission_required(self):
         """
@@ -83,4 +224,40 @@ class BaseCrud(BaseCrudMixin,View):
         for field in self.model.exclude_fields:            
             if field in fields:
                 fields.remove(field)
-        return fields
\ No newline at end of file
+        return fields
+
+    def get_select_related_fields(self):
+        """
+        Return forward foreign keys and one to one fields of model excluding exclude_fields of model
+        and foreign keys whose natural keys are read from the natural key cache
+        """
+        fields = self.get_fields_for_model()
+        return [
+            field.name for field in self.model._meta.get_fields()
+            if field.name in fields and field.concrete and (field.many_to_one or field.one_to_one)
+            and not is_cacheable_foreign_key(field)
+        ]
+
+    def get_expand_tree(self):
+        # relations sent in the parameter expand, raise ValueError if they are not valid
+        # and PermissionDenied if the user can not view a related model
+        return parse_expand(self.model,self.request.GET.get('expand',''),self.request.user)
+
+    def serialize_data(self,objects,tree = None,**options):
+        """
+        Serialize objects to JSON with natural foreign keys, relations of tree
+        are replaced by the serialized related registers
+        """
+        if tree:
+            return json.dumps(serialize_expanded(objects,self.get_fields_for_model(),tree,**options),cls = DjangoJSONEncoder)
+        return serialize(
+                    'json',objects,fields = self.get_fields_for_model(),
+                    use_natural_foreign_keys = True,**options
+                )
+
+    def select_related(self,queryset):
+        # select_related() without fields follows every relation, so it is only called with fields
+        fields = self.get_select_related_fields()
+        if fields:
+            return queryset.select_related(*fields)
+        return queryset
\ No newline at end of file
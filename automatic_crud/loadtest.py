@@ -0,0 +1,455 @@
+import asyncio
+import http.client
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from datetime import date
+from typing import Dict,List
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import ThreadedWSGIServer,WSGIRequestHandler
+from django.db import models
+from django.urls import NoReverseMatch
+from django.utils import timezone
+
+from automatic_crud.data_types import Instance
+from automatic_crud.dispatch import get_crud_patterns,reverse_crud
+
+# endpoint type of every action, actions that are not listed are not requested
+ACTION_KINDS = {
+    'list':'read',
+    'detail':'read',
+    'excel-report':'report',
+    'parquet-report':'report',
+    'arrow-report':'report',
+    'csv-report':'report',
+    'create':'write',
+    'update':'write',
+    'logic-delete':'write',
+    'direct-delete':'write',
+}
+
+DEFAULT_MIX = {'read':70,'write':20,'report':10}
+
+# registers sampled from every model for detail, update and delete requests
+SAMPLE_SIZE = 100
+
+class Endpoint:
+    """
+    A generated route: model, action (for example 'list' or 'excel-report'),
+    ajax and the name of the URL used to reverse it.
+    """
+
+    def __init__(self,name: str,model: Instance,action: str,ajax: bool):
+        self.name = name
+        self.model = model
+        self.action = action
+        self.ajax = ajax
+        self.kind = ACTION_KINDS[action]
+
+    @property
+    def type(self) -> str:
+        return '{0}-ajax'.format(self.action) if self.ajax else self.action
+
+    @property
+    def needs_pk(self) -> bool:
+        return self.action in ('detail','update','logic-delete','direct-delete')
+
+    def get_path(self,pk = None) -> str:
+        return reverse_crud(self.name,kwargs = {'pk':pk} if self.needs_pk else None)
+
+def _get_pattern_model(pattern):
+    if 'model' in pattern.default_args:
+        return pattern.default_args['model']
+    if '_app_name' in pattern.default_args:
+        from automatic_crud.utils import get_model
+        return get_model(pattern.default_args['_app_name'],pattern.default_args['_model_name'])
+    return getattr(pattern.callback,'view_initkwargs',{}).get('model')
+
+def discover_endpoints(urlpatterns: List = None,labels: List = None) -> List:
+    """
+    Return the endpoints of urlpatterns, by default the routes of every model, that can
+    be reversed with the ROOT_URLCONF of the project. labels limits the models, for example
+    ['app.Model']. Writes are only requested to AJAX routes, they do not need a CSRF token
+    in the live server and return JSON instead of redirects.
+
+    """
+
+
+    if urlpatterns is None:
+        urlpatterns = get_crud_patterns()
+
+    endpoints = []
+    for pattern in urlpatterns:
+        model = _get_pattern_model(pattern)
+        if model is None or not pattern.name:
+            continue
+        if labels and model._meta.label not in labels and model._meta.label_lower not in labels:
+            continue
+        action = pattern.name
+        prefix = '{0}-{1}-'.format(model._meta.app_label,model._meta.object_name.lower())
+        if action.startswith(prefix):
+            action = action[len(prefix):]
+        ajax = action.endswith('-ajax')
+        if ajax:
+            action = action[:-len('-ajax')]
+        if action not in ACTION_KINDS or (ACTION_KINDS[action] == 'write' and not ajax):
+            continue
+        endpoint = Endpoint(pattern.name,model,action,ajax)
+        try:
+            endpoint.get_path(1)
+        except NoReverseMatch:
+            continue
+        endpoints.append(endpoint)
+    return endpoints
+
+def build_payload(model: Instance,number: int) -> Dict:
+    """
+    Return JSON data to create a register of model, required fields get a value
+    generated from their type and number, so unique fields do not collide.
+    """
+
+    data = {}
+    marker = 'lt{0}-{1}'.format(number,uuid4().hex[:8])
+    for field in model._meta.concrete_fields:
+        if (not field.editable or field.primary_key or field.name in model.exclude_fields
+                or (field.blank and not field.unique) or field.has_default()):
+            continue
+        if field.choices:
+            data[field.name] = field.choices[0][0]
+        elif field.is_relation:
+            pks = list(field.related_model._default_manager.values_list('pk',flat = True)[:SAMPLE_SIZE])
+            data[field.name] = random.choice(pks) if pks else None
+        elif isinstance(field,models.EmailField):
+            data[field.name] = '{0}@example.com'.format(marker)
+        elif isinstance(field,(models.CharField,models.TextField)):
+            data[field.name] = marker[:field.max_length] if field.max_length else marker
+        elif isinstance(field,models.BooleanField):
+            data[field.name] = True
+        elif isinstance(field,(models.IntegerField,models.FloatField,models.DecimalField)):
+            data[field.name] = number % 32767
+        elif isinstance(field,models.DateTimeField):
+            data[field.name] = timezone.now().isoformat()
+        elif isinstance(field,models.DateField):
+            data[field.name] = date.today().isoformat()
+        elif isinstance(field,models.TimeField):
+            data[field.name] = '12:00:00'
+        elif isinstance(field,models.UUIDField):
+            data[field.name] = str(uuid4())
+        elif isinstance(field,models.JSONField):
+            data[field.name] = {}
+    return data
+
+def _percentile(values: List,percent: float) -> float:
+    # nearest rank percentile of sorted values
+    if not values:
+        return 0
+    return values[max(0,math.ceil(percent / 100 * len(values)) - 1)]
+
+def _read_content(response: bytes) -> bytes:
+    # content of a raw HTTP/1.1 response without its headers, chunked content is joined
+    head,_,content = response.partition(b'\r\n\r\n')
+    if b'transfer-encoding: chunked' not in head.lower():
+        return content
+    chunks = []
+    while content:
+        size,_,content = content.partition(b'\r\n')
+        size = int(size.split(b';')[0] or b'0',16)
+        if not size:
+            break
+        chunks.append(content[:size])
+        content = content[size + 2:]
+    return b''.join(chunks)
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.statuses = {}
+
+    def add(self,status: int,seconds: float):
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status,0) + 1
+        if status == 0 or status >= 400:
+            self.errors += 1
+
+    def summary(self,elapsed: float) -> Dict:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            'requests':count,
+            'throughput':round(count / elapsed,2) if elapsed else 0,
+            'p50':round(_percentile(latencies,50) * 1000,2),
+            'p95':round(_percentile(latencies,95) * 1000,2),
+            'p99':round(_percentile(latencies,99) * 1000,2),
+            'error_rate':round(self.errors / count,4) if count else 0,
+            'statuses':{str(status):total for status,total in sorted(self.statuses.items())},
+        }
+
+class LoadTest:
+    """
+    Send a mix of read, write and report requests to endpoints from a pool of
+    concurrency clients, during duration seconds or until total_requests are sent.
+
+    Parameters:
+        base_url                    URL of the server, for example http://127.0.0.1:8000
+        endpoints                   endpoints returned by discover_endpoints.
+        mix                         weight of every endpoint kind: {'read','write','report'}
+        concurrency                 number of clients sending requests at the same time.
+        mode                        'threads' (a thread per client) or 'asyncio' (one event loop).
+        cookies                     Cookie header of every request, for example a session.
+
+    Detail requests use registers sampled before the test, updates and deletes use
+    registers created by the test when there are any, deletes only use them. Registers
+    created by the test are removed by cleanup().
+
+    """
+
+    def __init__(self,base_url: str,endpoints: List,mix: Dict = None,concurrency: int = 8,
+                duration: float = 10,total_requests: int = None,mode: str = 'threads',
+                cookies: str = '',timeout: float = 30):
+        self.url = urlsplit(base_url)
+        self.endpoints = endpoints
+        self.concurrency = concurrency
+        self.duration = duration
+        self.total_requests = total_requests
+        self.mode = mode
+        self.cookies = cookies
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.counter = itertools.count(1)
+        self.stats = {}
+        self.kinds = {}
+        for endpoint in endpoints:
+            self.kinds.setdefault(endpoint.kind,[]).append(endpoint)
+        mix = mix or DEFAULT_MIX
+        self.weights = {kind:weight for kind,weight in mix.items() if weight and kind in self.kinds}
+        self.sampled = {}
+        self.created = {}
+        self.live = {}
+
+    def sample(self):
+        for model in {endpoint.model for endpoint in self.endpoints}:
+            self.sampled[model] = list(
+                model.objects.filter(model_state = True).order_by('id').values_list('id',flat = True)[:SAMPLE_SIZE]
+            )
+            self.created[model] = []
+            self.live[model] = []
+
+    def __next_number(self) -> int:
+        with self.lock:
+            return next(self.counter)
+
+    def __reserve(self) -> bool:
+        # return False when total_requests have been sent
+        if self.total_requests is None:
+            return True
+        return self.__next_number() <= self.total_requests
+
+    def choose(self,rng: random.Random):
+        """
+        Return (endpoint,method,path,body,pk) of the next request
+        """
+        kind = rng.choices(list(self.weights),weights = list(self.weights.values()))[0]
+        endpoint = rng.choice(self.kinds[kind])
+        model,pk,body = endpoint.model,None,b''
+        if endpoint.action in ('update','logic-delete','direct-delete'):
+            # writes only change registers created by the test, without them a register is created
+            with self.lock:
+                if not self.live[model]:
+                    pk = None
+                elif endpoint.action == 'update':
+                    pk = rng.choice(self.live[model])
+                else:
+                    pk = self.live[model].pop()
+            if pk is None:
+                endpoint = next((item for item in self.kinds['write'] if item.model is model and item.action == 'create'),None)
+                if endpoint is None:
+                    return None
+        elif endpoint.needs_pk:
+            with self.lock:
+                pk = rng.choice(self.sampled[model]) if self.sampled[model] else None
+            if pk is None:
+                return None
+
+        if endpoint.action in ('create','update'):
+            body = json.dumps(build_payload(model,self.__next_number())).encode('utf-8')
+        method = {'create':'POST','update':'POST','logic-delete':'DELETE','direct-delete':'DELETE'}.get(endpoint.action,'GET')
+        return endpoint,method,endpoint.get_path(pk),body,pk
+
+    def get_headers(self,body: bytes) -> Dict:
+        headers = {'Content-Length':str(len(body)),'X-Requested-With':'XMLHttpRequest'}
+        if body:
+            headers['Content-Type'] = 'application/json'
+        if self.cookies:
+            headers['Cookie'] = self.cookies
+        return headers
+
+    def record(self,endpoint: Endpoint,status: int,seconds: float,content: bytes):
+        with self.lock:
+            self.stats.setdefault(endpoint.type,EndpointStats()).add(status,seconds)
+        if endpoint.action == 'create' and 200 <= status < 300:
+            self.__track_created(endpoint.model,content)
+
+    def __track_created(self,model: Instance,content: bytes):
+        # the id of the created register is read from the create response, so it is also found with --url
+        try:
+            pk = json.loads(content).get('id')
+        except (ValueError,AttributeError):
+            return
+        if pk is not None:
+            with self.lock:
+                self.created[model].append(pk)
+                self.live[model].append(pk)
+
+    def send(self,method: str,path: str,body: bytes):
+        # return the status and the content of the response
+        connection_class = http.client.HTTPSConnection if self.url.scheme == 'https' else http.client.HTTPConnection
+        connection = connection_class(self.url.hostname,self.url.port,timeout = self.timeout)
+        try:
+            connection.request(method,path,body = body,headers = self.get_headers(body))
+            response = connection.getresponse()
+            return response.status,response.read()
+        finally:
+            connection.close()
+
+    async def asend(self,method: str,path: str,body: bytes):
+        ssl = self.url.scheme == 'https'
+        port = self.url.port or (443 if ssl else 80)
+        reader,writer = await asyncio.wait_for(asyncio.open_connection(self.url.hostname,port,ssl = ssl),self.timeout)
+        try:
+            headers = dict(self.get_headers(body),Host = self.url.netloc,Connection = 'close')
+            head = '{0} {1} HTTP/1.1\r\n{2}\r\n\r\n'.format(
+                    method,path,'\r\n'.join('{0}: {1}'.format(name,value) for name,value in headers.items())
+                )
+            writer.write(head.encode('latin-1') + body)
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(),self.timeout)
+            response = await asyncio.wait_for(reader.read(),self.timeout)
+            return int(status_line.split()[1]),_read_content(response)
+        finally:
+            writer.close()
+
+    def __thread_client(self,deadline: float,seed: int):
+        rng = random.Random(seed)
+        while time.monotonic() < deadline and self.__reserve():
+            request = self.choose(rng)
+            if request is None:
+                continue
+            endpoint,method,path,body,_ = request
+            start = time.perf_counter()
+            try:
+                status,content = self.send(method,path,body)
+            except (OSError,http.client.HTTPException):
+                status,content = 0,b''
+            self.record(endpoint,status,time.perf_counter() - start,content)
+
+    async def __async_client(self,deadline: float,seed: int):
+        rng,loop = random.Random(seed),asyncio.get_running_loop()
+        while time.monotonic() < deadline and self.__reserve():
+            # choose and record use the ORM, they run in a thread out of the event loop
+            request = await loop.run_in_executor(None,self.choose,rng)
+            if request is None:
+                continue
+            endpoint,method,path,body,_ = request
+            start = time.perf_counter()
+            try:
+                status,content = await self.asend(method,path,body)
+            except (OSError,ValueError,IndexError,asyncio.TimeoutError):
+                status,content = 0,b''
+            await loop.run_in_executor(None,self.record,endpoint,status,time.perf_counter() - start,content)
+
+    async def __run_async(self,deadline: float):
+        await asyncio.gather(*[self.__async_client(deadline,seed) for seed in range(self.concurrency)])
+
+    def run(self) -> Dict:
+        """
+        Run the test and return the summary of every endpoint type and every kind
+        """
+        if not self.weights:
+            raise ValueError('No hay rutas para los tipos de petición de --mix')
+        self.sample()
+        start = time.monotonic()
+        deadline = start + self.duration if self.duration else math.inf
+        if self.mode == 'asyncio':
+            asyncio.run(self.__run_async(deadline))
+        else:
+            clients = [
+                threading.Thread(target = self.__thread_client,args = (deadline,seed),daemon = True)
+                for seed in range(self.concurrency)
+            ]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+        elapsed = time.monotonic() - start
+
+        kinds = {}
+        for endpoint in self.endpoints:
+            stats = self.stats.get(endpoint.type)
+            if stats is not None:
+                kind_stats = kinds.setdefault(endpoint.kind,{})
+                kind_stats[endpoint.type] = stats
+        return {
+            'elapsed':round(elapsed,2),
+            'concurrency':self.concurrency,
+            'mode':self.mode,
+            'endpoints':{name:stats.summary(elapsed) for name,stats in sorted(self.stats.items())},
+            'kinds':{kind:self.__merge(list(types.values())).summary(elapsed) for kind,types in sorted(kinds.items())},
+        }
+
+    def __merge(self,stats: List) -> EndpointStats:
+        merged = EndpointStats()
+        for item in stats:
+            merged.latencies += item.latencies
+            merged.errors += item.errors
+            for status,total in item.statuses.items():
+                merged.statuses[status] = merged.statuses.get(status,0) + total
+        return merged
+
+    def cleanup(self):
+        # delete registers created by the test, including logically deleted ones, with the databases
+        # of settings, with --url they must be the databases of the server
+        for model,pks in self.created.items():
+            if pks:
+                model.objects.filter(pk__in = pks).delete()
+
+class LoadTestHandler(WSGIHandler):
+    # requests of the load test do not need a CSRF token, as requests of django.test.Client
+    def get_response(self,request):
+        request._dont_enforce_csrf_checks = True
+        return super().get_response(request)
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self,*args):
+        pass
+
+class LiveServer:
+    """
+    Threaded WSGI server of the project in a thread of this process, it uses
+    the databases of settings, so registers created by the test are real.
+    """
+
+    def __init__(self,host: str = '127.0.0.1',port: int = 0):
+        self.host = host
+        self.port = port
+        self.httpd = None
+
+    @property
+    def url(self) -> str:
+        return 'http://{0}:{1}'.format(self.host,self.httpd.server_address[1])
+
+    def start(self):
+        self.httpd = ThreadedWSGIServer((self.host,self.port),QuietRequestHandler,allow_reuse_address = False)
+        self.httpd.set_app(LoadTestHandler())
+        threading.Thread(target = self.httpd.serve_forever,daemon = True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
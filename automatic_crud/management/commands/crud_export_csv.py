@@ -0,0 +1,57 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand,CommandError
+
+from automatic_crud.csv_export import export_csv
+from automatic_crud.filters import get_filter_fields,parse_filters
+
+class Command(BaseCommand):
+    help = 'Exporta los registros activos de un modelo a CSV con varios procesos, por rangos de ids.'
+
+    def add_arguments(self,parser):
+        parser.add_argument('model',help = 'Modelo a exportar, por ejemplo: app.Model.')
+        parser.add_argument('output',help = 'Archivo de salida, .csv o .tar.gz con --tar.')
+        parser.add_argument('--workers',type = int,help = 'Cantidad de procesos, por defecto la cantidad de núcleos.')
+        parser.add_argument('--chunk-size',type = int,help = 'Registros por rango, por defecto csv_chunk_size del modelo.')
+        parser.add_argument('--fields',help = 'Campos a exportar separados por comas.')
+        parser.add_argument('--filter',action = 'append',default = [],
+                            help = 'Filtro con el formato campo=valor, por ejemplo date_created__gte=2021-01-01.')
+        parser.add_argument('--tar',action = 'store_true',help = 'Genera un .tar.gz con un archivo CSV por rango.')
+
+    def handle(self,*args,**options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError,ValueError):
+            raise CommandError('Modelo no válido: {0}'.format(options['model']))
+        if not hasattr(model,'csv_chunk_size'):
+            raise CommandError('{0} no hereda de BaseModel'.format(options['model']))
+
+        params = {}
+        for item in options['filter']:
+            key,_,value = item.partition('=')
+            params[key] = value
+        # parse_filters ignores unknown parameters, in a command they are errors
+        unknown = [key for key in params if key.partition('__')[0] not in get_filter_fields(model)]
+        if unknown:
+            raise CommandError('Filtro no válido: {0}'.format(', '.join(unknown)))
+        try:
+            filters = parse_filters(model,params)
+        except ValueError as error:
+            raise CommandError('Filtro no válido: {0}'.format(error))
+
+        start = time.monotonic()
+
+        def progress(done,total,rows):
+            self.stdout.write('Rango {0}/{1} - {2} registros - {3:.1f} s'.format(done,total,rows,time.monotonic() - start))
+
+        try:
+            rows = export_csv(
+                        model,options['output'],workers = options['workers'],chunk_size = options['chunk_size'],
+                        filters = filters,fields = options['fields'],tarball = options['tar'],progress = progress
+                    )
+        except ValueError as error:
+            raise CommandError('Parámetro no válido: {0}'.format(error))
+        self.stdout.write(self.style.SUCCESS('{0} registros exportados en {1} ({2:.1f} s)'.format(
+            rows,options['output'],time.monotonic() - start
+        )))
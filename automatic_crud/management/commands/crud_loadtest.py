@@ -0,0 +1,80 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand,CommandError
+from django.test import Client
+
+from automatic_crud.loadtest import DEFAULT_MIX,LiveServer,LoadTest,discover_endpoints
+
+class Command(BaseCommand):
+    help = 'Envía tráfico concurrente a las rutas generadas y muestra rendimiento, latencias y errores por tipo de ruta.'
+
+    def add_arguments(self,parser):
+        parser.add_argument('--url',help = 'URL de un servidor en ejecución, por defecto se inicia un servidor local.')
+        parser.add_argument('--models',help = 'Modelos separados por comas, por ejemplo: app.Model,app.Other.')
+        parser.add_argument('--mix',default = ','.join('{0}={1}'.format(kind,weight) for kind,weight in DEFAULT_MIX.items()),
+                            help = 'Peso de cada tipo de petición: read, write y report.')
+        parser.add_argument('--concurrency',type = int,default = 8,help = 'Clientes enviando peticiones al mismo tiempo.')
+        parser.add_argument('--duration',type = float,default = 10,help = 'Segundos de la prueba.')
+        parser.add_argument('--requests',type = int,help = 'Cantidad total de peticiones, termina antes si se cumple la duración.')
+        parser.add_argument('--mode',choices = ('threads','asyncio'),default = 'threads')
+        parser.add_argument('--user',help = 'Username con el que se inicia sesión en las peticiones.')
+        parser.add_argument('--json',action = 'store_true',help = 'Muestra el resultado en formato JSON.')
+        parser.add_argument('--keep',action = 'store_true',help = 'No elimina los registros creados por la prueba.')
+
+    def parse_mix(self,value: str) -> dict:
+        mix = {}
+        for item in value.split(','):
+            kind,_,weight = item.partition('=')
+            if kind.strip() not in DEFAULT_MIX or not weight.strip().isdigit():
+                raise CommandError('Valor de --mix no válido: {0}'.format(item))
+            mix[kind.strip()] = int(weight)
+        return mix
+
+    def get_cookies(self,username: str) -> str:
+        # session of the user created as django.test.Client does, valid only for this database
+        user = get_user_model()._default_manager.get_by_natural_key(username)
+        client = Client()
+        client.force_login(user)
+        return '{0}={1}'.format(settings.SESSION_COOKIE_NAME,client.cookies[settings.SESSION_COOKIE_NAME].value)
+
+    def handle(self,*args,**options):
+        labels = [label.strip() for label in options['models'].split(',')] if options['models'] else None
+        endpoints = discover_endpoints(labels = labels)
+        if not endpoints:
+            raise CommandError('No hay rutas generadas en el ROOT_URLCONF del proyecto')
+
+        server = None
+        url = options['url']
+        if url is None:
+            server = LiveServer().start()
+            url = server.url
+
+        loadtest = LoadTest(
+                    url,endpoints,self.parse_mix(options['mix']),concurrency = options['concurrency'],
+                    duration = options['duration'],total_requests = options['requests'],mode = options['mode'],
+                    cookies = self.get_cookies(options['user']) if options['user'] else ''
+                )
+        try:
+            result = loadtest.run()
+        except ValueError as error:
+            raise CommandError(str(error))
+        finally:
+            if server is not None:
+                server.stop()
+            if not options['keep']:
+                loadtest.cleanup()
+
+        if options['json']:
+            self.stdout.write(json.dumps(result,indent = 2))
+            return
+
+        self.stdout.write('{0} clientes ({1}) durante {2} segundos\n'.format(result['concurrency'],result['mode'],result['elapsed']))
+        header = '{0:<24}{1:>10}{2:>10}{3:>10}{4:>10}{5:>10}{6:>10}'.format('Ruta','Pet.','Pet./s','p50 ms','p95 ms','p99 ms','Errores')
+        for title,rows in (('Por ruta',result['endpoints']),('Por tipo',result['kinds'])):
+            self.stdout.write('\n{0}\n{1}'.format(title,header))
+            for name,row in rows.items():
+                self.stdout.write('{0:<24}{1:>10}{2:>10}{3:>10}{4:>10}{5:>10}{6:>10.1%}'.format(
+                    name,row['requests'],row['throughput'],row['p50'],row['p95'],row['p99'],row['error_rate']
+                ))
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-19 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelCounter',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('model_label', models.CharField(max_length=255, unique=True, verbose_name='Modelo')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Cantidad de Registros')),
+            ],
+            options={
+                'verbose_name': 'Contador de Modelo',
+                'verbose_name_plural': 'Contadores de Modelos',
+            },
+        ),
+    ]
@@ -1,10 +1,12 @@
 from django.db import models
-from django.urls import path,reverse_lazy
+from django.urls import path
 from django.contrib.auth.decorators import login_required
 
 from automatic_crud.utils import get_model
 from automatic_crud.data_types import *
-from automatic_crud.base_report import GetExcelReport
+from automatic_crud.dispatch import reverse_crud_lazy
+from automatic_crud.exporters import exporter_view
+from automatic_crud.base_import import PostExcelImport,PostCSVImport
 from automatic_crud.views_crud import *
 from automatic_crud.views_crud_ajax import *
 
@@ -15,7 +17,7 @@ class BaseModel(models.Model):
     id = models.AutoField(primary_key = True)
     model_state = models.BooleanField(default = True)
     date_created = models.DateTimeField('Fecha de Creación', auto_now=False, auto_now_add=True)
-    date_modified = models.DateTimeField('Fecha de Modificación', auto_now=True, auto_now_add=False)
+    date_modified = models.DateTimeField('Fecha de Modificación', auto_now=True, auto_now_add=False, db_index=True)
     date_deleted = models.DateTimeField('Fecha de Eliminación', auto_now=True, auto_now_add=False)  
     
     create_form = None
@@ -28,7 +30,55 @@ class BaseModel(models.Model):
     exclude_model = False
     normal_pagination = False
     values_for_page = 10
+    max_unpaginated_rows = None
+    streaming_list = False
+    streaming_chunk_size = 500
+
+    compress_responses = True
+    compression_level = 6
+    compression_min_size = 1024
+
+    excel_report_cache = False
+    excel_summary = ()
+    excel_group_by = None
+    columnar_chunk_size = 10000
+    parquet_compression = 'snappy'
+    csv_chunk_size = 100000
+    import_batch_size = 500
+    sync_page_size = 500
+    sync_safety_lag = 2
+    max_batch_size = 100
+    upsert_unique_fields = None
+    upsert_batch_size = 500
+
+    expand_max_depth = 2
+    expand_max_relations = 4
+    expand_max_items = 100
+
+    aggregate_group_by_fields = None
+    aggregate_functions = ('count','sum','avg','min','max')
+
+    count_strategy = 'exact'
+    count_cache_timeout = 60
+    count_estimate_threshold = 100000
+    cache_natural_key = False
+    cache_pages = False
+    page_cache_timeout = 300
     
+    event_stream = False
+
+    read_db = None
+    write_db = None
+
+    max_queries = None
+    statement_timeout = None
+    request_timeout = None
+
+    max_concurrent_heavy_requests = None
+    shared_concurrent_heavy_requests = None
+    heavy_requests_rate = None
+    admission_queue_timeout = None
+
     login_required = False
     permission_required = ()
     model_permissions = False
@@ -42,16 +92,23 @@ class BaseModel(models.Model):
 
     error_create_message = "no se ha podido registrar!"
     error_update_message = "no se ha podido actualizar!"
+    success_import_message = "importado correctamente!"
+    error_import_message = "no se han podido importar algunos registros!"
+    success_upsert_message = "sincronizado correctamente!"
+    error_upsert_message = "no se han podido sincronizar algunos registros!"
     non_found_message = "No se ha encontrado un registro con estos datos!"
 
     create_template = None
     update_template = None
     list_template = None
+    list_rows_template = None
     detail_template = None
 
     class Meta:
         """Meta definition for BaseModel."""
         abstract = True
+        # keyset of the changes/ route, models with their own Meta must inherit BaseModel.Meta
+        indexes = [models.Index(fields = ['date_modified','id'])]
 
     def get_create_form(self,form = None):
         if form != None:
@@ -89,6 +146,36 @@ class BaseModel(models.Model):
     def get_excel_report_url(self):
         return "{0}/excel-report/".format(self._meta.object_name.lower())
     
+    def get_parquet_report_url(self):
+        return "{0}/parquet-report/".format(self._meta.object_name.lower())
+
+    def get_arrow_report_url(self):
+        return "{0}/arrow-report/".format(self._meta.object_name.lower())
+
+    def get_csv_report_url(self):
+        return "{0}/csv-report/".format(self._meta.object_name.lower())
+
+    def get_excel_import_url(self):
+        return "{0}/excel-import/".format(self._meta.object_name.lower())
+
+    def get_csv_import_url(self):
+        return "{0}/csv-import/".format(self._meta.object_name.lower())
+    
+    def get_changes_url(self):
+        return "{0}/changes/".format(self._meta.object_name.lower())
+    
+    def get_aggregate_url(self):
+        return "{0}/aggregate/".format(self._meta.object_name.lower())
+    
+    def get_batch_detail_url(self):
+        return "{0}/detail/".format(self._meta.object_name.lower())
+    
+    def get_upsert_url(self):
+        return "{0}/upsert/".format(self._meta.object_name.lower())
+
+    def get_events_url(self):
+        return "{0}/events/".format(self._meta.object_name.lower())
+    
     def get_alias_create_url(self):
         return "{0}-{1}-create".format(self._meta.app_label,self._meta.object_name.lower())
 
@@ -110,6 +197,36 @@ class BaseModel(models.Model):
     def get_alias_excel_report_url(self):
         return "{0}-{1}-excel-report".format(self._meta.app_label,self._meta.object_name.lower())
 
+    def get_alias_parquet_report_url(self):
+        return "{0}-{1}-parquet-report".format(self._meta.app_label,self._meta.object_name.lower())
+
+    def get_alias_arrow_report_url(self):
+        return "{0}-{1}-arrow-report".format(self._meta.app_label,self._meta.object_name.lower())
+
+    def get_alias_csv_report_url(self):
+        return "{0}-{1}-csv-report".format(self._meta.app_label,self._meta.object_name.lower())
+
+    def get_alias_changes_url(self):
+        return "{0}-{1}-changes".format(self._meta.app_label,self._meta.object_name.lower())
+
+    def get_alias_aggregate_url(self):
+        return "{0}-{1}-aggregate".format(self._meta.app_label,self._meta.object_name.lower())
+
+    def get_alias_batch_detail_url(self):
+        return "{0}-{1}-batch-detail".format(self._meta.app_label,self._meta.object_name.lower())
+
+    def get_alias_upsert_url(self):
+        return "{0}-{1}-upsert".format(self._meta.app_label,self._meta.object_name.lower())
+
+    def get_alias_events_url(self):
+        return "{0}-{1}-events".format(self._meta.app_label,self._meta.object_name.lower())
+
+    def get_alias_excel_import_url(self):
+        return "{0}-{1}-excel-import".format(self._meta.app_label,self._meta.object_name.lower())
+
+    def get_alias_csv_import_url(self):
+        return "{0}-{1}-csv-import".format(self._meta.app_label,self._meta.object_name.lower())
+
     def build_generics_urls_crud(self) -> URLList:
         
         __app_name = self._meta.app_label
@@ -131,7 +248,7 @@ class BaseModel(models.Model):
                 "{0}/{1}".format(__app_name,self.get_create_url()),
                 BaseCreate.as_view(
                     template_name = __model.create_template,model = __model,
-                    form_class = __create_form,success_url = reverse_lazy("{0}".format(self.get_alias_list_url()))
+                    form_class = __create_form,success_url = reverse_crud_lazy(self.get_alias_list_url())
                 ),
                 name = self.get_alias_create_url()
             ),
@@ -144,7 +261,7 @@ class BaseModel(models.Model):
                 "{0}/{1}".format(__app_name,self.get_update_url()),
                 BaseUpdate.as_view(
                     template_name = __model.update_template,model = __model,
-                    form_class = __update_form,success_url = reverse_lazy("{0}".format(self.get_alias_list_url()))
+                    form_class = __update_form,success_url = reverse_crud_lazy(self.get_alias_list_url())
                 ),
                 name = self.get_alias_update_url()
             ),
@@ -152,7 +269,7 @@ class BaseModel(models.Model):
                 "{0}/{1}".format(__app_name,self.get_logic_delete_url()),
                 BaseLogicDelete.as_view(
                     model = __model,
-                    success_url = reverse_lazy("{0}".format(self.get_alias_list_url()))
+                    success_url = reverse_crud_lazy(self.get_alias_list_url())
                 ),
                 name = self.get_alias_logic_delete_url()
             ),
@@ -160,15 +277,40 @@ class BaseModel(models.Model):
                 "{0}/{1}".format(__app_name,self.get_direct_delete_url()),
                 BaseDirectDelete.as_view(
                     model = __model,
-                    success_url = reverse_lazy("{0}".format(self.get_alias_list_url()))
+                    success_url = reverse_crud_lazy(self.get_alias_list_url())
                 ),
                 name = self.get_alias_direct_delete_url()
             ),
             path(
                 "{0}/{1}".format(__app_name,self.get_excel_report_url()),
-                GetExcelReport.as_view(),{'_app_name':__app_name,'_model_name':__model_name},
+                exporter_view('xlsx'),{'_app_name':__app_name,'_model_name':__model_name},
                 name = self.get_alias_excel_report_url()
             ),
+            path(
+                "{0}/{1}".format(__app_name,self.get_parquet_report_url()),
+                exporter_view('parquet'),{'_app_name':__app_name,'_model_name':__model_name},
+                name = self.get_alias_parquet_report_url()
+            ),
+            path(
+                "{0}/{1}".format(__app_name,self.get_arrow_report_url()),
+                exporter_view('arrow'),{'_app_name':__app_name,'_model_name':__model_name},
+                name = self.get_alias_arrow_report_url()
+            ),
+            path(
+                "{0}/{1}".format(__app_name,self.get_csv_report_url()),
+                exporter_view('csv'),{'_app_name':__app_name,'_model_name':__model_name},
+                name = self.get_alias_csv_report_url()
+            ),
+            path(
+                "{0}/{1}".format(__app_name,self.get_excel_import_url()),
+                PostExcelImport.as_view(),{'_app_name':__app_name,'_model_name':__model_name},
+                name = self.get_alias_excel_import_url()
+            ),
+            path(
+                "{0}/{1}".format(__app_name,self.get_csv_import_url()),
+                PostCSVImport.as_view(),{'_app_name':__app_name,'_model_name':__model_name},
+                name = self.get_alias_csv_import_url()
+            ),
         ]
 
         return urlpatterns
@@ -222,9 +364,80 @@ class BaseModel(models.Model):
             ),
             path(
                 "ajax-{0}/{1}".format(__app_name,self.get_excel_report_url()),
-                GetExcelReport.as_view(),{'_app_name':__app_name,'_model_name':__model_name},
+                exporter_view('xlsx'),{'_app_name':__app_name,'_model_name':__model_name},
                 name = "{0}-ajax".format(self.get_alias_excel_report_url())
             ),
+            path(
+                "ajax-{0}/{1}".format(__app_name,self.get_parquet_report_url()),
+                exporter_view('parquet'),{'_app_name':__app_name,'_model_name':__model_name},
+                name = "{0}-ajax".format(self.get_alias_parquet_report_url())
+            ),
+            path(
+                "ajax-{0}/{1}".format(__app_name,self.get_arrow_report_url()),
+                exporter_view('arrow'),{'_app_name':__app_name,'_model_name':__model_name},
+                name = "{0}-ajax".format(self.get_alias_arrow_report_url())
+            ),
+            path(
+                "ajax-{0}/{1}".format(__app_name,self.get_csv_report_url()),
+                exporter_view('csv'),{'_app_name':__app_name,'_model_name':__model_name},
+                name = "{0}-ajax".format(self.get_alias_csv_report_url())
+            ),
+            path(
+                "ajax-{0}/{1}".format(__app_name,self.get_excel_import_url()),
+                PostExcelImport.as_view(),{'_app_name':__app_name,'_model_name':__model_name},
+                name = "{0}-ajax".format(self.get_alias_excel_import_url())
+            ),
+            path(
+                "ajax-{0}/{1}".format(__app_name,self.get_csv_import_url()),
+                PostCSVImport.as_view(),{'_app_name':__app_name,'_model_name':__model_name},
+                name = "{0}-ajax".format(self.get_alias_csv_import_url())
+            ),
+            path(
+                "ajax-{0}/{1}".format(__app_name,self.get_changes_url()),
+                BaseChangesAJAX.as_view(),__model_context,
+                name = "{0}-ajax".format(self.get_alias_changes_url())
+            ),
+            path(
+                "ajax-{0}/{1}".format(__app_name,self.get_aggregate_url()),
+                BaseAggregateAJAX.as_view(),__model_context,
+                name = "{0}-ajax".format(self.get_alias_aggregate_url())
+            ),
+            path(
+                "ajax-{0}/{1}".format(__app_name,self.get_batch_detail_url()),
+                BaseBatchDetailAJAX.as_view(),__model_context,
+                name = "{0}-ajax".format(self.get_alias_batch_detail_url())
+            ),
+            path(
+                "ajax-{0}/{1}".format(__app_name,self.get_upsert_url()),
+                BaseUpsertAJAX.as_view(),__model_create_form_context,
+                name = "{0}-ajax".format(self.get_alias_upsert_url())
+            ),
         ]
 
+        if self.event_stream:
+            urlpatterns.append(
+                path(
+                    "ajax-{0}/{1}".format(__app_name,self.get_events_url()),
+                    BaseEventStreamAJAX.as_view(),__model_context,
+                    name = "{0}-ajax".format(self.get_alias_events_url())
+                )
+            )
+
         return urlpatterns
+
+class ModelCounter(models.Model):
+    """
+    Count of active registers for models with count_strategy = 'counter',
+    maintained by signals of automatic_crud.counts
+    """
+
+    id = models.AutoField(primary_key = True)
+    model_label = models.CharField('Modelo', max_length = 255, unique = True)
+    count = models.BigIntegerField('Cantidad de Registros', default = 0)
+
+    class Meta:
+        verbose_name = 'Contador de Modelo'
+        verbose_name_plural = 'Contadores de Modelos'
+
+    def __str__(self):
+        return "{0}: {1}".format(self.model_label,self.count)
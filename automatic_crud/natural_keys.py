@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable,Dict,List
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_save,post_delete
+from django.dispatch import receiver
+
+from automatic_crud.data_types import Instance
+from automatic_crud.signals import model_changed
+
+class NaturalKeyCache:
+    """
+    Process local LRU cache of natural keys, keys are (model label,version,pk).
+
+    Every model has a version that is increased when one of its registers changes,
+    entries of old versions are never read again and are discarded by the LRU.
+    If AUTOMATIC_CRUD_NATURAL_KEY_CACHE_ALIAS is the name of a Django cache, versions and
+    natural keys are shared with every process that uses it.
+
+    Without the shared cache a change only increases the version of the process that
+    made it, so local entries expire after timeout seconds and other processes read
+    the new natural keys after that time at most.
+
+    """
+
+    def __init__(self,maxsize: int = 1024,timeout: float = 60):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.__entries = OrderedDict()
+        self.__versions = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def shared(self):
+        alias = getattr(settings,'AUTOMATIC_CRUD_NATURAL_KEY_CACHE_ALIAS',None)
+        return caches[alias] if alias else None
+
+    def __shared_key(self,label: str,version: int,pk) -> str:
+        return 'automatic_crud:natural-key:{0}:{1}:{2}'.format(label,version,pk)
+
+    def __version_key(self,label: str) -> str:
+        return 'automatic_crud:natural-key-version:{0}'.format(label)
+
+    def get_version(self,model: Instance) -> int:
+        label = model._meta.label_lower
+        if self.shared is not None:
+            return self.shared.get(self.__version_key(label),0)
+        return self.__versions.get(label,0)
+
+    def invalidate(self,model: Instance):
+        label = model._meta.label_lower
+        with self.__lock:
+            self.__versions[label] = self.__versions.get(label,0) + 1
+        shared = self.shared
+        if shared is not None:
+            key = self.__version_key(label)
+            if not shared.add(key,1,None):
+                try:
+                    shared.incr(key)
+                except ValueError:
+                    shared.set(key,1,None)
+
+    def get_many(self,model: Instance,version: int,pks: List) -> Dict:
+        # return {pk: natural key} for cached pks, local entries are read first
+        label = model._meta.label_lower
+        found,missing = {},[]
+        now = time.monotonic()
+        with self.__lock:
+            for pk in pks:
+                key = (label,version,pk)
+                entry = self.__entries.get(key)
+                if entry is not None and entry[1] > now:
+                    self.__entries.move_to_end(key)
+                    found[pk] = entry[0]
+                else:
+                    self.__entries.pop(key,None)
+                    missing.append(pk)
+
+        shared = self.shared
+        if missing and shared is not None:
+            keys = {self.__shared_key(label,version,pk):pk for pk in missing}
+            values = {keys[key]:value for key,value in shared.get_many(list(keys)).items()}
+            self.__set_local(label,version,values)
+            found.update(values)
+        return found
+
+    def set_many(self,model: Instance,version: int,values: Dict):
+        label = model._meta.label_lower
+        self.__set_local(label,version,values)
+        shared = self.shared
+        if values and shared is not None:
+            shared.set_many(
+                {self.__shared_key(label,version,pk):value for pk,value in values.items()},
+                getattr(settings,'AUTOMATIC_CRUD_NATURAL_KEY_CACHE_TIMEOUT',3600)
+            )
+
+    def __set_local(self,label: str,version: int,values: Dict):
+        expires = time.monotonic() + self.timeout
+        with self.__lock:
+            for pk,value in values.items():
+                self.__entries[(label,version,pk)] = (value,expires)
+                self.__entries.move_to_end((label,version,pk))
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last = False)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+natural_key_cache = NaturalKeyCache(
+                        getattr(settings,'AUTOMATIC_CRUD_NATURAL_KEY_CACHE_SIZE',1024),
+                        getattr(settings,'AUTOMATIC_CRUD_NATURAL_KEY_LOCAL_TIMEOUT',60)
+                    )
+
+def is_cacheable_foreign_key(field) -> bool:
+    # foreign keys to the primary key of a model with cache_natural_key = True
+    if not field.is_relation or not (field.many_to_one or field.one_to_one) or not field.concrete:
+        return False
+    related_model = field.remote_field.model
+    return (
+        getattr(related_model,'cache_natural_key',False) and hasattr(related_model,'natural_key')
+        and field.target_field.primary_key
+    )
+
+def load_natural_keys(model: Instance,version: int,pks: List,loader: Callable = None) -> Dict:
+    """
+    Return {pk: natural key} for pks of model, keys not found in cache are fetched
+    in one query, or with loader(pk) if it is sended, and stored in cache.
+
+    """
+
+
+    pks = list(set(pks))
+    values = natural_key_cache.get_many(model,version,pks)
+    missing = [pk for pk in pks if pk not in values]
+    if missing:
+        if loader is not None:
+            new_values = {pk:loader(pk) for pk in missing}
+        else:
+            new_values = {
+                instance.pk:instance.natural_key()
+                for instance in model._base_manager.filter(pk__in = missing)
+            }
+        natural_key_cache.set_many(model,version,new_values)
+        values.update(new_values)
+    return values
+
+def _invalidate(sender):
+    if getattr(sender,'cache_natural_key',False):
+        natural_key_cache.invalidate(sender)
+
+@receiver(post_save)
+def _natural_key_post_save(sender,**kwargs):
+    _invalidate(sender)
+
+@receiver(post_delete)
+def _natural_key_post_delete(sender,**kwargs):
+    _invalidate(sender)
+
+@receiver(model_changed)
+def _natural_key_model_changed(sender,**kwargs):
+    _invalidate(sender)
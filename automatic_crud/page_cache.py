@@ -0,0 +1,124 @@
+import hashlib
+from functools import lru_cache
+from typing import Callable,List
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_save,post_delete
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+from automatic_crud.data_types import Instance
+from automatic_crud.signals import model_changed
+
+def get_page_cache():
+    # Django cache where rendered pages are saved, AUTOMATIC_CRUD_PAGE_CACHE_ALIAS
+    return caches[getattr(settings,'AUTOMATIC_CRUD_PAGE_CACHE_ALIAS','default')]
+
+def _page_version_key(model: Instance) -> str:
+    return 'automatic_crud:page-version:{0}'.format(model._meta.label_lower)
+
+def get_page_dependencies(model: Instance) -> List:
+    """
+    Return model and the models of its relations, the natural key of related
+    registers is rendered in the pages of model, so their changes invalidate them too.
+    """
+
+    dependencies = [model]
+    for field in model._meta.get_fields():
+        if (field.is_relation and field.concrete and field.related_model is not None
+                and field.name not in model.exclude_fields and field.related_model not in dependencies):
+            dependencies.append(field.related_model)
+    return dependencies
+
+@lru_cache(maxsize = None)
+def _get_cached_models() -> frozenset:
+    # models whose version must be increased on writes, pages or Excel reports cached and their dependencies
+    models = set()
+    for model in apps.get_models():
+        if getattr(model,'cache_pages',False) or getattr(model,'excel_report_cache',False):
+            models.update(get_page_dependencies(model))
+    return frozenset(models)
+
+def get_page_version(model: Instance) -> str:
+    """
+    Return the version of the pages of model, it is formed by the versions of
+    model and its dependencies, which are read with one call to the cache.
+
+    """
+
+
+    keys = [_page_version_key(dependency) for dependency in get_page_dependencies(model)]
+    versions = get_page_cache().get_many(keys)
+    return '.'.join(str(versions.get(key,0)) for key in keys)
+
+def invalidate_pages(model: Instance):
+    # every cached page of model and of models that depend on it is discarded at once
+    cache,key = get_page_cache(),_page_version_key(model)
+    if not cache.add(key,1,None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key,1,None)
+
+def get_permission_class(request) -> str:
+    """
+    Return the permission class of the user of request, users with the same permissions
+    share cached pages: anonymous, superuser or a hash of staff status and permissions.
+    """
+
+    user = getattr(request,'user',None)
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    if user.is_superuser:
+        return 'superuser'
+    value = '{0}|{1}'.format(user.is_staff,','.join(sorted(user.get_all_permissions())))
+    return hashlib.md5(value.encode('utf-8')).hexdigest()
+
+def cached_page(request,model: Instance,name: str,render_page: Callable) -> HttpResponse:
+    """
+    Return the page name of model from cache or render it with render_page and save it
+    for model.page_cache_timeout seconds when model.cache_pages is True.
+
+    The key contains the version of the model, the permission class of the user and the
+    language of the request. Pages that use {% csrf_token %}, set cookies or are streamed
+    are never saved.
+
+    """
+
+
+    if not getattr(model,'cache_pages',False) or request.method != 'GET':
+        return render_page()
+
+    cache = get_page_cache()
+    key = 'automatic_crud:page:{0}:{1}:{2}:{3}:{4}'.format(
+            model._meta.label_lower,get_page_version(model),hashlib.md5(name.encode('utf-8')).hexdigest(),
+            get_permission_class(request),getattr(request,'LANGUAGE_CODE','')
+        )
+    cached = cache.get(key)
+    if cached is not None:
+        content,content_type = cached
+        return HttpResponse(content,content_type = content_type)
+
+    response = render_page()
+    if (response.status_code == 200 and not response.streaming and not response.cookies
+            and not request.META.get('CSRF_COOKIE_USED')):
+        cache.set(key,(response.content,response['Content-Type']),model.page_cache_timeout)
+    return response
+
+def _invalidate(sender):
+    if sender in _get_cached_models():
+        invalidate_pages(sender)
+
+@receiver(post_save)
+def _page_post_save(sender,**kwargs):
+    _invalidate(sender)
+
+@receiver(post_delete)
+def _page_post_delete(sender,**kwargs):
+    _invalidate(sender)
+
+@receiver(model_changed)
+def _page_model_changed(sender,**kwargs):
+    _invalidate(sender)
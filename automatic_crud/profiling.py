@@ -0,0 +1,230 @@
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+import uuid
+from contextlib import ExitStack
+from typing import Callable,Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import JsonResponse as JSR
+from django.views.generic import View
+
+PROFILE_HEADER = 'X-Automatic-Crud-Profile'
+
+def get_profiling_mode(request) -> str:
+    """
+    Return 'inline' or 'store' if the request must be profiled, None otherwise.
+
+    Profiling is enabled with AUTOMATIC_CRUD_PROFILING = True, only for staff users, and is
+    requested with the parameter ?_profile=inline|store or the header X-Automatic-Crud-Profile.
+
+    """
+
+
+    if not getattr(settings,'AUTOMATIC_CRUD_PROFILING',False):
+        return None
+    mode = request.GET.get('_profile') or request.META.get('HTTP_X_AUTOMATIC_CRUD_PROFILE')
+    if not mode:
+        return None
+    user = getattr(request,'user',None)
+    if user is None or not user.is_staff:
+        return None
+    return 'inline' if mode == 'inline' else 'store'
+
+class _QueryLogger:
+    # execute wrapper that records every statement executed with its duration
+    def __init__(self,alias: str,queries: list):
+        self.alias = alias
+        self.queries = queries
+
+    def __call__(self,execute,sql,params,many,context):
+        start = time.perf_counter()
+        try:
+            return execute(sql,params,many,context)
+        finally:
+            self.queries.append({
+                'alias':self.alias,'sql':sql,'params':params if not many else None,
+                'many':many,'duration':time.perf_counter() - start
+            })
+
+def _explain(query: Dict) -> str:
+    connection = connections[query['alias']]
+    with connection.cursor() as cursor:
+        cursor.execute('{0} {1}'.format(connection.ops.explain_query_prefix(),query['sql']),query['params'])
+        return '\n'.join(' '.join(str(value) for value in row) for row in cursor.fetchall())
+
+def _build_explains(queries: list) -> list:
+    # EXPLAIN only the slowest SELECT statements
+    count = getattr(settings,'AUTOMATIC_CRUD_PROFILING_EXPLAIN_COUNT',3)
+    selects = [query for query in queries if not query['many'] and query['sql'].lstrip().upper().startswith('SELECT')]
+    explains = []
+    for query in sorted(selects,key = lambda query: query['duration'],reverse = True)[:count]:
+        try:
+            plan = _explain(query)
+        except Exception as error:
+            plan = 'EXPLAIN failed: {0}'.format(error)
+        explains.append({'sql':query['sql'],'duration':query['duration'],'plan':plan})
+    return explains
+
+EXPLAIN_NOTE = (
+    'El EXPLAIN de las consultas más lentas se ejecuta nuevamente en la Base de Datos después '
+    'de la petición, no está incluido en duration, query_count ni query_duration.'
+)
+
+class _Profiler:
+    """
+    cProfile, tracemalloc and a logger of SQL statements that are enabled only while
+    run() calls a function, so the chunks of a streaming response are profiled while
+    they are sent and the time waiting for the client is not measured.
+
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.profiler = cProfile.Profile()
+        self.duration = 0
+        self.peak_memory = 0
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        if hasattr(tracemalloc,'reset_peak'):
+            tracemalloc.reset_peak()
+
+    def run(self,function: Callable,*args):
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(_QueryLogger(alias,self.queries)))
+            self.profiler.enable()
+            try:
+                return function(*args)
+            finally:
+                self.profiler.disable()
+                self.duration += time.perf_counter() - start
+
+    def stop(self):
+        _,self.peak_memory = tracemalloc.get_traced_memory()
+        if self.started_tracing:
+            tracemalloc.stop()
+
+    def build_report(self,request,status_code: int,report_id: str) -> Dict:
+        stats_output = io.StringIO()
+        pstats.Stats(self.profiler,stream = stats_output).sort_stats('cumulative').print_stats(
+            getattr(settings,'AUTOMATIC_CRUD_PROFILING_STATS_LINES',50)
+        )
+        return {
+            'id':report_id,
+            'method':request.method,
+            'path':request.get_full_path(),
+            'status_code':status_code,
+            'duration':self.duration,
+            'peak_memory':self.peak_memory,
+            'query_count':len(self.queries),
+            'query_duration':sum(query['duration'] for query in self.queries),
+            'queries':[
+                {'alias':query['alias'],'sql':query['sql'],'duration':query['duration']} for query in self.queries
+            ],
+            'explains':_build_explains(self.queries),
+            'explain_note':EXPLAIN_NOTE,
+            'profile':stats_output.getvalue(),
+        }
+
+class _ProfiledStream:
+    """
+    Iterator of the streaming content of a response that generates every chunk inside
+    the profiler, finish is called once when the content ends or the response is closed.
+    """
+
+    def __init__(self,profiler: _Profiler,content,finish: Callable):
+        self.profiler = profiler
+        self.iterator = iter(content)
+        self.finish = finish
+        self.finished = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self.profiler.run(next,self.iterator)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        if not self.finished:
+            self.finished = True
+            self.finish()
+
+def _store_report(report: Dict):
+    cache.set(
+        'automatic_crud:profile:{0}'.format(report['id']),report,
+        getattr(settings,'AUTOMATIC_CRUD_PROFILING_TIMEOUT',3600)
+    )
+
+def profile_request(request,mode: str,callback: Callable):
+    """
+    Call callback with cProfile, tracemalloc and a logger of SQL statements enabled,
+    return the report as JSON if mode is 'inline', otherwise the report is stored in the
+    cache and its id is sent in the header X-Automatic-Crud-Profile of the response.
+
+    Streamed content is generated inside the profiler chunk by chunk and never joined,
+    in 'inline' mode it is read and discarded, in 'store' mode it is profiled while it is
+    sent to the client and the report is stored when the response is closed.
+
+    """
+
+
+    profiler,report_id = _Profiler(),uuid.uuid4().hex
+    try:
+        response = profiler.run(callback)
+    except BaseException:
+        profiler.stop()
+        raise
+
+    # async streams (events/) are not profiled, only the view that returned them
+    if not response.streaming or getattr(response,'is_async',False):
+        profiler.stop()
+        report = profiler.build_report(request,response.status_code,report_id)
+        if mode == 'inline':
+            return JSR(report)
+        _store_report(report)
+        response[PROFILE_HEADER] = report_id
+        return response
+
+    if mode == 'inline':
+        try:
+            for _ in _ProfiledStream(profiler,response.streaming_content,profiler.stop):
+                pass
+        finally:
+            response.close()
+        return JSR(profiler.build_report(request,response.status_code,report_id))
+
+    def finish():
+        profiler.stop()
+        _store_report(profiler.build_report(request,response.status_code,report_id))
+    response.streaming_content = _ProfiledStream(profiler,response.streaming_content,finish)
+    response[PROFILE_HEADER] = report_id
+    return response
+
+class ProfileReport(View):
+    """
+    Return a profile report stored by profile_request, only for staff users.
+    """
+
+    def get(self,request,profile_id: str,*args,**kwargs):
+        if not getattr(settings,'AUTOMATIC_CRUD_PROFILING',False) or not request.user.is_staff:
+            response = JSR({'error': 'No tiene los permisos para realizar esta acción.'})
+            response.status_code = 403
+            return response
+
+        report = cache.get('automatic_crud:profile:{0}'.format(profile_id))
+        if report is None:
+            response = JSR({'error': 'No se ha encontrado el reporte de perfilado.'})
+            response.status_code = 404
+            return response
+        return JSR(report)
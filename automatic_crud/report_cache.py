@@ -0,0 +1,184 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from typing import Callable
+
+from django.conf import settings
+
+from automatic_crud.data_types import Instance
+from automatic_crud.page_cache import get_page_version
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+def get_report_cache_dir() -> str:
+    # directory where reports are cached, by default a folder in the temp directory
+    return getattr(
+                settings,'AUTOMATIC_CRUD_REPORT_CACHE_DIR',
+                os.path.join(tempfile.gettempdir(),'automatic_crud_reports')
+            )
+
+def build_report_cache_key(model: Instance,options: dict) -> str:
+    """
+    Return the cache key of a report, it contains the page version of model, increased by
+    signals when a register of model or of its relations is created, modified or deleted,
+    so cached reports never need to be invalidated and no query is run to build the key.
+    options must contain only the parsed options that change the report, not request.GET,
+    so parameters like the cache buster _ of jQuery do not create a new report.
+
+    """
+
+
+    value = "{0}|{1}|{2}|{3}".format(
+                model._meta.label_lower,get_page_version(model),
+                sorted((key,_normalize_option(value)) for key,value in options.items()),date.today()
+            )
+    return "{0}-{1}".format(model._meta.label_lower,hashlib.sha1(value.encode('utf-8')).hexdigest())
+
+def _normalize_option(value) -> str:
+    # dictionaries are sorted so the order of the parameters does not change the key
+    if isinstance(value,dict):
+        return str(sorted((key,str(item)) for key,item in value.items()))
+    return str(value)
+
+def _get_lock(key: str) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault(key,threading.Lock())
+
+@contextmanager
+def _file_lock(path: str,timeout: int,wait: float):
+    """
+    Lock between processes using a lock file created with O_EXCL, a lock file older
+    than timeout seconds is considered abandoned by a dead process and removed.
+    Yield True when the lock is acquired and False after waiting wait seconds.
+
+    """
+
+
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            descriptor = os.open(path,os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > timeout:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() >= deadline:
+                yield False
+                return
+            time.sleep(0.1)
+    try:
+        yield True
+    finally:
+        os.close(descriptor)
+        os.remove(path)
+
+def _remove_old_reports(directory: str,prefix: str,current: str):
+    """
+    Remove cached reports of a model not used in AUTOMATIC_CRUD_REPORT_CACHE_MAX_AGE
+    seconds (by default 1 day) and the least recently used ones when there are more than
+    AUTOMATIC_CRUD_REPORT_CACHE_MAX_FILES (by default 20), every option has its own report.
+    A removed report that is being sent can still be read, its file is already open.
+
+    """
+
+
+    max_age = getattr(settings,'AUTOMATIC_CRUD_REPORT_CACHE_MAX_AGE',86400)
+    max_files = getattr(settings,'AUTOMATIC_CRUD_REPORT_CACHE_MAX_FILES',20)
+    reports = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name != current and not name.endswith(('.lock','.tmp')):
+            path = os.path.join(directory,name)
+            try:
+                reports.append((os.path.getmtime(path),path))
+            except OSError:
+                pass
+    reports.sort(reverse = True)
+    now = time.time()
+    for index,(last_used,path) in enumerate(reports):
+        # the current report counts as one of max_files
+        if index >= max_files - 1 or now - last_used > max_age:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _open_file(path: str):
+    # the file is opened by its descriptor, so its name is not a path that can be removed later
+    return os.fdopen(os.open(path,os.O_RDONLY | getattr(os,'O_BINARY',0)),'rb')
+
+def _open_report(path: str):
+    # open a cached report and mark it as used, None if it does not exist or was removed
+    try:
+        report_file = _open_file(path)
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return report_file
+
+def _build_report(path: str,build: Callable):
+    # the report is written in a temporary file of this thread and moved to path when it is complete
+    temp_path = "{0}.{1}-{2}.tmp".format(path,os.getpid(),threading.get_ident())
+    try:
+        with open(temp_path,'wb') as temp_file:
+            build(temp_file)
+        # the report is opened before it is visible, so it can not be removed before
+        report_file = _open_file(temp_path)
+        os.replace(temp_path,path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return report_file
+
+def get_cached_report(key: str,extension: str,build: Callable):
+    """
+    Return the cached report for key opened in binary mode, if it does not exist it is
+    built calling build(file). Concurrent requests for the same key, in this process or
+    in other processes, wait for one build instead of starting their own, a request that
+    waits more than AUTOMATIC_CRUD_REPORT_WAIT_TIMEOUT seconds (by default 60) builds
+    the report itself.
+
+    """
+
+
+    directory = get_report_cache_dir()
+    os.makedirs(directory,exist_ok = True)
+    name = "{0}{1}".format(key,extension)
+    path = os.path.join(directory,name)
+    report_file = _open_report(path)
+    if report_file is not None:
+        return report_file
+
+    wait = getattr(settings,'AUTOMATIC_CRUD_REPORT_WAIT_TIMEOUT',60)
+    deadline = time.monotonic() + wait
+    lock = _get_lock(key)
+    locked = lock.acquire(timeout = wait)
+    try:
+        report_file = _open_report(path)
+        if report_file is None:
+            with _file_lock(
+                    "{0}.lock".format(path),getattr(settings,'AUTOMATIC_CRUD_REPORT_BUILD_TIMEOUT',600),
+                    max(deadline - time.monotonic(),0)
+                ):
+                report_file = _open_report(path)
+                if report_file is None:
+                    report_file = _build_report(path,build)
+    finally:
+        if locked:
+            lock.release()
+            with _locks_lock:
+                _locks.pop(key,None)
+
+    _remove_old_reports(directory,key.rsplit('-',1)[0] + '-',name)
+    return report_file
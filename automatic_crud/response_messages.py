@@ -7,10 +7,12 @@ def jr_response(message:str,error: str,statud_code: int) -> JsonResponse:
     response.status_code = statud_code
     return response
 
-def success_create_message(model: Instance) -> JsonResponse:
+def success_create_message(model: Instance,pk = None) -> JsonResponse:
     message = model().build_message(model.success_create_message)
     error = 'Ninguno'
-    return jr_response(message,error,201)
+    response = JR({'message':message,'error':error,'id':pk})
+    response.status_code = 201
+    return response
 
 def error_create_message(model: Instance, form:DjangoForm) -> JsonResponse:
     message = model().build_message(model.error_create_message)
@@ -35,4 +37,74 @@ def success_delete_message(model: Instance) -> JsonResponse:
 def not_found_message(model: Instance) -> JsonResponse:
     response = JR({'error':model.non_found_message})
     response.status_code = 400
-    return response
\ No newline at end of file
+    return response
+
+def import_message(model: Instance, created: int, errors: list) -> JsonResponse:
+    if errors:
+        message = model().build_message(model.error_import_message)
+        error = errors
+        status_code = 400
+    else:
+        message = model().build_message(model.success_import_message)
+        error = 'Ninguno'
+        status_code = 201
+    response = JR({'message':message,'error':error,'created':created})
+    response.status_code = status_code
+    return response
+
+def upsert_message(model: Instance, upserted: int, errors: list) -> JsonResponse:
+    if errors:
+        message = model().build_message(model.error_upsert_message)
+        error = errors
+        status_code = 400
+    else:
+        message = model().build_message(model.success_upsert_message)
+        error = 'Ninguno'
+        status_code = 200
+    response = JR({'message':message,'error':error,'upserted':upserted})
+    response.status_code = status_code
+    return response
+
+def file_required_message() -> JsonResponse:
+    response = JR({'error':'No se ha enviado ningún archivo.'})
+    response.status_code = 400
+    return response
+
+def invalid_file_message(created: int = 0) -> JsonResponse:
+    response = JR({'error':'El archivo enviado no es válido.','created':created})
+    response.status_code = 400
+    return response
+
+def invalid_parameter_message(parameter: str) -> JsonResponse:
+    response = JR({'error':'El parámetro {0} no es válido.'.format(parameter)})
+    response.status_code = 400
+    return response
+
+def expand_permission_message(relation: str) -> JsonResponse:
+    response = JR({'error':'No tiene los permisos para expandir la relación {0}.'.format(relation)})
+    response.status_code = 403
+    return response
+
+def invalid_sync_token_message() -> JsonResponse:
+    return invalid_parameter_message('since')
+
+def too_many_requests_message(retry_after: int) -> JsonResponse:
+    response = JR({'error':'Demasiadas peticiones, intente nuevamente en {0} segundos.'.format(retry_after)})
+    response.status_code = 429
+    response['Retry-After'] = str(retry_after)
+    return response
+
+def missing_dependency_message(package: str) -> JsonResponse:
+    response = JR({'error':'Se requiere instalar el paquete {0} para realizar esta acción.'.format(package)})
+    response.status_code = 501
+    return response
+
+def query_budget_exceeded_message() -> JsonResponse:
+    response = JR({'error':'La petición excedió el número máximo de consultas permitidas.'})
+    response.status_code = 503
+    return response
+
+def timeout_exceeded_message() -> JsonResponse:
+    response = JR({'error':'La petición excedió el tiempo máximo permitido.'})
+    response.status_code = 504
+    return response
@@ -0,0 +1,84 @@
+import random
+import threading
+
+from django.conf import settings
+
+_state = threading.local()
+
+STICKY_COOKIE_NAME = 'automatic_crud_primary'
+
+def get_read_your_writes_seconds() -> int:
+    # seconds that reads of a client go to the primary database after a write
+    return getattr(settings,'AUTOMATIC_CRUD_READ_YOUR_WRITES_SECONDS',5)
+
+def pin_primary(value: bool):
+    # send every read of the current thread to the write database of the model
+    _state.pinned = value
+
+def is_pinned() -> bool:
+    return getattr(_state,'pinned',False)
+
+def route_reads(value: bool):
+    # reads are sent to read_db only while a generated view runs in the current thread
+    _state.routed = value
+
+def is_routed() -> bool:
+    return getattr(_state,'routed',False)
+
+class RoutedIterator:
+    """
+    Iterator for streaming content generated after dispatch, every chunk is
+    generated with the routing of the request that created the response.
+    """
+
+    def __init__(self,iterable,pinned: bool):
+        self.iterator = iter(iterable)
+        self.pinned = pinned
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        route_reads(True)
+        pin_primary(self.pinned)
+        try:
+            return next(self.iterator)
+        finally:
+            route_reads(False)
+            pin_primary(False)
+
+class AutomaticCrudRouter:
+    """
+    Database router for models with read_db or write_db attributes,
+    add it to DATABASE_ROUTERS to send reads of generated views to replicas:
+
+        DATABASE_ROUTERS = ['automatic_crud.routers.AutomaticCrudRouter']
+
+    read_db can be an alias or a list of aliases, one of them is chosen randomly.
+    Only reads made by generated views go to read_db, reads of the admin, management
+    commands or signal receivers outside these views use the database of the next router.
+    Models without these attributes are left to the next router.
+
+    """
+
+    def db_for_read(self,model,**hints):
+        read_db = getattr(model,'read_db',None)
+        if read_db is None or not is_routed():
+            return None
+        if is_pinned():
+            return getattr(model,'write_db',None) or 'default'
+        if isinstance(read_db,(list,tuple)):
+            return random.choice(read_db)
+        return read_db
+
+    def db_for_write(self,model,**hints):
+        return getattr(model,'write_db',None)
+
+    def allow_relation(self,obj1,obj2,**hints):
+        # replicas have the same data of primary database, relations are always allowed
+        if getattr(obj1,'read_db',None) or getattr(obj2,'read_db',None):
+            return True
+        return None
+
+    def allow_migrate(self,db,app_label,model_name = None,**hints):
+        return None
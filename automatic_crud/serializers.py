@@ -0,0 +1,85 @@
+from django.core import serializers
+from django.core.serializers import json as json_serializer,python as python_serializer
+from django.db.models import QuerySet
+
+from automatic_crud.natural_keys import (
+    is_cacheable_foreign_key,load_natural_keys,natural_key_cache
+)
+
+class NaturalKeyCacheMixin:
+    """
+    Serializer mixin that reads natural keys of foreign keys to models with
+    cache_natural_key = True from the natural key cache, so related registers
+    are not fetched on every serialization.
+
+    """
+
+    def start_serialization(self):
+        self._natural_key_versions = {}
+        super().start_serialization()
+
+    def handle_fk_field(self,obj,field):
+        if not self.use_natural_foreign_keys or not is_cacheable_foreign_key(field):
+            return super().handle_fk_field(obj,field)
+
+        pk = getattr(obj,field.get_attname())
+        if pk is None:
+            self._current[field.name] = None
+            return
+        related_model = field.remote_field.model
+        version = self._natural_key_versions.setdefault(related_model,natural_key_cache.get_version(related_model))
+        values = load_natural_keys(
+                    related_model,version,[pk],
+                    loader = lambda pk: getattr(obj,field.name).natural_key()
+                )
+        self._current[field.name] = values[pk]
+
+class PythonSerializer(NaturalKeyCacheMixin,python_serializer.Serializer):
+    pass
+
+class JSONSerializer(NaturalKeyCacheMixin,json_serializer.Serializer):
+    pass
+
+SERIALIZERS = {
+    'python':PythonSerializer,
+    'json':JSONSerializer,
+}
+
+def _get_cacheable_fields(model,fields) -> list:
+    return [
+        field for field in model._meta.concrete_fields
+        if is_cacheable_foreign_key(field) and (fields is None or field.name in fields)
+    ]
+
+def serialize(format: str,queryset,**options) -> str:
+    """
+    Same as django.core.serializers.serialize, but natural keys of foreign keys to
+    models with cache_natural_key = True are read from the natural key cache. Keys not
+    found in cache are fetched with one query for each related model before serializing.
+
+    """
+
+
+    if format not in SERIALIZERS:
+        return serializers.serialize(format,queryset,**options)
+
+    model = queryset.model if isinstance(queryset,QuerySet) else None
+    if model is None and queryset:
+        queryset = list(queryset)
+        model = type(queryset[0])
+
+    if model is not None and options.get('use_natural_foreign_keys'):
+        cacheable_fields = _get_cacheable_fields(model,options.get('fields'))
+        if cacheable_fields:
+            queryset = list(queryset)
+            for field in cacheable_fields:
+                related_model = field.remote_field.model
+                pks = [getattr(obj,field.get_attname()) for obj in queryset]
+                load_natural_keys(
+                    related_model,natural_key_cache.get_version(related_model),
+                    [pk for pk in pks if pk is not None]
+                )
+
+    serializer = SERIALIZERS[format]()
+    serializer.serialize(queryset,**options)
+    return serializer.getvalue()
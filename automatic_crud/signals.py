@@ -0,0 +1,23 @@
+from typing import List
+
+from django.dispatch import Signal
+
+from automatic_crud.data_types import Instance
+
+# sent when registers of a model are changed without calling save() or delete(),
+# for example logical deletes or bulk_create, receivers get: action, count, pks
+model_changed = Signal()
+
+def send_model_changed(model: Instance,action: str,count: int,pks: List = None):
+    model_changed.send(sender = model,action = action,count = count,pks = pks or [])
+
+def get_created_pks(instances: List) -> List:
+    """
+    Return the pks of instances written with bulk_create, an empty list if the database
+    backend does not return them (for example SQLite with Django < 4.0), so receivers never get None
+    """
+
+    pks = [instance.pk for instance in instances]
+    if any(pk is None for pk in pks):
+        return []
+    return pks
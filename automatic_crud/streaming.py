@@ -0,0 +1,98 @@
+import uuid
+from typing import Iterator
+
+from django.core.exceptions import ImproperlyConfigured
+from django.template import loader
+
+class StreamedRows:
+    """
+    Lazy object_list of the page of a streamed list, {% if object_list %} and
+    {{ object_list|length }} run EXISTS and COUNT queries, registers are fetched
+    with iterator() so they are never cached in the queryset.
+
+    Parameters:
+        queryset                    queryset to be rendered.
+        chunk_size                  number of registers fetched from the database per query.
+
+    """
+
+    def __init__(self,queryset,chunk_size: int = 500):
+        self.queryset = queryset
+        self.chunk_size = chunk_size
+        self.__length = None
+
+    def __iter__(self):
+        return self.queryset.iterator(chunk_size = self.chunk_size)
+
+    def __len__(self):
+        if self.__length is None:
+            self.__length = self.queryset.count()
+        return self.__length
+
+    def __bool__(self):
+        if self.__length is not None:
+            return self.__length > 0
+        return self.queryset.exists()
+
+    def __reversed__(self):
+        # used by {% for ... reversed %}, the order of the queryset is reversed in the database
+        queryset = self.queryset if self.queryset.ordered else self.queryset.order_by('pk')
+        return queryset.reverse().iterator(chunk_size = self.chunk_size)
+
+    def __getitem__(self,index):
+        """
+        Return a register or a list of registers read with LIMIT and OFFSET, used by
+        lookups like rows.0 and filters like |first, |last and |slice, negative
+        indexes are counted from the end.
+        """
+
+        if isinstance(index,slice):
+            if index.step is not None and index.step < 0:
+                return list(self.queryset)[index]
+            start,stop,step = index.indices(len(self))
+            rows = list(self.queryset[start:stop]) if start < stop else []
+            return rows[::step]
+        if not isinstance(index,int):
+            raise TypeError('StreamedRows indices must be integers or slices')
+        if index < 0:
+            index += len(self)
+            if index < 0:
+                raise IndexError('StreamedRows index out of range')
+        return self.queryset[index]
+
+def stream_template(template_name: str,rows_template_name: str,context: dict,rows: StreamedRows,request = None) -> Iterator:
+    """
+    Render a list by parts with the public template API, the page template_name is rendered
+    once and must include {{ streamed_rows }} where the registers go (it can be left out
+    when there are no registers, for example in {% else %}), every chunk of
+    rows.chunk_size registers is rendered with rows_template_name, which receives the
+    chunk in object_list and the number of previous registers in offset.
+
+    The page is rendered before returning, so its errors are raised in the view,
+    the chunks are rendered while the response is sent.
+
+    """
+
+
+    marker = 'automatic-crud-streamed-rows-{0}'.format(uuid.uuid4().hex)
+    page = loader.get_template(template_name).render(dict(context,object_list = rows,streamed_rows = marker),request)
+    head,found,tail = page.partition(marker)
+    if not found:
+        # the page can leave out the registers only if there are none, for example in {% else %}
+        if rows:
+            raise ImproperlyConfigured('{0} must include {{{{ streamed_rows }}}} to be streamed.'.format(template_name))
+        return iter([page])
+    rows_template = loader.get_template(rows_template_name)
+    return _stream_rows(head,tail,rows_template,context,rows,request)
+
+def _stream_rows(head: str,tail: str,rows_template,context: dict,rows: StreamedRows,request) -> Iterator:
+    yield head
+    chunk,offset = [],0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= rows.chunk_size:
+            yield rows_template.render(dict(context,object_list = chunk,offset = offset),request)
+            chunk,offset = [],offset + len(chunk)
+    if chunk:
+        yield rows_template.render(dict(context,object_list = chunk,offset = offset),request)
+    yield tail
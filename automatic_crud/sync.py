@@ -0,0 +1,37 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+def build_sync_token(date_modified: datetime,pk: int) -> str:
+    # return an opaque token with the last (date_modified,id) sent to the client
+    value = "{0}|{1}".format(date_modified.isoformat(),pk)
+    return base64.urlsafe_b64encode(value.encode('utf-8')).decode('ascii')
+
+def parse_sync_token(token: str) -> Tuple:
+    """
+    Return a tuple (date_modified,pk) for a token generated by build_sync_token
+    or for a timestamp in ISO 8601 format, in this case pk will be 0.
+
+    Raise ValueError if the token is not valid.
+
+    """
+
+
+    date_modified,pk = parse_datetime(token.replace(' ','+')),0
+    if date_modified is None:
+        try:
+            value = base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8')
+            date_modified,pk = value.split('|')
+            date_modified,pk = parse_datetime(date_modified),int(pk)
+        except (ValueError,UnicodeError):
+            raise ValueError('Invalid sync token: {0}'.format(token))
+        if date_modified is None:
+            raise ValueError('Invalid sync token: {0}'.format(token))
+
+    if settings.USE_TZ and timezone.is_naive(date_modified):
+        date_modified = timezone.make_aware(date_modified,timezone.utc)
+    return date_modified,pk
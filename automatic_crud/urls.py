@@ -1,5 +1,14 @@
-from automatic_crud.register import register_models
+from django.urls import path
 
-urlpatterns = []
+from automatic_crud.dispatch import build_dispatch_urls,get_crud_patterns,get_url_mode
+from automatic_crud.profiling import ProfileReport
 
-urlpatterns += register_models()
+urlpatterns = [
+    path('profiles/<str:profile_id>/',ProfileReport.as_view(),name = 'automatic-crud-profile'),
+]
+
+# in dispatch mode the routes of every model are resolved by 2 routes
+if get_url_mode() == 'dispatch':
+    urlpatterns += build_dispatch_urls()
+else:
+    urlpatterns += get_crud_patterns()
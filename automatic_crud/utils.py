@@ -1,9 +1,20 @@
+import inspect
+import json
+from functools import reduce
+from operator import or_
 from typing import Dict,List
 
 from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q,QuerySet,UniqueConstraint
 from django.forms import models
+from django.utils import timezone
 
 from automatic_crud.data_types import Instance,DjangoForm
+from automatic_crud.events import set_changed_fields
+from automatic_crud.serializers import serialize
+from automatic_crud.signals import send_model_changed
+from automatic_crud.validators import get_model_validator
 
 def get_model(__app_name:str,__model_name:str) -> Instance:
     # return the model corresponding to the application name and model name sent
@@ -16,6 +27,114 @@ def get_object(model: Instance,pk: int):
         return instance
     return None
 
+def logic_delete_object(model: Instance,pk: int) -> int:
+    # set model_state = False, date_modified is updated too because update() skip auto_now fields
+    now = timezone.now()
+    count = model.objects.filter(id = pk,model_state = True).update(
+                model_state = False,date_modified = now,date_deleted = now
+            )
+    send_model_changed(model,'logic_delete',count,[pk])
+    return count
+
+def get_unique_fields(model: Instance) -> List:
+    """
+    Return the fields used to match registers in upserts: model.upsert_unique_fields,
+    the first unique field or the first unique constraint of the model
+    
+    """
+
+
+    if model.upsert_unique_fields:
+        return list(model.upsert_unique_fields)
+    for field in model._meta.concrete_fields:
+        if field.unique and not field.primary_key:
+            return [field.name]
+    for fields in model._meta.unique_together:
+        return list(fields)
+    for constraint in model._meta.constraints:
+        if getattr(constraint,'fields',None) and getattr(constraint,'condition',None) is None:
+            return list(constraint.fields)
+    return []
+
+def has_unique_constraint(model: Instance,fields: List) -> bool:
+    """
+    Return True if the database has a unique constraint on exactly fields: a unique field,
+    a unique_together or a UniqueConstraint without condition, required by upserts
+    """
+
+    fields = set(fields)
+    if len(fields) == 1:
+        try:
+            field = model._meta.get_field(next(iter(fields)))
+        except FieldDoesNotExist:
+            return False
+        if getattr(field,'unique',False):
+            return True
+    if any(set(together) == fields for together in model._meta.unique_together):
+        return True
+    return any(
+        isinstance(constraint,UniqueConstraint) and set(constraint.fields) == fields
+        and constraint.condition is None
+        for constraint in model._meta.constraints
+    )
+
+def bulk_upsert(model: Instance,instances: List,unique_fields: List,update_fields: List) -> List:
+    """
+    Create or update instances matching registers by unique_fields, return the list of
+    instances written. Uses bulk_create(update_conflicts = True) when Django supports it,
+    otherwise existing registers are fetched in one query and updated with bulk_update.
+
+    """
+
+
+    unique_attnames = [model._meta.get_field(field).attname for field in unique_fields]
+    # the last instance sent wins if a key is repeated
+    instances = list({
+        tuple(getattr(instance,attname) for attname in unique_attnames):instance for instance in instances
+    }.values())
+
+    if 'update_conflicts' in inspect.signature(QuerySet.bulk_create).parameters:
+        # registers are matched by unique_fields, pks of existing registers are not inserted
+        for instance in instances:
+            instance.pk = None
+        return model.objects.bulk_create(
+                    instances,update_conflicts = True,
+                    unique_fields = unique_fields,update_fields = update_fields
+                )
+
+    keys = [tuple(getattr(instance,attname) for attname in unique_attnames) for instance in instances]
+    conditions = reduce(or_,[Q(**dict(zip(unique_attnames,key))) for key in keys])
+    existing = {
+        tuple(values[:-1]):values[-1]
+        for values in model.objects.filter(conditions).values_list(*unique_attnames,'id')
+    }
+
+    now = timezone.now()
+    new_instances,old_instances = [],[]
+    for key,instance in zip(keys,instances):
+        if key in existing:
+            instance.pk = existing[key]
+            instance.date_modified = now
+            old_instances.append(instance)
+        else:
+            new_instances.append(instance)
+
+    model.objects.bulk_create(new_instances)
+    model.objects.bulk_update(old_instances,update_fields)
+    return new_instances + old_instances
+
+def serialize_objects(objects,fields: List,**options) -> List:
+    """
+    Return a list of dictionaries with pk and fields for every instance sended,
+    foreign keys are serialized with natural keys, options are sent to the serializer,
+    with use_natural_primary_keys = True pk is not included for models with natural_key()
+
+    """
+
+
+    data = serialize('python',objects,fields = fields,use_natural_foreign_keys = True,**options)
+    return [{key:item[key] for key in ('pk','fields') if key in item} for item in data]
+
 def get_model_fields_names(__model: Instance) -> List:
     # return a list of field names from a model
     return [name for name,_ in models.fields_for_model(__model).items()]
@@ -37,6 +156,35 @@ def get_form(form: DjangoForm,model: Instance) -> DjangoForm:
     else:
         return models.modelform_factory(model = model,exclude = ('model_state',))
 
+def is_json_request(request) -> bool:
+    return request.content_type == 'application/json'
+
+def load_json_body(request) -> Dict:
+    # return the JSON object sent in the body, raise ValueError if it is not a JSON object
+    data = json.loads(request.body or b'{}')
+    if not isinstance(data,dict):
+        raise ValueError('The body must be a JSON object')
+    return data
+
+def get_json_form(form: DjangoForm,model: Instance,data: Dict,instance = None):
+    """
+    Return a form for data sent as JSON, if a Django Form is indicated it is used,
+    otherwise the data is validated by the compiled validator of the model
+
+    """
+
+
+    if form is None:
+        validator = get_model_validator(model)
+        if validator is not None:
+            return validator.validate(data,instance)
+    return get_form(form,model)(data,instance = instance)
+
+def save_form(form: DjangoForm):
+    # save a form, its changed fields are sent in the change event of the register
+    set_changed_fields(form.instance,form.changed_data)
+    return form.save()
+
 def build_template_name(template_name: str,model: Instance,action:str) -> str:
     """
     Build template name with app label from model, model name and action(list,create,update,detail)
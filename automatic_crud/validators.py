@@ -0,0 +1,120 @@
+from functools import lru_cache
+from typing import Dict
+
+from django.core.exceptions import NON_FIELD_ERRORS,ValidationError
+from django.db import models
+
+from automatic_crud.data_types import Instance
+
+class ModelValidator:
+    """
+    Validator compiled once per model from _meta, form fields are built once and
+    reused, so a JSON body is validated without building a ModelForm per request.
+
+    Fields and error messages are the same of the ModelForm created by get_form,
+    validate() returns an object with the ModelForm interface: is_valid(), errors and save().
+
+    """
+
+    def __init__(self,model: Instance):
+        self.model = model
+        self.fields = []
+        self.many_to_many = []
+        opts = model._meta
+        for field in list(opts.concrete_fields) + list(opts.private_fields) + list(opts.many_to_many):
+            if not getattr(field,'editable',False) or field.name == 'model_state':
+                continue
+            form_field = field.formfield()
+            if form_field is None:
+                continue
+            if field.many_to_many:
+                self.many_to_many.append((field,form_field))
+            else:
+                self.fields.append((field,form_field))
+        self.names = {field.name for field,_ in self.fields + self.many_to_many}
+
+    def validate(self,data: Dict,instance = None):
+        return ValidatedData(self,data,instance)
+
+class ValidatedData:
+    """
+    Result of ModelValidator.validate, on updates only the fields sent are validated
+    and modified, the rest of fields keep their values.
+    """
+
+    def __init__(self,validator: ModelValidator,data: Dict,instance = None):
+        self.validator = validator
+        self.data = data
+        self.partial = instance is not None
+        self.instance = instance if instance is not None else validator.model()
+        self.cleaned_data = {}
+        self.changed_data = []
+        self.__errors = None
+
+    @property
+    def errors(self) -> Dict:
+        if self.__errors is None:
+            self.full_clean()
+        return self.__errors
+
+    def is_valid(self) -> bool:
+        return not self.errors
+
+    def __add_error(self,name: str,messages):
+        self.__errors.setdefault(name,[]).extend(messages)
+
+    def full_clean(self):
+        self.__errors = {}
+        excluded = []
+        for field,form_field in self.validator.fields + self.validator.many_to_many:
+            if field.name not in self.data and (self.partial or field.has_default()):
+                excluded.append(field.name)
+                continue
+            try:
+                self.cleaned_data[field.name] = form_field.clean(self.data.get(field.name))
+            except ValidationError as error:
+                self.__add_error(field.name,error.messages)
+                excluded.append(field.name)
+
+        self.changed_data = []
+        for field,_ in self.validator.fields:
+            if field.name in self.cleaned_data:
+                value = field.value_from_object(self.instance)
+                field.save_form_data(self.instance,self.cleaned_data[field.name])
+                if field.value_from_object(self.instance) != value or not self.partial:
+                    self.changed_data.append(field.name)
+        self.changed_data += [field.name for field,_ in self.validator.many_to_many if field.name in self.cleaned_data]
+
+        excluded += [field.name for field in self.validator.model._meta.fields if not field.editable]
+        try:
+            self.instance.full_clean(exclude = excluded,validate_unique = False)
+        except ValidationError as error:
+            self.__add_model_errors(error)
+        try:
+            self.instance.validate_unique(exclude = excluded)
+        except ValidationError as error:
+            self.__add_model_errors(error)
+
+    def __add_model_errors(self,error: ValidationError):
+        # errors of fields that are not validated by the form are non field errors
+        for name,messages in error.message_dict.items():
+            self.__add_error(name if name in self.validator.names else NON_FIELD_ERRORS,messages)
+
+    def save(self):
+        if self.errors:
+            raise ValueError('The data could not be saved because it did not validate.')
+        self.instance.save()
+        for field,_ in self.validator.many_to_many:
+            if field.name in self.cleaned_data:
+                field.save_form_data(self.instance,self.cleaned_data[field.name])
+        return self.instance
+
+@lru_cache(maxsize = None)
+def get_model_validator(model: Instance) -> ModelValidator:
+    """
+    Return the compiled validator of model, None if model has file fields because
+    files can not be sent in a JSON body.
+    """
+    if any(isinstance(field,models.FileField) for field in model._meta.concrete_fields):
+        return None
+    return ModelValidator(model)
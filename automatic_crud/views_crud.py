@@ -5,12 +5,19 @@ from django.views.generic import (
     ListView,View
 )
 from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
 
 from automatic_crud.generics import BaseCrudMixin
-from automatic_crud.utils import get_object,get_form,build_template_name
+from automatic_crud.page_cache import cached_page,get_page_version
+from automatic_crud.response_messages import invalid_parameter_message
+from automatic_crud.streaming import StreamedRows,stream_template
+from automatic_crud.utils import get_object,get_form,build_template_name,logic_delete_object,save_form
 
 class BaseList(BaseCrudMixin,ListView):
 
+    def is_heavy_request(self) -> bool:
+        return not self.model.normal_pagination
+
     def dispatch(self, request, *args, **kwargs):
         # login required validation
         validation_login_required,response = self.validate_login_required()
@@ -25,23 +32,48 @@ class BaseList(BaseCrudMixin,ListView):
         return super().dispatch(request, *args, **kwargs)    
 
     def get_queryset(self):
-        return self.model.objects.filter(model_state = True)
+        return self.model.objects.filter(model_state = True).filter(**self.filters)
+
+    def exceeds_unpaginated_rows(self,data) -> bool:
+        """
+        Return True if data has more registers than model.max_unpaginated_rows,
+        only max_unpaginated_rows + 1 ids are fetched
+        """
+
+        limit = self.model.max_unpaginated_rows
+        if limit is None:
+            return False
+        return len(data.values_list('id',flat = True)[:limit + 1]) > limit
 
     def get_context_data(self, **kwargs):
         context = {}
         data = self.get_queryset()
         
-        if self.model.normal_pagination:
-            paginator = Paginator(data,self.model.values_for_page)
+        if self.model.normal_pagination or self.exceeds_unpaginated_rows(data):
+            paginator = Paginator(data.order_by('id'),self.model.values_for_page)
             page_number = self.request.GET.get('page','1')
             data = paginator.get_page(page_number)
         
         context['object_list'] = data
+        if self.model.cache_pages:
+            context['cache_version'] = get_page_version(self.model)
         return context
 
     def get(self,request,*args,**kwargs):
         self.template_name = build_template_name(self.template_name,self.model,'list')
-        return render(request,self.template_name,self.get_context_data())
+        try:
+            self.filters = self.get_filters()
+        except ValueError as error:
+            return invalid_parameter_message(str(error))
+
+        if self.model.streaming_list and not self.model.normal_pagination:
+            rows = StreamedRows(self.get_queryset(),self.model.streaming_chunk_size)
+            rows_template_name = build_template_name(self.model.list_rows_template,self.model,'list_rows')
+            return StreamingHttpResponse(stream_template(self.template_name,rows_template_name,{},rows,request))
+        return cached_page(
+                    request,self.model,'list:{0}:{1}'.format(request.GET.get('page','1'),sorted(self.filters.items())),
+                    lambda: render(request,self.template_name,self.get_context_data())
+                )
 
 class BaseCreate(BaseCrudMixin,CreateView):
     
@@ -73,7 +105,7 @@ class BaseCreate(BaseCrudMixin,CreateView):
             form = self.form_class(request.POST,request.FILES)     
         
         if form.is_valid():
-            form.save()
+            save_form(form)
             return redirect(self.success_url)
         else:
             form = self.form_class()
@@ -99,11 +131,16 @@ class BaseDetail(BaseCrudMixin,DetailView):
     def get_context_data(self, **kwargs):
         context = {}
         context['object'] = get_object(self.model,self.kwargs['pk'])
+        if self.model.cache_pages:
+            context['cache_version'] = get_page_version(self.model)
         return context  
 
     def get(self,request,form = None,*args,**kwargs):
         self.template_name = build_template_name(self.template_name,self.model,'detail')
-        return render(request,self.template_name,self.get_context_data())
+        return cached_page(
+                    request,self.model,'detail:{0}'.format(self.kwargs['pk']),
+                    lambda: render(request,self.template_name,self.get_context_data())
+                )
 
 class BaseUpdate(BaseCrudMixin,UpdateView):
 
@@ -123,6 +160,9 @@ class BaseUpdate(BaseCrudMixin,UpdateView):
     def get_context_data(self, **kwargs):
         context = {}
         context['object'] = get_object(self.model,self.kwargs['pk'])
+        # the form has the CSRF token of the user, only fragments can be cached with cache_version
+        if self.model.cache_pages:
+            context['cache_version'] = get_page_version(self.model)
         return context    
 
     def get(self,request,form = None,*args,**kwargs):
@@ -149,7 +189,7 @@ class BaseUpdate(BaseCrudMixin,UpdateView):
             else:
                 form = self.form_class(request.POST,request.FILES, instance = instance)   
             if form.is_valid():
-                form.save()
+                save_form(form)
                 return redirect(self.success_url)
             else:
                 form = self.form_class()
@@ -193,7 +233,7 @@ class BaseLogicDelete(BaseCrudMixin,DeleteView):
         instance = get_object(self.model,self.kwargs['pk'])
         
         if instance is not None:
-            self.model.objects.filter(id = self.kwargs['pk']).update(model_state = False)
+            logic_delete_object(self.model,self.kwargs['pk'])
             return redirect(self.success_url)        
         else:
             return redirect(self.success_url)
\ No newline at end of file
@@ -1,19 +1,45 @@
+import copy
 import json
 import ast
-
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django import forms
+from django.core.exceptions import PermissionDenied,ValidationError
+from django.db import IntegrityError,router,transaction
+from django.db.models import Avg,Count,Max,Min,Q,Sum
 from django.shortcuts import render
-from django.http import HttpResponse,JsonResponse as JSR
-from django.core.serializers import serialize
+from django.http import HttpResponse,JsonResponse as JSR,StreamingHttpResponse
+from django.utils import timezone
 from django.views.generic import View
 
+from automatic_crud.counts import get_count
+from automatic_crud.events import get_broker,get_channel
+from automatic_crud.expand import expand_queryset
 from automatic_crud.generics import BaseCrud
-from automatic_crud.utils import get_object,get_form
+from automatic_crud.signals import get_created_pks,send_model_changed
+from automatic_crud.utils import (
+    get_object,get_form,logic_delete_object,serialize_objects,
+    get_unique_fields,has_unique_constraint,bulk_upsert,is_json_request,load_json_body,get_json_form,save_form
+)
 from automatic_crud.response_messages import *
+from automatic_crud.serializers import serialize
+from automatic_crud.sync import build_sync_token,parse_sync_token
 
 class BaseListAJAX(BaseCrud):
+    compressible = True
+
+    def is_heavy_request(self) -> bool:
+        return not self.model.server_side
 
     def get_queryset(self):
-        return self.model.objects.filter(model_state = True).select_related().prefetch_related()
+        return self.select_related(
+                self.model.objects.filter(model_state = True).filter(**self.filters)
+            ).prefetch_related()
 
     def get_server_side_queryset(self):
         """
@@ -22,9 +48,13 @@ class BaseListAJAX(BaseCrud):
 
         """
 
-        return self.model.objects.filter(
-                model_state = True
-            ).select_related().prefetch_related().order_by(f"{self.request.GET.get('order_by','id')}")
+        return self.select_related(
+                self.model.objects.filter(model_state = True).filter(**self.filters)
+            ).prefetch_related().order_by(f"{self.request.GET.get('order_by','id')}")
+
+    def get_page(self):
+        # return (start,end) sent in request.GET, end is the number of registers of the page
+        return int(self.request.GET.get('start','0')),int(self.request.GET.get('end','10'))
 
     def server_side(self):
         """
@@ -39,16 +69,20 @@ class BaseListAJAX(BaseCrud):
 
             {
                 'length': # amount of records,
+                'exact': # False if length is an estimate,
                 'objects': # list of records
             }
 
+        length is calculated with the count_strategy of the model.
+
+        Registers can be filtered with the parameters of automatic_crud.filters.parse_filters.
+
         For more information see: https://www.youtube.com/watch?v=89Ur7GCyLxI
 
         """
 
 
-        start = int(self.request.GET.get('start','0'))
-        end = int(self.request.GET.get('end','10'))
+        start,end = self.get_page()
 
         object_list = []
         
@@ -57,7 +91,8 @@ class BaseListAJAX(BaseCrud):
         temp_data = ast.literal_eval(temp_data)
         temp_data = json.loads(temp_data['data'])
         
-        for index,instance in enumerate(temp_data[start:start+end],start):
+        # self.data only contains the registers of the page
+        for index,instance in enumerate(temp_data,start):
             del instance['model']
             for field in instance['fields']:
                 if field in self.model.exclude_fields:
@@ -66,8 +101,10 @@ class BaseListAJAX(BaseCrud):
             instance['index'] = index + 1
             object_list.append(instance)   
         
+        length,exact = get_count(self.model,self.get_server_side_queryset(),bool(self.filters))
         self.data = {
-            'length': self.get_server_side_queryset().count(),
+            'length': length,
+            'exact': exact,
             'objects':object_list
         }
         self.data = json.dumps(self.data)
@@ -110,15 +147,26 @@ class BaseListAJAX(BaseCrud):
         if validation_permissions:
             return response
 
+        try:
+            self.filters = self.get_filters()
+        except ValueError as error:
+            return invalid_parameter_message(str(error))
+
+        try:
+            tree = self.get_expand_tree()
+        except ValueError:
+            return invalid_parameter_message('expand')
+        except PermissionDenied as error:
+            return expand_permission_message(str(error))
+
         if self.model.server_side:
-            self.data = serialize('json',self.get_server_side_queryset(),
-                        fields = self.get_fields_for_model(),
-                        use_natural_foreign_keys = True)
+            start,end = self.get_page()
+            self.data = self.serialize_data(
+                            expand_queryset(self.get_server_side_queryset(),tree)[start:start + end],tree
+                        )
             self.server_side()
         else:            
-            self.data = serialize('json',self.get_queryset(),
-                                    fields = self.get_fields_for_model(),
-                                    use_natural_foreign_keys = True)
+            self.data = self.serialize_data(expand_queryset(self.get_queryset(),tree),tree)
             self.normalize_data()
         return HttpResponse(self.data, content_type="application/json")
 
@@ -139,11 +187,17 @@ class BaseCreateAJAX(BaseCrud):
         if validation_permissions:
             return response
         
-        self.form_class = get_form(form,self.model)
-        form = self.form_class(request.POST,request.FILES)        
+        if is_json_request(request):
+            try:
+                form = get_json_form(form,self.model,load_json_body(request))
+            except ValueError:
+                return invalid_parameter_message('body')
+        else:
+            self.form_class = get_form(form,self.model)
+            form = self.form_class(request.POST,request.FILES)
         if form.is_valid():
-            form.save()
-            return success_create_message(self.model)
+            instance = save_form(form)
+            return success_create_message(self.model,instance.pk)
         return error_create_message(self.model,form)
 
 class BaseDetailAJAX(BaseCrud):
@@ -178,14 +232,18 @@ class BaseDetailAJAX(BaseCrud):
         if validation_permissions:
             return response
         
-        self.data = get_object(self.model,self.kwargs['pk'])        
+        try:
+            tree = self.get_expand_tree()
+        except ValueError:
+            return invalid_parameter_message('expand')
+        except PermissionDenied as error:
+            return expand_permission_message(str(error))
+
+        self.data = expand_queryset(
+                        self.model.objects.filter(id = self.kwargs['pk'],model_state = True),tree
+                    ).first()
         if self.data is not None:
-            self.data = serialize(
-                            'json',[self.data,],
-                            fields = self.get_fields_for_model(),
-                            use_natural_foreign_keys = True,
-                            use_natural_primary_keys = True
-                        )
+            self.data = self.serialize_data([self.data,],tree,use_natural_primary_keys = True)
             self.normalize_data()
             return HttpResponse(self.data, content_type="application/json")
         return not_found_message(self.model)
@@ -248,12 +306,18 @@ class BaseUpdateAJAX(BaseCrud):
         if validation_permissions:
             return response
      
-        self.form_class = get_form(form,self.model)        
         instance = get_object(self.model,self.kwargs['pk'])        
         if instance is not None:
-            form = self.form_class(request.POST,request.FILES,instance = instance)            
+            if is_json_request(request):
+                try:
+                    form = get_json_form(form,self.model,load_json_body(request),instance)
+                except ValueError:
+                    return invalid_parameter_message('body')
+            else:
+                self.form_class = get_form(form,self.model)
+                form = self.form_class(request.POST,request.FILES,instance = instance)
             if form.is_valid():
-                form.save()
+                save_form(form)
                 return success_update_message(self.model)        
             else:
                 return error_update_message(self.model,form)
@@ -299,6 +363,479 @@ class BaseLogicDeleteAJAX(BaseCrud):
 
         instance = get_object(self.model,self.kwargs['pk'])        
         if instance is not None:
-            self.model.objects.filter(id = self.kwargs['pk']).update(model_state = False)
+            logic_delete_object(self.model,self.kwargs['pk'])
             return success_delete_message(self.model)
-        return not_found_message(self.model)
\ No newline at end of file
+        return not_found_message(self.model)
+
+class BaseChangesAJAX(BaseCrud):
+    """
+    Return the registers created, modified or logically deleted after the token sent
+    in request.GET['since'], the token can be a timestamp in ISO 8601 format or the
+    'next' value of a previous response.
+
+    Registers are paged with a keyset over (date_modified,id), so the cost depends
+    on the amount of changes and not on the size of the table.
+
+    date_modified is set before the transaction of the write is committed, so registers
+    modified in the last model.sync_safety_lag seconds are sent in a later request, writes
+    committed more than sync_safety_lag seconds after their save can still be skipped.
+
+    The response structure is:
+
+        {
+            'objects': # list of created or modified records,
+            'deleted': # list of ids of logically deleted records,
+            'next': # token to be sent in the next request,
+            'has_more': # True if there are more changes after next
+        }
+
+    """
+
+    def get_queryset(self):
+        # registers modified in the last sync_safety_lag seconds may belong to uncommitted transactions
+        until = timezone.now() - timedelta(seconds = self.model.sync_safety_lag)
+        return self.select_related(
+                    self.model.objects.filter(date_modified__lte = until)
+                ).order_by('date_modified','id')
+
+    def get(self,request,model,*args,**kwargs):
+        self.model = model
+
+        # login required validation
+        validation_login_required,response = self.validate_login_required()
+        if validation_login_required:
+            return response
+        
+        # permission required validation
+        validation_permissions,response = self.validate_permissions()
+        if validation_permissions:
+            return response
+
+        since = request.GET.get('since')
+        queryset = self.get_queryset()
+        if since:
+            try:
+                date_modified,pk = parse_sync_token(since)
+            except ValueError:
+                return invalid_sync_token_message()
+            queryset = queryset.filter(
+                            Q(date_modified__gt = date_modified) | Q(date_modified = date_modified,id__gt = pk)
+                        )
+        else:
+            # first synchronization, deleted records are not needed
+            queryset = queryset.filter(model_state = True)
+
+        try:
+            limit = int(request.GET.get('limit',self.model.sync_page_size))
+        except ValueError:
+            return invalid_parameter_message('limit')
+        if limit < 1:
+            return invalid_parameter_message('limit')
+        limit = min(limit,self.model.sync_page_size)
+
+        page = list(queryset[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        if page:
+            since = build_sync_token(page[-1].date_modified,page[-1].pk)
+
+        self.data = {
+            'objects': serialize_objects(
+                            [instance for instance in page if instance.model_state],
+                            self.get_fields_for_model()
+                        ),
+            'deleted': [instance.pk for instance in page if not instance.model_state],
+            'next': since,
+            'has_more': has_more
+        }
+        return JSR(self.data)
+
+
+class BaseAggregateAJAX(BaseCrud):
+    """
+    Return aggregates of active registers calculated by the database in one query.
+
+    The follow attributes can be sent in request.GET:
+        group_by: fields separated by commas, must be in model.aggregate_group_by_fields
+        aggregate: aggregates separated by commas with the format field__function, 
+                    function must be in model.aggregate_functions, by default id__count
+
+    Example: ?group_by=category&aggregate=id__count,price__sum
+
+    The response structure is:
+
+        {
+            'objects': # list of groups with their aggregates
+        }
+
+    """
+
+    functions = {'count':Count,'sum':Sum,'avg':Avg,'min':Min,'max':Max}
+    numeric_functions = ('sum','avg')
+    numeric_types = (
+        'AutoField','BigAutoField','SmallAutoField','IntegerField','BigIntegerField',
+        'SmallIntegerField','PositiveIntegerField','PositiveBigIntegerField',
+        'PositiveSmallIntegerField','FloatField','DecimalField','DurationField'
+    )
+
+    def get_concrete_fields(self):
+        """
+        Return concrete fields of model excluding exclude_fields of model
+        """
+        fields = self.get_fields_for_model()
+        return {field.name:field for field in self.model._meta.concrete_fields if field.name in fields}
+
+    def get_group_by(self):
+        group_by = [field for field in self.request.GET.get('group_by','').split(',') if field]
+        allowed = self.model.aggregate_group_by_fields
+        if allowed is None:
+            allowed = self.get_concrete_fields()
+        for field in group_by:
+            if field not in allowed:
+                raise ValueError('group_by')
+        return group_by
+
+    def get_aggregates(self):
+        fields = self.get_concrete_fields()
+        aggregates = {}
+        for alias in self.request.GET.get('aggregate','id__count').split(','):
+            field_name,_,function = alias.rpartition('__')
+            if function not in self.model.aggregate_functions or function not in self.functions:
+                raise ValueError('aggregate')
+            if field_name != 'id' and field_name not in fields:
+                raise ValueError('aggregate')
+            if function in self.numeric_functions:
+                field = self.model._meta.get_field(field_name)
+                if field.get_internal_type() not in self.numeric_types:
+                    raise ValueError('aggregate')
+            aggregates[alias] = self.functions[function](field_name)
+        return aggregates
+
+    def get_queryset(self):
+        return self.model.objects.filter(model_state = True)
+
+    def get(self,request,model,*args,**kwargs):
+        self.model = model
+
+        # login required validation
+        validation_login_required,response = self.validate_login_required()
+        if validation_login_required:
+            return response
+        
+        # permission required validation
+        validation_permissions,response = self.validate_permissions()
+        if validation_permissions:
+            return response
+
+        try:
+            group_by = self.get_group_by()
+            aggregates = self.get_aggregates()
+        except ValueError as error:
+            return invalid_parameter_message(str(error))
+
+        if group_by:
+            objects = list(self.get_queryset().values(*group_by).annotate(**aggregates).order_by(*group_by))
+        else:
+            objects = [self.get_queryset().aggregate(**aggregates)]
+
+        self.data = {'objects':objects}
+        return JSR(self.data)
+
+
+class BaseBatchDetailAJAX(BaseCrud):
+    """
+    Return many active registers in one request with one query, the ids are sent
+    separated by commas in request.GET['ids'] or request.POST['ids'], or as a list
+    in a JSON body {"ids": [1,2,3]}. At most model.max_batch_size ids can be sent.
+
+    The response structure is:
+
+        {
+            'objects': {
+                '1': {'pk': 1, 'fields': {...}},
+                '7': {'error': # non_found_message of model}
+            }
+        }
+
+    """
+
+    def get_ids(self):
+        if self.request.method == 'POST' and self.request.content_type == 'application/json':
+            ids = json.loads(self.request.body or b'{}').get('ids',[])
+        else:
+            ids = self.request.POST.get('ids') or self.request.GET.get('ids','')
+        if isinstance(ids,str):
+            ids = [value for value in ids.split(',') if value.strip()]
+        ids = list(dict.fromkeys(int(value) for value in ids))
+        if not ids or len(ids) > self.model.max_batch_size:
+            raise ValueError('ids')
+        return ids
+
+    def get_queryset(self,ids):
+        return self.select_related(self.model.objects.filter(id__in = ids,model_state = True))
+
+    def get(self,request,model,*args,**kwargs):
+        self.model = model
+
+        # login required validation
+        validation_login_required,response = self.validate_login_required()
+        if validation_login_required:
+            return response
+        
+        # permission required validation
+        validation_permissions,response = self.validate_permissions()
+        if validation_permissions:
+            return response
+
+        try:
+            ids = self.get_ids()
+        except (ValueError,TypeError,AttributeError):
+            return invalid_parameter_message('ids')
+
+        objects = {
+            str(instance['pk']):instance
+            for instance in serialize_objects(self.get_queryset(ids),self.get_fields_for_model())
+        }
+        self.data = {
+            'objects': {
+                str(pk):objects.get(str(pk),{'error':self.model.non_found_message}) for pk in ids
+            }
+        }
+        return JSR(self.data)
+
+    def post(self,request,model,*args,**kwargs):
+        return self.get(request,model,*args,**kwargs)
+
+
+class BaseUpsertAJAX(BaseCrud):
+    """
+    Create or update many registers in one request, registers are matched by
+    model.upsert_unique_fields or by the first unique field or constraint of model.
+
+    The registers are sent as a list in a JSON body, [{...},{...}] or {"objects": [{...}]},
+    they are validated with the create form of model and written by batches of
+    model.upsert_batch_size with a few statements per batch. Every batch is committed
+    in its own transaction, a batch rejected by the database is reported in errors
+    with the indexes of its registers and the other batches are still written.
+
+    The response structure is:
+
+        {
+            'message': # success_upsert_message or error_upsert_message of model,
+            'error': # 'Ninguno' or list of errors by index of register,
+            'upserted': # amount of registers created or updated
+        }
+
+    """
+
+    def get_existing(self,rows,unique_fields):
+        """
+        Return the registers that match the key of every row, or None, with one query,
+        rows of existing registers are validated as updates of them, so their key does
+        not fail the unique validation. Logically deleted registers are matched too.
+        """
+
+        fields = [self.model._meta.get_field(name) for name in unique_fields]
+        keys = []
+        for row in rows:
+            try:
+                key = tuple(field.to_python(row.get(field.name)) for field in fields)
+            except (ValidationError,AttributeError):
+                key = None
+            keys.append(key if key is not None and None not in key else None)
+
+        existing = {}
+        lookups = [Q(**{field.attname:value for field,value in zip(fields,key)}) for key in set(keys) if key is not None]
+        if lookups:
+            for instance in self.model.objects.filter(reduce(or_,lookups)):
+                existing[tuple(getattr(instance,field.attname) for field in fields)] = instance
+        # every row gets its own copy, a key can be repeated in the rows
+        return [copy.copy(existing[key]) if key in existing else None for key in keys]
+
+    def get_update_fields(self,form_class,unique_fields):
+        concrete_fields = {field.name for field in self.model._meta.concrete_fields if not field.primary_key}
+        update_fields = [
+            field for field in form_class.base_fields
+            if field in concrete_fields and field not in unique_fields
+        ]
+        return update_fields + [field for field in ('date_modified',) if field not in update_fields]
+
+    def set_model_state(self,instance,row) -> bool:
+        """
+        Set model_state of instance if it is sent in row and the form does not include it,
+        return True if it must be written. Registers are never reactivated if model_state
+        is not sent.
+        """
+
+        if not isinstance(row,dict) or 'model_state' not in row:
+            return False
+        instance.model_state = forms.BooleanField(required = False).to_python(row['model_state'])
+        return True
+
+    def write_batch(self,batch,states,unique_fields,update_fields,indexes,errors):
+        """
+        Write a batch in its own transaction and return the number of registers written,
+        registers with model_state in states[index] also update model_state. If the
+        database rejects the batch the indexes of its registers are added to errors
+        """
+
+        try:
+            with transaction.atomic(using = router.db_for_write(self.model)):
+                instances = []
+                for state in (False,True):
+                    group = [instance for instance,sent in zip(batch,states) if sent is state]
+                    if group:
+                        fields = update_fields + ['model_state'] if state else update_fields
+                        instances += bulk_upsert(self.model,group,unique_fields,fields)
+        except IntegrityError as error:
+            errors.append({'indexes':indexes,'errors':str(error)})
+            return 0
+        send_model_changed(self.model,'upsert',len(instances),get_created_pks(instances))
+        return len(instances)
+
+    def post(self,request,model,form = None,*args,**kwargs):
+        self.model = model
+
+        # login required validation
+        validation_login_required,response = self.validate_login_required()
+        if validation_login_required:
+            return response
+        
+        # permission required validation
+        validation_permissions,response = self.validate_permissions()
+        if validation_permissions:
+            return response
+
+        # ON CONFLICT needs a unique constraint on the key, without it the database raises an error
+        unique_fields = get_unique_fields(self.model)
+        if not unique_fields or not has_unique_constraint(self.model,unique_fields):
+            return invalid_parameter_message('upsert_unique_fields')
+
+        try:
+            rows = json.loads(request.body or b'[]')
+            if isinstance(rows,dict):
+                rows = rows.get('objects',[])
+            if not isinstance(rows,list):
+                raise ValueError('objects')
+        except ValueError:
+            return invalid_parameter_message('objects')
+
+        form_class = get_form(form,self.model)
+        update_fields = self.get_update_fields(form_class,unique_fields)
+        has_state = 'model_state' in form_class.base_fields
+        batch,states,indexes,errors,upserted = [],[],[],[],0
+        batch_size = self.model.upsert_batch_size
+        for start in range(0,len(rows),batch_size):
+            chunk = rows[start:start + batch_size]
+            for index,row,instance in zip(range(start,start + batch_size),chunk,self.get_existing(chunk,unique_fields)):
+                form = form_class(row if isinstance(row,dict) else {},instance = instance)
+                if not form.is_valid():
+                    errors.append({'index':index,'errors':form.errors})
+                    continue
+                batch.append(form.save(commit = False))
+                # a form with model_state already writes it with the other fields
+                states.append(not has_state and self.set_model_state(batch[-1],row))
+                indexes.append(index)
+                if len(batch) >= batch_size:
+                    upserted += self.write_batch(batch,states,unique_fields,update_fields,indexes,errors)
+                    batch,states,indexes = [],[],[]
+        if batch:
+            upserted += self.write_batch(batch,states,unique_fields,update_fields,indexes,errors)
+
+        return upsert_message(self.model,upserted,errors)
+
+# StreamingHttpResponse accepts asynchronous iterators since Django 4.2
+ASYNC_STREAMING = django.VERSION >= (4,2)
+
+def _format_event(event_id: int,event: str,data) -> str:
+    return 'id: {0}\nevent: {1}\ndata: {2}\n\n'.format(event_id,event,json.dumps(data))
+
+class BaseEventStreamAJAX(BaseCrud):
+    """
+    Server-Sent Events stream of the changes of a model with event_stream = True,
+    every event is sent as:
+
+        id: # number of event in the stream
+        event: change
+        data: {"id": # pk of register, "action": # create, update, delete, logic_delete,
+               bulk_create or upsert, "fields": # changed fields or null if they are not known}
+
+    A comment is sent every AUTOMATIC_CRUD_EVENTS_HEARTBEAT seconds to keep the connection alive.
+    If the client does not read its events fast enough, a reset event is sent and the stream
+    ends, the client should synchronize with the changes/ route and connect again.
+
+    With Django 4.2 or higher the view is asynchronous, so waiting clients do not use a thread.
+
+    """
+
+    def dispatch(self,request,*args,**kwargs):
+        # the stream is long lived, so it skips admission, compression and database pinning
+        self.model = self.get_view_model(kwargs)
+        return View.dispatch(self,request,*args,**kwargs)
+
+    def validate_request(self):
+        # login required validation
+        validation_login_required,response = self.validate_login_required()
+        if validation_login_required:
+            return response
+
+        # permission required validation
+        validation_permissions,response = self.validate_permissions()
+        if validation_permissions:
+            return response
+        return None
+
+    def get_heartbeat(self) -> float:
+        return getattr(settings,'AUTOMATIC_CRUD_EVENTS_HEARTBEAT',15)
+
+    def event_stream(self,subscription):
+        try:
+            yield 'retry: 3000\n\n'
+            event_id = 0
+            while not subscription.overflowed:
+                event = subscription.get(self.get_heartbeat())
+                if event is None:
+                    yield ': ping\n\n'
+                    continue
+                event_id += 1
+                yield _format_event(event_id,'change',event)
+            yield _format_event(event_id + 1,'reset',{})
+        finally:
+            subscription.close()
+
+    async def aevent_stream(self,subscription):
+        try:
+            yield 'retry: 3000\n\n'
+            event_id = 0
+            while not subscription.overflowed:
+                event = await subscription.get(self.get_heartbeat())
+                if event is None:
+                    yield ': ping\n\n'
+                    continue
+                event_id += 1
+                yield _format_event(event_id,'change',event)
+            yield _format_event(event_id + 1,'reset',{})
+        finally:
+            subscription.close()
+
+    def build_response(self,stream):
+        response = StreamingHttpResponse(stream,content_type = 'text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    if ASYNC_STREAMING:
+        async def get(self,request,model,*args,**kwargs):
+            response = await sync_to_async(self.validate_request)()
+            if response is not None:
+                return response
+            subscription = get_broker().asubscribe(get_channel(self.model))
+            return self.build_response(self.aevent_stream(subscription))
+    else:
+        def get(self,request,model,*args,**kwargs):
+            response = self.validate_request()
+            if response is not None:
+                return response
+            subscription = get_broker().subscribe(get_channel(self.model))
+            return self.build_response(self.event_stream(subscription))
@@ -0,0 +1,75 @@
+"""
+Measure the time and memory of django.setup() with automatic_crud installed.
+
+Every measure runs in a new Python process, so imports are never cached:
+
+    baseline        django.setup() without automatic_crud.
+    lazy            django.setup() with automatic_crud, exporters are imported on demand.
+    eager           same as lazy, importing the xlsx exporter as it was done on startup.
+
+Usage:
+
+    python benchmarks/import_time.py [--runs 10]
+
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+import json,resource,sys,time
+start = time.perf_counter()
+import django
+from django.conf import settings
+settings.configure(
+    SECRET_KEY = 'benchmark',
+    INSTALLED_APPS = {apps},
+    DATABASES = {{'default': {{'ENGINE': 'django.db.backends.sqlite3','NAME': ':memory:'}}}},
+)
+django.setup()
+{extra}
+print(json.dumps({{
+    'seconds': time.perf_counter() - start,
+    'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'openpyxl': 'openpyxl' in sys.modules,
+}}))
+"""
+
+DJANGO_APPS = ['django.contrib.contenttypes','django.contrib.auth']
+
+SCENARIOS = {
+    'baseline':(DJANGO_APPS,''),
+    'lazy':(DJANGO_APPS + ['automatic_crud'],''),
+    'eager':(DJANGO_APPS + ['automatic_crud'],'import automatic_crud.base_report'),
+}
+
+def measure(apps: list,extra: str) -> dict:
+    output = subprocess.check_output(
+                [sys.executable,'-c',SCRIPT.format(apps = apps,extra = extra)],
+                cwd = ROOT,
+            )
+    return json.loads(output)
+
+def main():
+    parser = argparse.ArgumentParser(description = 'django.setup() import time benchmark')
+    parser.add_argument('--runs',type = int,default = 10)
+    options = parser.parse_args()
+
+    print('{0:<10} {1:>12} {2:>12} {3:>14} {4:>10}'.format('scenario','median (ms)','min (ms)','max rss (KB)','openpyxl'))
+    for name,(apps,extra) in SCENARIOS.items():
+        results = [measure(apps,extra) for _ in range(options.runs)]
+        seconds = [result['seconds'] * 1000 for result in results]
+        print('{0:<10} {1:>12.1f} {2:>12.1f} {3:>14} {4:>10}'.format(
+            name,statistics.median(seconds),min(seconds),
+            int(statistics.median(result['max_rss'] for result in results)),
+            str(results[0]['openpyxl'])
+        ))
+
+if __name__ == '__main__':
+    main()
@@ -8,7 +8,7 @@ with open("README.md", "r", encoding="utf-8") as fh:
 setup(
     name='django-automatic-crud',
     version='1.2.0',
-    packages=['automatic_crud'],
+    packages=['automatic_crud','automatic_crud.management','automatic_crud.management.commands','automatic_crud.migrations'],
     include_package_data=True,
     license='BSD License',
     description='CRUDS Automáticos con Django',
@@ -21,6 +21,9 @@ setup(
         'Django>=2.2',
         'openpyxl==3.0.7',
     ],
+    extras_require={
+        'arrow': ['pyarrow>=4.0'],
+    },
     classifiers=[
         'Environment :: Web Environment',
         'Framework :: Django',
@@ -8,7 +8,7 @@ class Category(BaseModel):
     """Model definition for Category."""
 
     # TODO: Define fields here
-    name = models.CharField('Nombre de Categoría', max_length=150)    
+    name = models.CharField('Nombre de Categoría', max_length=150, unique=True)
 
     exclude_fields = ['date_created','date_modified','date_deleted']
     exclude_model = False
@@ -32,7 +32,7 @@ class Category(BaseModel):
         self.update_form = CategoryForm
         return self.update_form
 
-    class Meta:
+    class Meta(BaseModel.Meta):
         """Meta definition for Category."""
 
         verbose_name = 'Categoria'
@@ -52,7 +52,7 @@ class Product(BaseModel):
     name = models.CharField('Nombre de Producto', max_length=150)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
 
-    class Meta:
+    class Meta(BaseModel.Meta):
         """Meta definition for Product."""
 
         verbose_name = 'Product'
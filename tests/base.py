@@ -0,0 +1,21 @@
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE','tests.settings')
+django.setup()
+
+from django.test.utils import setup_databases,setup_test_environment,teardown_databases,teardown_test_environment
+
+_databases = None
+
+# test modules import setUpModule and tearDownModule, so the test databases
+# exist while the tests of the module run with python -m pytest or unittest
+def setUpModule():
+    global _databases
+    setup_test_environment()
+    _databases = setup_databases(verbosity = 0,interactive = False,aliases = {'default','replica'})
+
+def tearDownModule():
+    teardown_databases(_databases,verbosity = 0)
+    teardown_test_environment()
@@ -0,0 +1,35 @@
+SECRET_KEY = 'automatic-crud-tests'
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'automatic_crud',
+    'test_app',
+]
+
+MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+]
+
+ROOT_URLCONF = 'automatic_crud.urls'
+
+# two SQLite databases, replica plays the role of a read replica of default
+DATABASES = {
+    'default': {'ENGINE': 'django.db.backends.sqlite3','NAME': ':memory:'},
+    'replica': {'ENGINE': 'django.db.backends.sqlite3','NAME': ':memory:'},
+}
+
+DATABASE_ROUTERS = ['automatic_crud.routers.AutomaticCrudRouter']
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'APP_DIRS': True,
+    },
+]
+
+USE_TZ = True
+
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
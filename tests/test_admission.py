@@ -0,0 +1,69 @@
+import unittest
+from unittest import mock
+
+from tests.base import setUpModule,tearDownModule
+
+from django.core.cache import cache
+from django.test import RequestFactory,SimpleTestCase
+
+from automatic_crud.admission import Admission,AdmissionRejected
+from test_app.models import Category
+
+class AdmissionTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for attribute,value in (('shared_concurrent_heavy_requests',1),('heavy_requests_rate',None)):
+            patcher = mock.patch.object(Category,attribute,value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def admission(self,ip: str = '10.0.0.1') -> Admission:
+        request = RequestFactory().get('/',REMOTE_ADDR = ip)
+        return Admission(request,Category)
+
+    def test_released_slot_is_reused(self):
+        first,second = self.admission(),self.admission()
+        first.admit()
+        with self.assertRaises(AdmissionRejected):
+            second.admit()
+        first.release()
+        second.admit()
+        second.release()
+
+    def test_release_of_an_expired_slot_keeps_the_new_owner(self):
+        first = self.admission()
+        first.admit()
+        # the slot of first expires and is taken by second
+        cache.delete('automatic_crud:admission-slots:test_app.category:0')
+        second = self.admission()
+        second.admit()
+        first.release()
+        with self.assertRaises(AdmissionRejected):
+            self.admission().admit()
+        second.release()
+        self.admission().admit()
+
+    def test_rate_limit(self):
+        with mock.patch.object(Category,'heavy_requests_rate',(1,60)):
+            admission = self.admission()
+            admission.admit()
+            admission.release()
+            with self.assertRaises(AdmissionRejected) as rejected:
+                self.admission().admit()
+            self.assertGreaterEqual(rejected.exception.retry_after,1)
+            # other clients have their own rate
+            self.admission('10.0.0.2').admit()
+
+    def test_request_rejected_by_a_slot_does_not_count_in_the_rate(self):
+        with mock.patch.object(Category,'heavy_requests_rate',(1,60)):
+            first = self.admission('10.0.0.1')
+            first.admit()
+            with self.assertRaises(AdmissionRejected):
+                self.admission('10.0.0.2').admit()
+            first.release()
+            self.admission('10.0.0.2').admit()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from tests.base import setUpModule,tearDownModule
+
+from django.db.models.signals import post_init
+from django.test import TestCase
+
+from automatic_crud import counts
+from automatic_crud.counts import connect_counters,get_count
+from test_app.models import Category,Product
+
+class CounterSignalsTest(TestCase):
+
+    def setUp(self):
+        Category.count_strategy = 'counter'
+        connect_counters()
+
+    def tearDown(self):
+        post_init.disconnect(sender = Category,dispatch_uid = 'automatic_crud_count_post_init')
+        del Category.count_strategy
+
+    def test_post_init_is_only_connected_to_counter_models(self):
+        self.assertTrue(post_init.has_listeners(Category))
+        self.assertFalse(post_init.has_listeners(Product))
+
+    def test_state_changes_update_the_counter(self):
+        category = Category.objects.create(name = 'abarrote')
+        self.assertEqual(get_count(Category,Category.objects.filter(model_state = True)),(1,True))
+        category = Category.objects.get(pk = category.pk)
+        self.assertIn(counts._COUNTED_STATE,category.__dict__)
+        category.model_state = False
+        category.save()
+        self.assertEqual(get_count(Category,Category.objects.filter(model_state = True)),(0,True))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import types
+import unittest
+from unittest import mock
+
+from tests.base import setUpModule,tearDownModule
+
+from django.test import Client,TestCase,override_settings
+from django.urls import resolve
+
+from automatic_crud import dispatch
+from test_app.models import Category
+
+class DispatchModeTest(TestCase):
+
+    def setUp(self):
+        # registry and routes built for this test, with the events/ route of Category
+        Category.event_stream = True
+        self.addCleanup(delattr,Category,'event_stream')
+        registry = mock.patch.object(dispatch,'_registry',None)
+        registry.start()
+        self.addCleanup(registry.stop)
+        urlconf = types.ModuleType('dispatch_urls')
+        urlconf.urlpatterns = dispatch.build_dispatch_urls()
+        settings = override_settings(AUTOMATIC_CRUD_URL_MODE = 'dispatch',ROOT_URLCONF = urlconf)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.category = Category.objects.create(name = 'dispatched')
+
+    def test_reverse_and_resolve(self):
+        url = dispatch.reverse_crud('test_app-category-detail-ajax',kwargs = {'pk':self.category.pk})
+        self.assertEqual(url,'/ajax-test_app/category/detail/{0}/'.format(self.category.pk))
+        self.assertIs(resolve(url).func,dispatch.dispatch_view)
+
+        response = Client().get(url)
+        self.assertEqual(response.status_code,200)
+        self.assertEqual(response.wsgi_request.resolver_match.url_name,'test_app-category-detail-ajax')
+
+    def test_unknown_route_is_not_found(self):
+        self.assertEqual(Client().get('/ajax-test_app/category/unknown/').status_code,404)
+
+    def test_events_route(self):
+        url = dispatch.reverse_crud('test_app-category-events-ajax')
+        self.assertEqual(url,'/ajax-test_app/category/events/')
+        pattern = next(item for item in dispatch.get_crud_patterns() if item.name == 'test_app-category-events-ajax')
+        if dispatch.is_async_pattern(pattern):
+            self.assertIsNot(resolve(url).func,dispatch.dispatch_view)
+
+        response = Client().get(url)
+        self.assertEqual(response.status_code,200)
+        self.assertEqual(response['Content-Type'],'text/event-stream')
+        response.close()
+
+if __name__ == '__main__':
+    unittest.main()
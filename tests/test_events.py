@@ -0,0 +1,40 @@
+import unittest
+from unittest import mock
+
+from tests.base import setUpModule,tearDownModule
+
+from django.test import Client,TransactionTestCase
+
+from automatic_crud import events
+from test_app.models import Category
+
+class FailingBroker(events.InProcessBroker):
+
+    def publish(self,channel,event):
+        raise ConnectionError('broker not available')
+
+class PublishEventsTest(TransactionTestCase):
+
+    def setUp(self):
+        Category.event_stream = True
+
+    def tearDown(self):
+        del Category.event_stream
+
+    def test_publish_failure_does_not_fail_the_write(self):
+        with mock.patch.object(events,'_broker',FailingBroker()):
+            with self.assertLogs('automatic_crud.events','ERROR'):
+                response = Client().post('/ajax-test_app/category/create/',{'name':'written'})
+        self.assertEqual(response.status_code,201)
+        self.assertTrue(Category.objects.filter(name = 'written').exists())
+
+    def test_events_are_delivered_after_commit(self):
+        broker = events.InProcessBroker()
+        with mock.patch.object(events,'_broker',broker):
+            subscription = broker.subscribe(events.get_channel(Category))
+            category = Category.objects.create(name = 'created')
+        self.assertEqual(subscription.get(0),{'id':category.pk,'action':'create','fields':None})
+        subscription.close()
+
+if __name__ == '__main__':
+    unittest.main()
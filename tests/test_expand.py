@@ -0,0 +1,39 @@
+import json
+import unittest
+
+from tests.base import setUpModule,tearDownModule
+
+from django.test import Client,TestCase
+
+from test_app.models import Category,Product
+
+class ExpandTest(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name = 'abarrote')
+        for index in range(5):
+            Product.objects.create(name = 'p{0}'.format(index),category = self.category)
+
+    def tearDown(self):
+        Category.expand_max_items = 100
+
+    def test_reverse_relation_reads_only_max_items(self):
+        Category.expand_max_items = 2
+        category = Category.objects.create(name = 'limpieza')
+        Product.objects.create(name = 'jabon',category = category)
+        response = Client().get('/ajax-test_app/category/list/?expand=product_set')
+        self.assertEqual(response.status_code,200)
+        data = json.loads(response.content)
+        products = [[item['fields']['name'] for item in register['fields']['product_set']] for register in data['objects']]
+        self.assertEqual(products,[['p0','p1'],['jabon']])
+
+    def test_detail_with_expand_omits_natural_primary_key(self):
+        url = '/ajax-test_app/category/detail/{0}/'.format(self.category.pk)
+        plain = json.loads(Client().get(url).content)
+        expanded = json.loads(Client().get(url + '?expand=product_set').content)
+        self.assertNotIn('pk',plain)
+        self.assertNotIn('pk',expanded)
+        self.assertEqual(len(expanded['fields']['product_set']),5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from unittest import mock
+
+from tests.base import setUpModule,tearDownModule
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client,TestCase
+
+from test_app.models import Category
+
+class ImportTest(TestCase):
+
+    def post(self,route: str,name: str,content: bytes):
+        return Client().post('/test_app/category/{0}/'.format(route),{'file':SimpleUploadedFile(name,content)})
+
+    def test_csv_import(self):
+        response = self.post('csv-import','categories.csv',b'name\nfirst\nsecond\n')
+        self.assertEqual(response.status_code,201)
+        self.assertEqual(response.json()['created'],2)
+        self.assertEqual(Category.objects.count(),2)
+
+    def test_file_is_required(self):
+        response = Client().post('/test_app/category/csv-import/')
+        self.assertEqual(response.status_code,400)
+
+    def test_invalid_excel_file(self):
+        response = self.post('excel-import','categories.xlsx',b'name\nfirst\n')
+        self.assertEqual(response.status_code,400)
+        self.assertEqual(response.json(),{'error':'El archivo enviado no es válido.','created':0})
+
+    def test_csv_not_encoded_in_utf8(self):
+        response = self.post('csv-import','categories.csv','name\ncañón\n'.encode('latin-1'))
+        self.assertEqual(response.status_code,400)
+        self.assertEqual(response.json()['error'],'El archivo enviado no es válido.')
+        self.assertFalse(Category.objects.exists())
+
+    def test_rejected_batch_does_not_discard_other_batches(self):
+        # rows 2 and 3 are the first batch, the duplicated name is rejected by the database in the second
+        with mock.patch.object(Category,'import_batch_size',2):
+            response = self.post('csv-import','categories.csv',b'name\nfirst\nsecond\nthird\nthird\nfifth\n')
+        self.assertEqual(response.status_code,400)
+        data = response.json()
+        self.assertEqual(data['created'],3)
+        self.assertEqual([error['rows'] for error in data['error']],[[4,5]])
+        self.assertEqual(
+            sorted(Category.objects.values_list('name',flat = True)),['fifth','first','second']
+        )
+
+if __name__ == '__main__':
+    unittest.main()
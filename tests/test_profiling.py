@@ -0,0 +1,39 @@
+import unittest
+
+from tests.base import setUpModule,tearDownModule
+
+from django.contrib.auth.models import User
+from django.test import Client,TestCase,override_settings
+
+from automatic_crud.profiling import PROFILE_HEADER
+from test_app.models import Category
+
+@override_settings(AUTOMATIC_CRUD_PROFILING = True)
+class ProfileStreamingTest(TestCase):
+
+    def setUp(self):
+        for index in range(3):
+            Category.objects.create(name = 'c{0}'.format(index))
+        self.client = Client()
+        self.client.force_login(User.objects.create_user('staff',is_staff = True))
+
+    def test_streamed_response_is_profiled_while_it_is_sent(self):
+        response = self.client.get('/test_app/category/csv-report/?_profile=store')
+        self.assertTrue(response.streaming)
+        report_url = '/profiles/{0}/'.format(response[PROFILE_HEADER])
+        self.assertEqual(self.client.get(report_url).status_code,404)
+
+        content = b''.join(response.streaming_content)
+        response.close()
+        self.assertIn(b'c2',content)
+        report = self.client.get(report_url).json()
+        self.assertGreaterEqual(report['query_count'],1)
+        self.assertIn('explain_note',report)
+
+    def test_inline_report_of_a_streamed_response(self):
+        report = self.client.get('/test_app/category/csv-report/?_profile=inline').json()
+        self.assertEqual(report['status_code'],200)
+        self.assertGreaterEqual(report['query_count'],1)
+
+if __name__ == '__main__':
+    unittest.main()
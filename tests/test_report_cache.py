@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from tests.base import setUpModule,tearDownModule
+
+from django.test import TestCase,override_settings
+
+from automatic_crud import page_cache
+from automatic_crud.report_cache import _get_lock,build_report_cache_key,get_cached_report
+from test_app.models import Category
+
+class ReportCacheTest(TestCase):
+
+    def setUp(self):
+        Category.excel_report_cache = True
+        page_cache._get_cached_models.cache_clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings = override_settings(
+                            AUTOMATIC_CRUD_REPORT_CACHE_DIR = self.directory.name,
+                            AUTOMATIC_CRUD_REPORT_WAIT_TIMEOUT = 0.2
+                        )
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        self.directory.cleanup()
+        del Category.excel_report_cache
+        page_cache._get_cached_models.cache_clear()
+
+    def test_key_changes_on_writes_without_queries(self):
+        with self.assertNumQueries(0):
+            key = build_report_cache_key(Category,{'fields':['name']})
+        self.assertEqual(key,build_report_cache_key(Category,{'fields':['name']}))
+        Category.objects.create(name = 'abarrote')
+        self.assertNotEqual(key,build_report_cache_key(Category,{'fields':['name']}))
+
+    def test_waiter_builds_the_report_after_the_timeout(self):
+        key = build_report_cache_key(Category,{})
+        lock_path = os.path.join(self.directory.name,'{0}.xlsx.lock'.format(key))
+        # another process is building the report
+        open(lock_path,'w').close()
+        built = []
+        report_file = get_cached_report(key,'.xlsx',lambda file: built.append(file.write(b'report')))
+        with report_file:
+            self.assertEqual(report_file.read(),b'report')
+        self.assertEqual(len(built),1)
+        self.assertTrue(os.path.exists(lock_path))
+
+    def test_waiter_of_this_process_builds_the_report_after_the_timeout(self):
+        key = build_report_cache_key(Category,{})
+        lock = _get_lock(key)
+        lock.acquire()
+        try:
+            report_file = get_cached_report(key,'.xlsx',lambda file: file.write(b'report'))
+        finally:
+            lock.release()
+        with report_file:
+            self.assertEqual(report_file.read(),b'report')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from tests.base import setUpModule,tearDownModule
+
+from django.db import router
+from django.test import Client
+
+from automatic_crud.routers import STICKY_COOKIE_NAME,pin_primary,route_reads
+from test_app.models import Category
+
+class AutomaticCrudRouterTest(unittest.TestCase):
+
+    def setUp(self):
+        Category.read_db = 'replica'
+        Category.objects.using('default').create(name = 'primary')
+        Category.objects.using('replica').create(name = 'replica')
+        self.client = Client()
+
+    def tearDown(self):
+        del Category.read_db
+        for alias in ('default','replica'):
+            Category.objects.using(alias).all().delete()
+
+    def get_names(self):
+        response = self.client.get('/ajax-test_app/category/list/?end=100')
+        self.assertEqual(response.status_code,200)
+        return [register['fields']['name'] for register in response.json()['objects']]
+
+    def test_reads_outside_views_use_default(self):
+        self.assertEqual(router.db_for_read(Category),'default')
+        self.assertEqual(list(Category.objects.values_list('name',flat = True)),['primary'])
+
+    def test_reads_of_views_use_read_db(self):
+        route_reads(True)
+        try:
+            self.assertEqual(router.db_for_read(Category),'replica')
+            pin_primary(True)
+            self.assertEqual(router.db_for_read(Category),'default')
+        finally:
+            route_reads(False)
+            pin_primary(False)
+
+    def test_list_view_reads_replica(self):
+        self.assertEqual(self.get_names(),['replica'])
+
+    def test_write_pins_following_reads_to_primary(self):
+        response = self.client.post('/ajax-test_app/category/create/',{'name':'written'})
+        self.assertEqual(response.status_code,201)
+        self.assertIn(STICKY_COOKIE_NAME,response.cookies)
+        self.assertTrue(Category.objects.using('default').filter(name = 'written').exists())
+        self.assertFalse(Category.objects.using('replica').filter(name = 'written').exists())
+
+        self.assertEqual(self.get_names(),['primary','written'])
+
+        # when the cookie expires reads go back to the replica
+        del self.client.cookies[STICKY_COOKIE_NAME]
+        self.assertEqual(self.get_names(),['replica'])
+
+if __name__ == '__main__':
+    unittest.main()
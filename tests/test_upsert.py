@@ -0,0 +1,54 @@
+import json
+import unittest
+from unittest import mock
+
+from tests.base import setUpModule,tearDownModule
+
+from django.test import Client,TestCase
+
+from test_app.models import Category,Product
+
+class UpsertTest(TestCase):
+
+    def upsert(self,model: str,objects):
+        return Client().post(
+                    '/ajax-test_app/{0}/upsert/'.format(model),json.dumps({'objects':objects}),
+                    content_type = 'application/json'
+                )
+
+    def test_create_and_update_by_unique_field(self):
+        existing = Category.objects.create(name = 'existing')
+        response = self.upsert('category',[{'name':'existing'},{'name':'new'},{'name':'new'}])
+        self.assertEqual(response.status_code,200)
+        self.assertEqual(response.json()['error'],'Ninguno')
+        self.assertEqual(sorted(Category.objects.values_list('name',flat = True)),['existing','new'])
+        self.assertEqual(Category.objects.get(name = 'existing').pk,existing.pk)
+
+    def test_invalid_register_is_reported_by_index(self):
+        response = self.upsert('category',[{'name':'valid'},{'name':''}])
+        self.assertEqual(response.status_code,400)
+        self.assertEqual([error['index'] for error in response.json()['error']],[1])
+        self.assertTrue(Category.objects.filter(name = 'valid').exists())
+
+    def test_logically_deleted_register_is_not_reactivated(self):
+        Category.objects.create(name = 'deleted',model_state = False)
+        self.assertEqual(self.upsert('category',[{'name':'deleted'}]).status_code,200)
+        self.assertFalse(Category.objects.get(name = 'deleted').model_state)
+
+        self.assertEqual(self.upsert('category',[{'name':'deleted','model_state':True}]).status_code,200)
+        self.assertTrue(Category.objects.get(name = 'deleted').model_state)
+
+    def test_model_without_unique_fields(self):
+        response = self.upsert('product',[{'name':'product'}])
+        self.assertEqual(response.status_code,400)
+
+    def test_upsert_key_without_unique_constraint(self):
+        category = Category.objects.create(name = 'category')
+        with mock.patch.object(Product,'upsert_unique_fields',('name',)):
+            response = self.upsert('product',[{'name':'product','category':category.pk}])
+        self.assertEqual(response.status_code,400)
+        self.assertEqual(response.json()['error'],'El parámetro upsert_unique_fields no es válido.')
+        self.assertFalse(Product.objects.exists())
+
+if __name__ == '__main__':
+    unittest.main()